@@ -0,0 +1,134 @@
+# backend/agents/batch.py
+"""
+Batch recommendations for offline campaigns.
+
+    python -m backend.agents.batch users.jsonl recs.jsonl --concurrency 4 --retries 2
+
+Input lines: {"user_id": "...", "profile": "...", "query": "..."} (user_id optional, line number is used).
+Each finished user is appended to the output file immediately, so an interrupted
+run picks up where it stopped. Users whose last attempt failed are retried on resume.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from langchain_core.documents import Document
+from backend.db.vector_store import embeddings_model, search_items
+from backend.agents.recommender import generate_chain, format_docs, vector_store
+
+def _key(request: dict, index: int) -> str:
+    return str(request.get("user_id", index))
+
+def load_done(output_path) -> set:
+    """Keys already written successfully. Later lines win, so a retried user counts once."""
+    status = {}
+    path = Path(output_path)
+    if not path.exists():
+        return set()
+    with open(path) as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line from a crash
+            status[row["key"]] = "error" not in row
+    return {k for k, ok in status.items() if ok}
+
+def _run_llm(inputs: list, concurrency: int, max_retries: int, backoff: float):
+    """Runs generate_chain.batch, retrying only the failed items with exponential backoff."""
+    outputs = [None] * len(inputs)
+    errors = [None] * len(inputs)
+    todo = list(range(len(inputs)))
+    for attempt in range(max_retries + 1):
+        results = generate_chain.batch(
+            [inputs[i] for i in todo],
+            config={"max_concurrency": concurrency},
+            return_exceptions=True,
+        )
+        failed = []
+        for i, res in zip(todo, results):
+            if isinstance(res, Exception):
+                errors[i] = f"{type(res).__name__}: {res}"
+                failed.append(i)
+            elif not isinstance(res, dict):
+                errors[i] = "Invalid JSON"
+                failed.append(i)
+            else:
+                outputs[i], errors[i] = res, None
+        todo = failed
+        if not todo or attempt == max_retries:
+            break
+        time.sleep(backoff * 2 ** attempt)
+    return outputs, errors
+
+def recommend_batch(requests: list, output_path, concurrency: int = 4, max_retries: int = 2,
+                    chunk_size: int = 256, k: int = 10, backoff: float = 1.0):
+    """
+    Recommendations for many (profile, query) pairs.
+    Per chunk: one encode pass over all queries, one multi-query vector search,
+    then the LLM step through generate_chain.batch with bounded concurrency.
+    """
+    done = load_done(output_path)
+    pending = [(_key(r, i), r) for i, r in enumerate(requests) if _key(r, i) not in done]
+    stats = {"total": len(requests), "skipped": len(requests) - len(pending), "ok": 0, "failed": 0}
+
+    start = time.perf_counter()
+    with open(output_path, "a+") as out:
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")  # terminate a line torn by a crash
+        for c in range(0, len(pending), chunk_size):
+            chunk = pending[c:c + chunk_size]
+            queries = [r.get("query", "") for _, r in chunk]
+            vectors = embeddings_model.encode(queries, batch_size=64).tolist()
+            hits = search_items(vector_store, vectors, k)
+
+            inputs = [
+                {
+                    "context": format_docs([Document(page_content=h["text"] or "", metadata=h["metadata"]) for h in items]),
+                    "profile": r.get("profile", ""),
+                    "input": r.get("query", ""),
+                }
+                for (_, r), items in zip(chunk, hits)
+            ]
+            outputs, errors = _run_llm(inputs, concurrency, max_retries, backoff)
+
+            for (key, r), res, err in zip(chunk, outputs, errors):
+                row = {"key": key, "profile": r.get("profile", ""), "query": r.get("query", "")}
+                if err:
+                    row["error"] = err
+                    stats["failed"] += 1
+                else:
+                    row["recommendations"] = res.get("recommendations", [])[:3]
+                    stats["ok"] += 1
+                out.write(json.dumps(row) + "\n")
+            out.flush()
+
+            elapsed = time.perf_counter() - start
+            processed = stats["ok"] + stats["failed"]
+            print(f"[batch] {processed}/{len(pending)} users, {stats['failed']} failed, "
+                  f"{processed / elapsed * 60:.1f} users/min")
+
+    elapsed = time.perf_counter() - start
+    processed = stats["ok"] + stats["failed"]
+    stats["elapsed_s"] = round(elapsed, 2)
+    stats["users_per_minute"] = round(processed / elapsed * 60, 1) if elapsed else 0.0
+    return stats
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Batch recommendations for many users")
+    ap.add_argument("input", help="JSONL with profile/query per line")
+    ap.add_argument("output", help="JSONL results, appended to and resumed from")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--retries", type=int, default=2)
+    ap.add_argument("--chunk-size", type=int, default=256)
+    ap.add_argument("--backoff", type=float, default=1.0)
+    args = ap.parse_args()
+
+    with open(args.input) as f:
+        requests = [json.loads(line) for line in f if line.strip()]
+
+    stats = recommend_batch(requests, args.output, concurrency=args.concurrency, max_retries=args.retries,
+                            chunk_size=args.chunk_size, backoff=args.backoff)
+    print(json.dumps(stats, indent=2))
@@ -0,0 +1,111 @@
+# backend/agents/cache.py
+"""
+Semantic response cache for the recommender chain.
+Near-identical (profile, query) pairs reuse an earlier answer instead of
+re-running retrieval and the LLM.
+"""
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from backend.db.vector_store import embeddings_model, get_catalogue_version
+
+def normalize(profile: str, query: str) -> str:
+    text = f"profile: {profile or ''}\nquery: {query or ''}".lower()
+    text = re.sub(r"[^\w\s:\-]", " ", text)
+    return re.sub(r"[ \t]+", " ", text).strip()
+
+class SemanticCache:
+    def __init__(self, threshold: float = 0.95, ttl: float = 3600, max_entries: int = 512):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (vector, value, created_at)
+        self._matrix = None            # stacked vectors, rebuilt lazily after writes
+        self._keys = []
+        self._version = get_catalogue_version()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _check_version(self):
+        version = get_catalogue_version()
+        if version != self._version:
+            self._entries.clear()
+            self._matrix = None
+            self._version = version
+            self.invalidations += 1
+
+    def _expire(self, now: float):
+        expired = [k for k, (_, _, created) in self._entries.items() if now - created > self.ttl]
+        for k in expired:
+            del self._entries[k]
+        if expired:
+            self._matrix = None
+            self.evictions += len(expired)
+
+    def _index(self):
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = np.stack([self._entries[k][0] for k in self._keys]) if self._keys else None
+        return self._matrix
+
+    def embed(self, key: str):
+        return embeddings_model.encode([key], normalize_embeddings=True)[0].astype(np.float32)
+
+    def lookup(self, profile: str, query: str):
+        """
+        Returns (cached value or None, key, vector). Pass key/vector back to store() on a miss.
+        Hits are copies, so callers may modify them.
+        """
+        key = normalize(profile, query)
+        with self._lock:
+            self._check_version()
+            self._expire(time.time())
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._entries[key][1]), key, self._entries[key][0]
+
+        vec = self.embed(key)
+        with self._lock:
+            # the catalogue may have changed or entries expired while embedding
+            self._check_version()
+            self._expire(time.time())
+            matrix = self._index()
+            if matrix is not None:
+                sims = matrix @ vec
+                best = int(np.argmax(sims))
+                best_key = self._keys[best]
+                if sims[best] >= self.threshold and best_key in self._entries:
+                    self._entries.move_to_end(best_key)
+                    self.hits += 1
+                    return copy.deepcopy(self._entries[best_key][1]), key, vec
+            self.misses += 1
+            return None, key, vec
+
+    def store(self, key: str, vec, value):
+        with self._lock:
+            self._entries[key] = (vec, copy.deepcopy(value), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
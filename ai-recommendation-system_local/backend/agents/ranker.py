@@ -0,0 +1,61 @@
+# backend/agents/ranker.py
+"""
+LLM-free ranking: scores retrieved items with a weighted blend of
+query similarity, profile similarity and tag overlap.
+"""
+import numpy as np
+from backend.db.vector_store import embeddings_model, search_items
+
+DEFAULT_WEIGHTS = {"query": 0.6, "profile": 0.3, "tags": 0.1}
+
+# Metadata keys that are identifiers, not descriptive tags
+NON_TAG_KEYS = {"id", "title"}
+
+def _unit(vec):
+    vec = np.asarray(vec, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+def tag_overlap(metadata: dict, text: str) -> float:
+    """Fraction of an item's tags that are mentioned in the profile/query text."""
+    tags = [str(v).lower() for k, v in metadata.items() if k not in NON_TAG_KEYS]
+    if not tags:
+        return 0.0
+    return sum(1 for t in tags if t and t in text) / len(tags)
+
+def _template_reason(metadata: dict, text: str, query_sim: float, profile_sim: float) -> str:
+    matched = [str(v) for k, v in metadata.items() if k not in NON_TAG_KEYS and str(v).lower() in text]
+    if matched:
+        return f"Matches your interest in {', '.join(matched)}"
+    return "Close match to your query" if query_sim >= profile_sim else "Close match to your profile"
+
+def rank_items(store, profile: str, query: str, k: int = 10, top_n: int = 3, weights: dict = None, reasons: bool = True):
+    """
+    Rank the k nearest items without calling the LLM.
+    Returns the same item shape as the LLM path: title, score (0.0-1.0), reason.
+    """
+    w = {**DEFAULT_WEIGHTS, **(weights or {})}
+    total = sum(w.values()) or 1.0
+
+    query_vec, profile_vec = embeddings_model.encode([query, profile or query], normalize_embeddings=True)
+    candidates = search_items(store, [query_vec.tolist()], k)[0]
+
+    text = f"{profile} {query}".lower()
+    ranked = []
+    for c in candidates:
+        item_vec = _unit(c["embedding"])
+        query_sim = float(item_vec @ query_vec)
+        profile_sim = float(item_vec @ profile_vec)
+        tag_sim = tag_overlap(c["metadata"], text)
+        score = (w["query"] * query_sim + w["profile"] * profile_sim + w["tags"] * tag_sim) / total
+
+        rec = {
+            "title": c["metadata"].get("title", "Unknown"),
+            "score": round(min(max(score, 0.0), 1.0), 4),
+        }
+        if reasons:
+            rec["reason"] = _template_reason(c["metadata"], text, query_sim, profile_sim)
+        ranked.append(rec)
+
+    ranked.sort(key=lambda r: r["score"], reverse=True)
+    return ranked[:top_n]
@@ -1,19 +1,38 @@
 # backend/agents/recommender.py
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from operator import itemgetter
+from contextlib import aclosing
 from langchain_ollama import ChatOllama
-from backend.core.prompts import RECOMMENDER_PROMPT
+from backend.core.config import get_settings
+from backend.core.prompts import RECOMMENDER_PROMPT, REASON_PROMPT
 from backend.db.vector_store import get_vector_store
+from backend.agents.ranker import rank_items
+from backend.agents.cache import SemanticCache
+from backend.core.fake_llm import FakeRecommenderLLM
+from backend.agents.streaming import RecommendationStreamParser
+import asyncio
 import os
 
-os.environ["LANGCHAIN_TRACING_V2"] = "false"
+# Off unless explicitly enabled in the environment
+os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
 
-llm = ChatOllama(model="llama3.2:3b", temperature=0.3, timeout=60)
+settings = get_settings()
+
+if settings.RECOMMENDER_LLM == "fake":
+    llm = FakeRecommenderLLM(first_token_delay=settings.FAKE_FIRST_TOKEN_DELAY, token_delay=settings.FAKE_TOKEN_DELAY)
+else:
+    llm = ChatOllama(model="llama3.2:3b", temperature=0.3, timeout=60)
 
 vector_store = get_vector_store()
 retriever = vector_store.as_retriever(search_kwargs={"k": 10})
 
+cache = SemanticCache(
+    threshold=settings.CACHE_SIMILARITY_THRESHOLD,
+    ttl=settings.CACHE_TTL_SECONDS,
+    max_entries=settings.CACHE_MAX_ENTRIES,
+)
+
 prompt = PromptTemplate.from_template(RECOMMENDER_PROMPT)
 parser = JsonOutputParser()
 
@@ -34,19 +53,159 @@ def format_docs(docs):
     
     return "\n".join(formatted) if formatted else "No valid items."
 
-chain = (
-    {"context": retriever | format_docs, "profile": RunnablePassthrough(), "input": RunnablePassthrough()}
-    | prompt
-    | llm
-    | parser
-)
+def build_generate_chain(chat_model):
+    """LLM step on its own, so batch jobs can supply pre-retrieved context."""
+    return prompt | chat_model | parser
+
+def build_chain(chat_model, item_retriever=None):
+    """Full retrieval + LLM chain; the eval harness swaps in a local stand-in model."""
+    item_retriever = item_retriever or retriever
+    return (
+        {"context": itemgetter("input") | item_retriever | format_docs, "profile": itemgetter("profile"), "input": itemgetter("input")}
+        | build_generate_chain(chat_model)
+    )
+
+generate_chain = build_generate_chain(llm)
+chain = build_chain(llm)
+
+# Short follow-up chain: only writes reasons for items the fast ranker already picked
+reason_chain = PromptTemplate.from_template(REASON_PROMPT) | llm | parser
+
+def _reason_inputs(profile: str, query: str, recs: list):
+    items = "\n".join(f"- {r['title']}" for r in recs)
+    return {"profile": profile, "input": query, "items": items}
+
+def _apply_reasons(recs: list, reasons):
+    if not isinstance(reasons, dict):
+        return recs
+    return [{**r, "reason": reasons.get(r["title"], r.get("reason", ""))} for r in recs]
+
+def explain_recommendations(profile: str, query: str, recs: list):
+    """Fill in LLM-written reasons for already ranked items. Keeps existing reasons on failure."""
+    if not recs:
+        return recs
+    try:
+        return _apply_reasons(recs, reason_chain.invoke(_reason_inputs(profile, query, recs)))
+    except Exception:
+        return recs
+
+async def aexplain_recommendations(profile: str, query: str, recs: list):
+    if not recs:
+        return recs
+    try:
+        return _apply_reasons(recs, await reason_chain.ainvoke(_reason_inputs(profile, query, recs)))
+    except Exception:
+        return recs
+
+def _fast_weights():
+    return {
+        "query": settings.FAST_WEIGHT_QUERY,
+        "profile": settings.FAST_WEIGHT_PROFILE,
+        "tags": settings.FAST_WEIGHT_TAGS,
+    }
 
-def get_recommendations(profile: str, query: str, history: list = None):
+def get_fast_recommendations(profile: str, query: str, reasons: str = "template", weights: dict = None):
+    """
+    Deterministic ranking on stored embeddings, no LLM on the hot path.
+    reasons: "template" (instant), "llm" (one short LLM call) or "none" (omit reason).
+    """
     try:
+        recs = rank_items(
+            vector_store, profile, query,
+            k=10, top_n=3,
+            weights=weights or _fast_weights(),
+            reasons=reasons != "none",
+        )
+        if reasons == "llm":
+            recs = explain_recommendations(profile, query, recs)
+        return {"recommendations": recs} if recs else {"recommendations": [], "reason": "No matches"}
+    except Exception as e:
+        return {"recommendations": [], "reason": f"Error: {str(e)}"}
+
+def get_recommendations(profile: str, query: str, history: list = None, mode: str = None,
+                        reasons: str = "template", weights: dict = None, use_cache: bool = True):
+    """
+    mode: "llm" (ChatOllama picks and scores) or "fast" (embedding blend, milliseconds).
+    Defaults to settings.RECOMMENDER_MODE. reasons/weights only apply to the fast mode.
+    use_cache: look up near-identical (profile, query) pairs before running the LLM chain.
+    """
+    if (mode or settings.RECOMMENDER_MODE) == "fast":
+        return get_fast_recommendations(profile, query, reasons=reasons, weights=weights)
+    try:
+        use_cache = use_cache and settings.CACHE_ENABLED
+        key = vec = None
+        if use_cache:
+            cached, key, vec = cache.lookup(profile, query)
+            if cached is not None:
+                return {"recommendations": cached, "cached": True}
+
         response = chain.invoke({"input": query, "profile": profile})
-        if not isinstance(response, dict):
-            return {"recommendations": [], "reason": "Invalid JSON"}
-        recs = response.get("recommendations", [])
-        return {"recommendations": recs[:3]} if recs else {"recommendations": [], "reason": "No matches"}
+        return _finish(response, key, vec)
     except Exception as e:
-        return {"recommendations": [], "reason": f"Error: {str(e)}"}
\ No newline at end of file
+        return {"recommendations": [], "reason": f"Error: {str(e)}"}
+
+def _finish(response, cache_key, vec):
+    if not isinstance(response, dict):
+        return {"recommendations": [], "reason": "Invalid JSON"}
+    recs = response.get("recommendations", [])
+    if recs and cache_key:
+        cache.store(cache_key, vec, recs[:3])
+    return {"recommendations": recs[:3]} if recs else {"recommendations": [], "reason": "No matches"}
+
+async def aget_recommendations(profile: str, query: str, mode: str = None, reasons: str = "template",
+                               weights: dict = None, use_cache: bool = True):
+    """Async get_recommendations: CPU-bound embedding runs in worker threads, the LLM call is awaited."""
+    if (mode or settings.RECOMMENDER_MODE) == "fast":
+        result = await asyncio.to_thread(get_fast_recommendations, profile, query, "template" if reasons == "llm" else reasons, weights)
+        if reasons == "llm" and result["recommendations"]:
+            result["recommendations"] = await aexplain_recommendations(profile, query, result["recommendations"])
+        return result
+    try:
+        use_cache = use_cache and settings.CACHE_ENABLED
+        key = vec = None
+        if use_cache:
+            cached, key, vec = await asyncio.to_thread(cache.lookup, profile, query)
+            if cached is not None:
+                return {"recommendations": cached, "cached": True}
+
+        response = await chain.ainvoke({"input": query, "profile": profile})
+        return _finish(response, key, vec)
+    except Exception as e:
+        return {"recommendations": [], "reason": f"Error: {str(e)}"}
+
+async def astream_recommendations(profile: str, query: str, use_cache: bool = True):
+    """
+    Yields recommendation dicts one by one, each as soon as the LLM has written it.
+    Falls back to a full JSON parse if the output did not match the streaming format.
+    """
+    use_cache = use_cache and settings.CACHE_ENABLED
+    key = vec = None
+    if use_cache:
+        cached, key, vec = await asyncio.to_thread(cache.lookup, profile, query)
+        if cached is not None:
+            for rec in cached:
+                yield rec
+            return
+
+    docs = await asyncio.to_thread(retriever.invoke, query)
+    inputs = {"context": format_docs(docs), "profile": profile, "input": query}
+    stream_parser = RecommendationStreamParser(limit=3)
+    recs = []
+    async with aclosing((prompt | llm).astream(inputs)) as chunks:
+        async for chunk in chunks:
+            for rec in stream_parser.feed(chunk.content):
+                recs.append(rec)
+                yield rec
+            if stream_parser.done:
+                break
+
+    if not recs:
+        try:
+            response = parser.parse(stream_parser.buffer)
+            recs = response.get("recommendations", [])[:3] if isinstance(response, dict) else []
+        except Exception:
+            recs = []
+        for rec in recs:
+            yield rec
+    if recs and key:
+        cache.store(key, vec, recs)
@@ -0,0 +1,75 @@
+# backend/agents/streaming.py
+"""
+Incremental parsing of the recommender's JSON output.
+Each item of the "recommendations" array is emitted as soon as its closing brace
+arrives, instead of waiting for JsonOutputParser to see the whole document.
+"""
+import json
+import re
+
+ARRAY_START = re.compile(r'"recommendations"\s*:\s*\[')
+
+class RecommendationStreamParser:
+    def __init__(self, limit: int = 3):
+        self.limit = limit
+        self.buffer = ""
+        self.emitted = 0
+        self.done = False
+        self._pos = None  # scan position inside the array, None until it is found
+        self._depth = 0
+        self._start = None
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> list:
+        """Add streamed text; returns the recommendation dicts completed by it."""
+        self.buffer += text
+        if self.done:
+            return []
+        if self._pos is None:
+            match = ARRAY_START.search(self.buffer)
+            if not match:
+                return []
+            self._pos = match.end()
+
+        items = []
+        buf = self.buffer
+        while self._pos < len(buf):
+            ch = buf[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                if self._depth == 0:
+                    self._start = self._pos
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0 and self._start is not None:
+                    item = self._parse(buf[self._start:self._pos + 1])
+                    self._start = None
+                    if item is not None:
+                        items.append(item)
+                        self.emitted += 1
+                        if self.emitted >= self.limit:
+                            self.done = True
+                            break
+            elif ch == "]" and self._depth == 0:
+                self.done = True
+                break
+            self._pos += 1
+        return items
+
+    @staticmethod
+    def _parse(text: str):
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return item if isinstance(item, dict) else None
@@ -7,9 +7,33 @@ class Settings(BaseSettings):
     GROQ_API_KEY: Optional[str] = None
     LANGCHAIN_API_KEY: Optional[str] = None
 
+    # "ollama" = local llama3.2, "fake" = FakeRecommenderLLM stand-in for load tests
+    RECOMMENDER_LLM: str = "ollama"
+    FAKE_FIRST_TOKEN_DELAY: float = 0.2
+    FAKE_TOKEN_DELAY: float = 0.01
+
+    # "llm" = ChatOllama picks and scores items, "fast" = embedding blend, no LLM
+    RECOMMENDER_MODE: str = "llm"
+    FAST_WEIGHT_QUERY: float = 0.6
+    FAST_WEIGHT_PROFILE: float = 0.3
+    FAST_WEIGHT_TAGS: float = 0.1
+
+    # Vector store backend: "chroma" or "mmap" (see backend/db/mmap_store.py)
+    VECTOR_BACKEND: str = "chroma"
+    MMAP_DTYPE: str = "float16"       # or "int8" for 2x smaller files
+    MMAP_SEARCH_MODE: str = "exact"   # or "approx" (IVF, probes MMAP_NPROBE lists)
+    MMAP_NPROBE: int = 8
+
+    # Semantic cache in front of the LLM chain; off by default: one embedding covers profile and
+    # query, so two users with different profiles and the same query can get each other's picks
+    CACHE_ENABLED: bool = False
+    CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    CACHE_TTL_SECONDS: int = 3600
+    CACHE_MAX_ENTRIES: int = 512
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
 
 def get_settings() -> Settings:
-    return Settings()
\ No newline at end of file
+    return Settings()
@@ -0,0 +1,84 @@
+# backend/core/fake_llm.py
+"""
+Local stand-in for ChatOllama, for evaluation and load tests without a model or network.
+Reads the "Relevant items from database" block of RECOMMENDER_PROMPT and answers
+with the first items as JSON, streamed token by token with a configurable delay.
+"""
+import asyncio
+import json
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text with llama tokenizers
+    return max(1, len(text) // 4)
+
+class FakeRecommenderLLM(BaseChatModel):
+    first_token_delay: float = 0.0  # seconds before the first token (prefill)
+    token_delay: float = 0.0        # seconds per generated token
+    top_n: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-recommender"
+
+    def _answer(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(m.content) for m in messages)
+        block = prompt.split("Relevant items from database:", 1)[-1].split("Return a JSON", 1)[0]
+        recs = []
+        for line in block.strip().splitlines():
+            title, _, desc = line.partition(":")
+            if not desc or len(recs) >= self.top_n:
+                continue
+            score = round(0.95 - 0.05 * len(recs), 2)
+            recs.append({"title": title.strip(), "score": score, "reason": desc.strip()[:60]})
+        return json.dumps({"recommendations": recs})
+
+    def _chunks(self, text: str) -> List[str]:
+        return re.findall(r"\s*\S{1,4}", text) or [text]
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> dict:
+        prompt_tokens = estimate_tokens("\n".join(str(m.content) for m in messages))
+        output_tokens = len(self._chunks(text))
+        return {"input_tokens": prompt_tokens, "output_tokens": output_tokens,
+                "total_tokens": prompt_tokens + output_tokens}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._answer(messages)
+        time.sleep(self.first_token_delay + self.token_delay * len(self._chunks(text)))
+        msg = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._answer(messages)
+        await asyncio.sleep(self.first_token_delay + self.token_delay * len(self._chunks(text)))
+        msg = AIMessage(content=text, usage_metadata=self._usage(messages, text))
+        return ChatResult(generations=[ChatGeneration(message=msg)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._answer(messages)
+        time.sleep(self.first_token_delay)
+        for piece in self._chunks(text):
+            time.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text = self._answer(messages)
+        await asyncio.sleep(self.first_token_delay)
+        for piece in self._chunks(text):
+            await asyncio.sleep(self.token_delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
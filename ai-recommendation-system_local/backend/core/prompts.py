@@ -21,4 +21,21 @@ Example:
 }}
 
 Respond ONLY with valid JSON. No extra text.
-"""
\ No newline at end of file
+"""
+
+REASON_PROMPT = """
+You are a movie recommendation assistant.
+
+User profile: {profile}
+User query: {input}
+
+These movies were already picked for the user:
+{items}
+
+Write one short reason (max 15 words) for each movie explaining why it fits the user.
+
+Return a JSON object mapping each title to its reason, for example:
+{{"Inception": "Mind-bending sci-fi with AI themes"}}
+
+Respond ONLY with valid JSON. No extra text.
+"""
@@ -1,7 +1,8 @@
 # backend/db/ingest.py
 import json
 from pathlib import Path
-from backend.db.vector_store import get_vector_store
+from backend.db.vector_store import get_vector_store, bump_catalogue_version
+from backend.db.item_graph import update_item_graph
 
 def ingest_sample_data():
     data_path = Path(__file__).parent.parent.parent / "data" / "sample_items.json"
@@ -14,10 +15,16 @@ def ingest_sample_data():
 
     texts = [f"{item['title']} - {item['description']}" for item in items]
     metadatas = [{"id": item["id"], "title": item["title"], **item.get("tags", {})} for item in items]
+    # Stable ids make re-ingest an upsert instead of adding duplicates
+    ids = [str(item["id"]) for item in items]
 
     vector_store = get_vector_store()
-    vector_store.add_texts(texts=texts, metadatas=metadatas)
+    vector_store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
+    bump_catalogue_version()
     print(f"Indexed {len(texts)} items into vector DB.")
 
+    added = update_item_graph(vector_store)
+    print(f"Item graph updated with {added} new or changed items.")
+
 if __name__ == "__main__":
     ingest_sample_data()
\ No newline at end of file
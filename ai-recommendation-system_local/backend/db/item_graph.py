@@ -0,0 +1,248 @@
+# backend/db/item_graph.py
+"""
+Precomputed item-to-item k-nearest-neighbour graph for instant "more like this".
+
+Build:   python -m backend.db.item_graph [--k 20] [--block-size 4096] [--rebuild]
+Lookup:  similar_items(item_id, k)
+
+The graph is a single .npz of flat arrays (ids, neighbour rows, float16 scores,
+embedding fingerprints), so a lookup is a dict hit plus a row slice - no vector
+query, no LLM. Updates add new items and recompute the rows around re-ingested
+items whose embedding changed.
+"""
+import argparse
+import hashlib
+import time
+from pathlib import Path
+import numpy as np
+from backend.db.vector_store import PERSIST_DIRECTORY, get_vector_store, get_all_items
+
+GRAPH_PATH = Path(PERSIST_DIRECTORY) / "item_graph.npz"
+DEFAULT_K = 20
+DEFAULT_BLOCK_SIZE = 4096
+
+def _normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+def _merge_topk(best_idx, best_sim, idx, sim, k):
+    """Keep the k highest scores per row out of the current best and a new candidate block."""
+    all_idx = np.concatenate([best_idx, idx], axis=1)
+    all_sim = np.concatenate([best_sim, sim], axis=1)
+    keep = min(k, all_sim.shape[1])
+    part = np.argpartition(-all_sim, keep - 1, axis=1)[:, :keep]
+    rows = np.arange(all_sim.shape[0])[:, None]
+    return all_idx[rows, part], all_sim[rows, part]
+
+def _sort_rows(idx, sim):
+    order = np.argsort(-sim, axis=1)
+    rows = np.arange(len(idx))[:, None]
+    idx, sim = idx[rows, order], sim[rows, order]
+    idx[~np.isfinite(sim)] = -1
+    return idx, sim
+
+def fingerprints(embeddings):
+    """One 64-bit hash per embedding row, to spot items whose vector changed since the graph was built."""
+    rows = np.ascontiguousarray(embeddings, dtype=np.float32)
+    return np.array([int.from_bytes(hashlib.blake2b(r.tobytes(), digest_size=8).digest(), "little") for r in rows],
+                    dtype=np.uint64)
+
+def knn_blocked(queries, corpus, k, block_size=DEFAULT_BLOCK_SIZE, query_offset=None):
+    """
+    Top-k cosine neighbours of every query row within corpus, computed block by block
+    so only a (block_size x block_size) similarity tile is in memory at once.
+    query_offset: position of queries[0] inside corpus, used to drop self-matches.
+    Inputs must be L2-normalised. Returns (indices int32, scores float32), sorted by score.
+    """
+    n_q = len(queries)
+    out_idx = np.full((n_q, k), -1, dtype=np.int32)
+    out_sim = np.full((n_q, k), -np.inf, dtype=np.float32)
+
+    for qs in range(0, n_q, block_size):
+        q = queries[qs:qs + block_size]
+        best_idx = np.full((len(q), k), -1, dtype=np.int32)
+        best_sim = np.full((len(q), k), -np.inf, dtype=np.float32)
+        for cs in range(0, len(corpus), block_size):
+            sim = q @ corpus[cs:cs + block_size].T
+            if query_offset is not None:
+                # zero-based query rows that fall inside this corpus block are self-matches
+                rows = np.arange(len(q))
+                cols = query_offset + qs + rows - cs
+                mask = (cols >= 0) & (cols < sim.shape[1])
+                sim[rows[mask], cols[mask]] = -np.inf
+            idx = np.broadcast_to(np.arange(cs, cs + sim.shape[1], dtype=np.int32), sim.shape)
+            best_idx, best_sim = _merge_topk(best_idx, best_sim, idx, sim, k)
+
+        order = np.argsort(-best_sim, axis=1)
+        rows = np.arange(len(q))[:, None]
+        out_idx[qs:qs + len(q)] = best_idx[rows, order]
+        out_sim[qs:qs + len(q)] = best_sim[rows, order]
+
+    out_idx[~np.isfinite(out_sim)] = -1
+    return out_idx, out_sim
+
+def build_graph(embeddings, k=DEFAULT_K, block_size=DEFAULT_BLOCK_SIZE):
+    vecs = _normalize(embeddings)
+    return knn_blocked(vecs, vecs, k, block_size, query_offset=0)
+
+def extend_graph(neighbours, scores, old_embeddings, new_embeddings, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Add new items to an existing graph without rebuilding it.
+    New rows get a full search; old rows only compare against the new items.
+    """
+    k = neighbours.shape[1]
+    old = _normalize(old_embeddings)
+    new = _normalize(new_embeddings)
+    corpus = np.concatenate([old, new])
+
+    new_idx, new_sim = knn_blocked(new, corpus, k, block_size, query_offset=len(old))
+
+    cand_idx, cand_sim = knn_blocked(old, new, k, block_size)
+    cand_idx = np.where(cand_idx >= 0, cand_idx + len(old), -1)
+    sims = np.where(neighbours >= 0, scores.astype(np.float32), -np.inf)
+    old_idx, old_sim = _sort_rows(*_merge_topk(neighbours.astype(np.int32), sims, cand_idx, cand_sim, k))
+
+    return np.concatenate([old_idx, new_idx]), np.concatenate([old_sim, new_sim])
+
+def _search_rows(rows, corpus, k, block_size):
+    """Full top-k search for scattered corpus rows, leaving out each row's self-match."""
+    idx, sim = knn_blocked(corpus[rows], corpus, k + 1, block_size)
+    keep = idx != rows[:, None]
+    keep[keep.all(axis=1), -1] = False  # self fell outside the top k+1 (exact duplicates)
+    return idx[keep].reshape(len(rows), k), sim[keep].reshape(len(rows), k)
+
+def refresh_graph(neighbours, scores, embeddings, changed, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Recompute the graph around items whose embedding changed (changed: their row numbers).
+    Changed rows, and rows that list a changed item, get a full search since their scores
+    are stale and the k-th neighbour may have moved; every other row only compares
+    against the changed items.
+    """
+    k = neighbours.shape[1]
+    vecs = _normalize(embeddings)
+    changed = np.asarray(changed, dtype=np.int64)
+    is_changed = np.zeros(len(vecs), dtype=bool)
+    is_changed[changed] = True
+    neighbours = neighbours.astype(np.int32)
+    sims = np.where(neighbours >= 0, scores.astype(np.float32), -np.inf)
+    stale = is_changed | (is_changed[neighbours] & (neighbours >= 0)).any(axis=1)
+
+    rest = np.flatnonzero(~stale)
+    if len(rest):
+        cand_idx, cand_sim = knn_blocked(vecs[rest], vecs[changed], k, block_size)
+        cand_idx = np.where(cand_idx >= 0, changed[cand_idx], -1).astype(np.int32)
+        neighbours[rest], sims[rest] = _sort_rows(*_merge_topk(neighbours[rest], sims[rest], cand_idx, cand_sim, k))
+    rows = np.flatnonzero(stale)
+    neighbours[rows], sims[rows] = _search_rows(rows, vecs, k, block_size)
+    neighbours[~np.isfinite(sims)] = -1
+    return neighbours, sims
+
+def save_graph(path, ids, titles, neighbours, scores, prints):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    scores = np.where(np.isfinite(scores), scores, 0).astype(np.float16)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(tmp, ids=np.asarray(ids, dtype=np.int64), titles=np.asarray(titles, dtype=str),
+             neighbours=neighbours.astype(np.int32), scores=scores, fingerprints=np.asarray(prints, dtype=np.uint64))
+    tmp.replace(path)
+
+def load_graph(path=GRAPH_PATH):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+def get_catalogue_embeddings(store=None):
+    """All (id, title, embedding) rows in the collection, one per catalogue id."""
+    store = store or get_vector_store()
+    metadatas, embeddings = get_all_items(store)
+    items = {}
+    for meta, emb in zip(metadatas, embeddings):
+        if meta and "id" in meta:
+            items[int(meta["id"])] = (meta.get("title", "Unknown"), emb)
+    ids = list(items)
+    titles = [items[i][0] for i in ids]
+    embeddings = np.asarray([items[i][1] for i in ids], dtype=np.float32)
+    return ids, titles, embeddings
+
+def update_item_graph(store=None, k=DEFAULT_K, block_size=DEFAULT_BLOCK_SIZE, rebuild=False, path=GRAPH_PATH):
+    """
+    Build the graph, or update it with catalogue items that are new or whose embedding changed.
+    Returns the number of items added or refreshed.
+    """
+    ids, titles, embeddings = get_catalogue_embeddings(store)
+    if not ids:
+        return 0
+    prints = fingerprints(embeddings)
+
+    if rebuild or not Path(path).exists():
+        neighbours, scores = build_graph(embeddings, min(k, max(len(ids) - 1, 1)), block_size)
+        save_graph(path, ids, titles, neighbours, scores, prints)
+        return len(ids)
+
+    graph = load_graph(path)
+    known = {int(i): row for row, i in enumerate(graph["ids"])}
+    row_of = {i: row for row, i in enumerate(ids)}
+    graph_k = graph["neighbours"].shape[1]
+    if (not all(i in row_of for i in known) or (graph_k < k and graph_k < len(ids) - 1)
+            or "fingerprints" not in graph):
+        # items were removed, the graph was built on a catalogue too small for k,
+        # or it predates fingerprints so changed items cannot be told apart
+        return update_item_graph(store, k, block_size, rebuild=True, path=path)
+    old_ids = [int(i) for i in graph["ids"]]
+    old_rows = [row_of[i] for i in old_ids]
+    changed = np.flatnonzero(graph["fingerprints"] != prints[old_rows])
+    new = [i for i in ids if i not in known]
+    if not new and not len(changed):
+        return 0
+
+    neighbours, scores = graph["neighbours"], graph["scores"]
+    old_emb = embeddings[old_rows]
+    if len(changed):
+        neighbours, scores = refresh_graph(neighbours, scores, old_emb, changed, block_size)
+    if new:
+        new_emb = embeddings[[row_of[i] for i in new]]
+        neighbours, scores = extend_graph(neighbours, scores, old_emb, new_emb, block_size)
+    all_rows = old_rows + [row_of[i] for i in new]
+    save_graph(path, old_ids + new, [titles[r] for r in all_rows], neighbours, scores, prints[all_rows])
+    return len(new) + len(changed)
+
+_graph = None
+_graph_mtime = None
+_row_of = {}
+
+def _current_graph():
+    global _graph, _graph_mtime, _row_of
+    mtime = GRAPH_PATH.stat().st_mtime_ns
+    if mtime != _graph_mtime:
+        _graph = load_graph(GRAPH_PATH)
+        _row_of = {int(i): row for row, i in enumerate(_graph["ids"])}
+        _graph_mtime = mtime
+    return _graph
+
+def similar_items(item_id: int, k: int = 5):
+    """Up to k most similar catalogue items, by direct graph lookup."""
+    try:
+        graph = _current_graph()
+    except OSError:
+        return []
+    row = _row_of.get(int(item_id))
+    if row is None:
+        return []
+    result = []
+    for n, s in zip(graph["neighbours"][row][:k], graph["scores"][row][:k]):
+        if n < 0:
+            break
+        result.append({"id": int(graph["ids"][n]), "title": str(graph["titles"][n]), "score": round(float(s), 4)})
+    return result
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build the item-to-item similarity graph")
+    ap.add_argument("--k", type=int, default=DEFAULT_K)
+    ap.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE)
+    ap.add_argument("--rebuild", action="store_true")
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    added = update_item_graph(k=args.k, block_size=args.block_size, rebuild=args.rebuild)
+    print(f"Graph updated with {added} items in {time.perf_counter() - start:.2f}s -> {GRAPH_PATH}")
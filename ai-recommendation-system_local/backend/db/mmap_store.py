@@ -0,0 +1,295 @@
+# backend/db/mmap_store.py
+"""
+Memory-mapped vector store, an alternative to Chroma.
+
+Layout of the store directory:
+  vectors.bin   float16 or int8 rows (L2-normalised), opened read-only with np.memmap
+  scales.npy    per-row dequantisation scale (int8 only)
+  columns.bin   metadata values (ids, texts, titles, ...) as concatenated JSON, column by column
+  columns.npy   int64 (n_columns, count + 1) byte offsets into columns.bin; empty value = missing
+  meta.json     dim/dtype/count and the column names (small)
+  ivf.npz       coarse k-means centroids + inverted lists for approximate search
+
+Every process maps the same files, so vectors and metadata live once in the OS page
+cache instead of once per worker; a row's metadata is only decoded when it is returned. Writes rebuild the files and swap them in atomically
+(on Windows, stop processes that have the store open before re-ingesting).
+
+Convert an existing Chroma collection:  python -m backend.db.mmap_store --from-chroma
+"""
+import argparse
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+BLOCK_ROWS = 65536
+TEXT_COLUMN = "text"
+ID_COLUMN = "_id"
+
+def _normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+class _Column:
+    """Read-only list-like view of one metadata column; values are decoded on access."""
+    def __init__(self, data, offsets):
+        self._data = data
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row):
+        start, stop = int(self._offsets[row]), int(self._offsets[row + 1])
+        return json.loads(bytes(self._data[start:stop])) if stop > start else None
+
+    def __iter__(self):
+        return (self[row] for row in range(len(self)))
+
+def _kmeans(x, n_clusters, iters=10, seed=0):
+    rng = np.random.default_rng(seed)
+    sample = x[rng.choice(len(x), min(len(x), 50_000), replace=False)]
+    centroids = sample[rng.choice(len(sample), n_clusters, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(n_clusters):
+            members = sample[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+class MmapVectorStore(VectorStore):
+    def __init__(self, directory, embedding=None, mode: str = "exact", nprobe: int = 8, dtype: str = "float16"):
+        self.directory = Path(directory)
+        self.embedding = embedding
+        self.mode = mode          # "exact" scans every row, "approx" probes nprobe IVF lists
+        self.nprobe = nprobe
+        self.default_dtype = dtype  # used when the store is created
+        self._load()
+
+    # ---------- loading / writing ----------
+
+    def _load(self):
+        meta_path = self.directory / "meta.json"
+        if not meta_path.exists():
+            self.dim, self.dtype, self.count = 0, self.default_dtype, 0
+            self.columns = {ID_COLUMN: [], TEXT_COLUMN: []}
+            self.vectors = np.zeros((0, 0), dtype=np.float16)
+            self.scales = None
+            self.ivf = None
+            return
+
+        meta = json.loads(meta_path.read_text())
+        self.dim, self.dtype, self.count = meta["dim"], meta["dtype"], meta["count"]
+        data_path = self.directory / "columns.bin"
+        data = np.memmap(data_path, dtype=np.uint8, mode="r") if data_path.stat().st_size else np.zeros(0, np.uint8)
+        offsets = np.load(self.directory / "columns.npy", mmap_mode="r")
+        self.columns = {name: _Column(data, offsets[c]) for c, name in enumerate(meta["columns"])}
+        self.vectors = np.memmap(self.directory / "vectors.bin", dtype=self.dtype, mode="r",
+                                 shape=(self.count, self.dim)) if self.count else np.zeros((0, self.dim), self.dtype)
+        scales_path = self.directory / "scales.npy"
+        self.scales = np.load(scales_path, mmap_mode="r") if scales_path.exists() else None
+        ivf_path = self.directory / "ivf.npz"
+        if ivf_path.exists():
+            with np.load(ivf_path) as ivf:
+                self.ivf = {name: ivf[name] for name in ivf.files}
+        else:
+            self.ivf = None
+
+    @staticmethod
+    def write(directory, ids, texts, metadatas, embeddings, dtype="float16"):
+        """Write a complete store. Files are written under temporary names and renamed into place."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        vecs = _normalize(embeddings) if len(embeddings) else np.zeros((0, 0), np.float32)
+        n, dim = vecs.shape
+        tag = uuid.uuid4().hex[:8]
+
+        if dtype == "int8":
+            scales = np.abs(vecs).max(axis=1).astype(np.float32) / 127.0
+            scales[scales == 0] = 1.0
+            data = np.round(vecs / scales[:, None]).astype(np.int8)
+            np.save(directory / f"scales.{tag}.npy", scales)
+        else:
+            data = vecs.astype(np.float16)
+        data.tofile(directory / f"vectors.{tag}.bin")
+
+        keys = sorted({k for m in metadatas for k in (m or {})} - {TEXT_COLUMN, ID_COLUMN})
+        columns = {ID_COLUMN: list(ids), TEXT_COLUMN: list(texts)}
+        for k in keys:
+            columns[k] = [(m or {}).get(k) for m in metadatas]
+        offsets = np.zeros((len(columns), n + 1), dtype=np.int64)
+        position = 0
+        with open(directory / f"columns.{tag}.bin", "wb") as f:
+            for c, values in enumerate(columns.values()):
+                encoded = [b"" if v is None else json.dumps(v).encode() for v in values]
+                offsets[c, 0] = position
+                offsets[c, 1:] = position + np.cumsum([len(e) for e in encoded], dtype=np.int64)
+                position = int(offsets[c, -1])
+                f.write(b"".join(encoded))
+        np.save(directory / f"columns.{tag}.npy", offsets)
+        meta = {"dim": dim, "dtype": dtype, "count": n, "columns": list(columns)}
+        (directory / f"meta.{tag}.json").write_text(json.dumps(meta))
+
+        if n >= 1024:
+            n_lists = int(np.sqrt(n))
+            centroids = _kmeans(vecs, n_lists)
+            assign = np.concatenate([np.argmax(vecs[s:s + BLOCK_ROWS] @ centroids.T, axis=1)
+                                     for s in range(0, n, BLOCK_ROWS)])
+            order = np.argsort(assign, kind="stable").astype(np.int32)
+            offsets = np.searchsorted(assign[order], np.arange(n_lists + 1)).astype(np.int64)
+            np.savez(directory / f"ivf.{tag}.npz", centroids=centroids, order=order, offsets=offsets)
+
+        # vectors first, meta.json last: a reader never sees meta for vectors that are not there
+        (directory / f"vectors.{tag}.bin").replace(directory / "vectors.bin")
+        for name, ext in (("columns", "bin"), ("columns", "npy"), ("scales", "npy"), ("ivf", "npz")):
+            tmp = directory / f"{name}.{tag}.{ext}"
+            if tmp.exists():
+                tmp.replace(directory / f"{name}.{ext}")
+            elif (directory / f"{name}.{ext}").exists():
+                os.remove(directory / f"{name}.{ext}")
+        (directory / f"meta.{tag}.json").replace(directory / "meta.json")
+
+    # ---------- reading ----------
+
+    def _rows(self, start, stop):
+        block = np.asarray(self.vectors[start:stop], dtype=np.float32)
+        if self.scales is not None:
+            block *= np.asarray(self.scales[start:stop])[:, None]
+        return block
+
+    def _take(self, rows):
+        block = np.asarray(self.vectors[rows], dtype=np.float32)
+        if self.scales is not None:
+            block *= np.asarray(self.scales[rows])[:, None]
+        return block
+
+    def _search_exact(self, q, k):
+        best_idx = np.empty(0, dtype=np.int64)
+        best_sim = np.empty(0, dtype=np.float32)
+        for start in range(0, self.count, BLOCK_ROWS):
+            sims = self._rows(start, start + BLOCK_ROWS) @ q
+            idx = np.arange(start, start + len(sims))
+            best_idx = np.concatenate([best_idx, idx])
+            best_sim = np.concatenate([best_sim, sims])
+            if len(best_sim) > k:
+                keep = np.argpartition(-best_sim, k - 1)[:k]
+                best_idx, best_sim = best_idx[keep], best_sim[keep]
+        return best_idx, best_sim
+
+    def _search_approx(self, q, k):
+        centroids, order, offsets = self.ivf["centroids"], self.ivf["order"], self.ivf["offsets"]
+        probe = np.argsort(-(centroids @ q))[:self.nprobe]
+        rows = np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe]))
+        if len(rows) < k:
+            return self._search_exact(q, k)
+        sims = self._take(rows) @ q
+        keep = np.argpartition(-sims, k - 1)[:k]
+        return rows[keep], sims[keep]
+
+    def search_vector(self, embedding, k: int = 4, mode: Optional[str] = None):
+        """(row indices, cosine similarities) of the k nearest rows, best first."""
+        if not self.count:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        k = min(k, self.count)
+        q = _normalize([embedding])[0]
+        mode = mode or self.mode
+        if mode == "approx" and self.ivf is not None:
+            idx, sims = self._search_approx(q, k)
+        else:
+            idx, sims = self._search_exact(q, k)
+        top = np.argsort(-sims)
+        return idx[top], sims[top]
+
+    def _metadata(self, row: int) -> dict:
+        return {k: col[row] for k, col in self.columns.items()
+                if k not in (TEXT_COLUMN, ID_COLUMN) and col[row] is not None}
+
+    def search_by_vectors(self, query_embeddings, k: int = 10):
+        """Same shape as vector_store.search_items: per query, dicts with text, metadata, embedding."""
+        results = []
+        for emb in query_embeddings:
+            idx, _ = self.search_vector(emb, k)
+            vecs = self._take(np.sort(idx)) if len(idx) else []
+            by_row = dict(zip(np.sort(idx).tolist(), vecs))
+            results.append([
+                {"text": self.columns[TEXT_COLUMN][i], "metadata": self._metadata(i), "embedding": by_row[i].tolist()}
+                for i in idx.tolist()
+            ])
+        return results
+
+    def get_all(self):
+        """All rows as (ids, metadatas, embeddings)."""
+        embeddings = np.concatenate([self._rows(s, s + BLOCK_ROWS) for s in range(0, self.count, BLOCK_ROWS)]) \
+            if self.count else np.zeros((0, self.dim), np.float32)
+        return list(self.columns[ID_COLUMN]), [self._metadata(i) for i in range(self.count)], embeddings
+
+    # ---------- LangChain VectorStore interface ----------
+
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        """Upserts by id and rewrites the store. Meant for offline ingest, not hot writes."""
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        new_vecs = np.asarray(self.embedding.embed_documents(texts), dtype=np.float32)
+
+        old_ids, old_meta, old_vecs = self.get_all()
+        replaced = set(ids)
+        keep = [i for i, item_id in enumerate(old_ids) if item_id not in replaced]
+        all_ids = [old_ids[i] for i in keep] + ids
+        all_texts = [self.columns[TEXT_COLUMN][i] for i in keep] + texts
+        all_meta = [old_meta[i] for i in keep] + metadatas
+        all_vecs = np.concatenate([old_vecs[keep], new_vecs]) if keep else new_vecs
+
+        self.write(self.directory, all_ids, all_texts, all_meta, all_vecs, dtype=self.dtype)
+        self._load()
+        return ids
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        idx, sims = self.search_vector(self.embedding.embed_query(query), k)
+        return [(Document(page_content=self.columns[TEXT_COLUMN][i], metadata=self._metadata(i)), float(s))
+                for i, s in zip(idx.tolist(), sims.tolist())]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding, metadatas: Optional[List[dict]] = None,
+                   directory=None, ids: Optional[List[str]] = None, **kwargs: Any) -> "MmapVectorStore":
+        """Constructor options (mode, nprobe, dtype) go to __init__, everything else to add_texts."""
+        options = {name: kwargs.pop(name) for name in ("mode", "nprobe", "dtype") if name in kwargs}
+        store = cls(directory, embedding=embedding, **options)
+        store.add_texts(texts, metadatas, ids=ids, **kwargs)
+        return store
+
+if __name__ == "__main__":
+    from backend.core.config import get_settings
+    from backend.db.vector_store import MMAP_DIRECTORY, bump_catalogue_version, get_vector_store
+
+    ap = argparse.ArgumentParser(description="Build the memory-mapped store")
+    ap.add_argument("--from-chroma", action="store_true", help="copy vectors and metadata out of chroma_db")
+    ap.add_argument("--dtype", default=get_settings().MMAP_DTYPE, choices=["float16", "int8"])
+    args = ap.parse_args()
+
+    if args.from_chroma:
+        chroma = get_vector_store("chroma")
+        res = chroma._collection.get(include=["documents", "metadatas", "embeddings"])
+        MmapVectorStore.write(MMAP_DIRECTORY, res["ids"], res["documents"], res["metadatas"],
+                              np.asarray(res["embeddings"], dtype=np.float32), dtype=args.dtype)
+        bump_catalogue_version("mmap")
+        print(f"Wrote {len(res['ids'])} items to {MMAP_DIRECTORY} ({args.dtype})")
@@ -2,8 +2,17 @@
 import warnings
 warnings.filterwarnings("ignore")
 
+import time
+from pathlib import Path
 from sentence_transformers import SentenceTransformer
 from langchain_community.vectorstores import Chroma
+from backend.core.config import get_settings
+from backend.db.mmap_store import MmapVectorStore
+
+# Anchored to the project root so the store is found from any working directory
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+PERSIST_DIRECTORY = str(BASE_DIR / "chroma_db")
+MMAP_DIRECTORY = BASE_DIR / "mmap_store"
 
 # Direct embedding model
 embeddings_model = SentenceTransformer("all-MiniLM-L6-v2")
@@ -17,8 +26,73 @@ class SentenceTransformerEmbeddings:
 
 embeddings = SentenceTransformerEmbeddings()
 
-def get_vector_store():
+def get_vector_store(backend: str = None):
+    """
+    backend: "chroma" (SQLite + HNSW, default) or "mmap" (read-only memory-mapped file,
+    shared across processes). Defaults to settings.VECTOR_BACKEND.
+    """
+    settings = get_settings()
+    backend = backend or settings.VECTOR_BACKEND
+    if backend == "mmap":
+        return MmapVectorStore(
+            MMAP_DIRECTORY,
+            embedding=embeddings,
+            mode=settings.MMAP_SEARCH_MODE,
+            nprobe=settings.MMAP_NPROBE,
+            dtype=settings.MMAP_DTYPE,
+        )
     return Chroma(
-        persist_directory="./chroma_db",
+        persist_directory=PERSIST_DIRECTORY,
         embedding_function=embeddings
-    )
\ No newline at end of file
+    )
+
+def search_items(store, query_embeddings, k=10):
+    """Nearest items for each query vector, returned together with their stored embeddings."""
+    if isinstance(store, MmapVectorStore):
+        return store.search_by_vectors(query_embeddings, k)
+    res = store._collection.query(
+        query_embeddings=query_embeddings,
+        n_results=k,
+        include=["documents", "metadatas", "embeddings", "distances"],
+    )
+    results = []
+    for i in range(len(query_embeddings)):
+        results.append([
+            {"text": doc, "metadata": meta or {}, "embedding": emb}
+            for doc, meta, emb in zip(res["documents"][i], res["metadatas"][i], res["embeddings"][i])
+        ])
+    return results
+
+
+def get_all_items(store):
+    """Every stored item as (metadatas, embeddings), whichever backend holds them."""
+    if isinstance(store, MmapVectorStore):
+        _, metadatas, embeddings = store.get_all()
+        return metadatas, embeddings
+    res = store._collection.get(include=["embeddings", "metadatas"])
+    return res["metadatas"], res["embeddings"]
+
+def count_items(store) -> int:
+    if isinstance(store, MmapVectorStore):
+        return store.count
+    return store._collection.count()
+
+def catalogue_version_file(backend: str = None) -> Path:
+    """
+    Touched on every ingest so caches built on the old catalogue can be dropped.
+    Kept in the active store's directory, so each backend versions its own catalogue.
+    """
+    backend = backend or get_settings().VECTOR_BACKEND
+    directory = MMAP_DIRECTORY if backend == "mmap" else Path(PERSIST_DIRECTORY)
+    return directory / "catalogue_version"
+
+def bump_catalogue_version(backend: str = None):
+    path = catalogue_version_file(backend)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(str(time.time_ns()))
+
+def get_catalogue_version(backend: str = None) -> str:
+    try:
+        return catalogue_version_file(backend).read_text().strip()
+    except OSError:
+        return "0"
@@ -0,0 +1,210 @@
+# backend/eval/harness.py
+"""
+Offline retrieval + latency evaluation on langsmith/eval_dataset.jsonl. No network needed.
+
+    python -m backend.eval.harness --llm fake --name baseline
+    python -m backend.eval.harness --llm ollama --name prompt-v2
+    python -m backend.eval.harness --compare langsmith/results/baseline.json langsmith/results/prompt-v2.json
+
+--llm accepts "fake" (local stand-in), "ollama" (the app's ChatOllama) or "module:attribute"
+pointing at any LangChain chat model instance.
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+from backend.core.fake_llm import FakeRecommenderLLM, estimate_tokens
+from backend.core.prompts import RECOMMENDER_PROMPT
+
+ROOT = Path(__file__).resolve().parents[2]
+DATASET_PATH = ROOT / "langsmith" / "eval_dataset.jsonl"
+RESULTS_DIR = ROOT / "langsmith" / "results"
+
+def load_dataset(path=DATASET_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def recall_at_k(ranked, relevant, k):
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & set(relevant)) / len(relevant)
+
+def reciprocal_rank(ranked, relevant):
+    for rank, title in enumerate(ranked, start=1):
+        if title in relevant:
+            return 1.0 / rank
+    return 0.0
+
+def latency_summary(values_ms):
+    if not values_ms:
+        return {}
+    v = np.asarray(values_ms)
+    return {
+        "mean": round(float(v.mean()), 2),
+        "p50": round(float(np.percentile(v, 50)), 2),
+        "p95": round(float(np.percentile(v, 95)), 2),
+        "p99": round(float(np.percentile(v, 99)), 2),
+    }
+
+def _unique(titles):
+    seen = []
+    for t in titles:
+        if t not in seen:
+            seen.append(t)
+    return seen
+
+class TokenCounter(BaseCallbackHandler):
+    """Collects prompt/completion tokens; estimates them when the model reports no usage."""
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._prompt_chars = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._prompt_chars = sum(len(str(m.content)) for batch in messages for m in batch)
+
+    def on_llm_end(self, response, **kwargs):
+        for gens in response.generations:
+            for gen in gens:
+                usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+                if usage:
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.output_tokens += usage.get("output_tokens", 0)
+                else:
+                    self.input_tokens += max(1, self._prompt_chars // 4)
+                    self.output_tokens += estimate_tokens(gen.text)
+
+def load_llm(name: str, first_token_delay: float = 0.0, token_delay: float = 0.0):
+    if name == "fake":
+        return FakeRecommenderLLM(first_token_delay=first_token_delay, token_delay=token_delay)
+    if name == "ollama":
+        from backend.agents.recommender import llm
+        return llm
+    module, _, attr = name.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+def run_eval(llm_name="fake", k=10, dataset_path=DATASET_PATH, name=None,
+             first_token_delay=0.0, token_delay=0.0, skip_chain=False):
+    from backend.agents.recommender import build_chain, vector_store
+    from backend.db.vector_store import count_items
+
+    dataset = load_dataset(dataset_path)
+    retriever = vector_store.as_retriever(search_kwargs={"k": k})
+    chain = None if skip_chain else build_chain(load_llm(llm_name, first_token_delay, token_delay), retriever)
+
+    rows = []
+    for ex in dataset:
+        relevant = ex.get("relevant", [])
+        row = {"id": ex.get("id"), "query": ex["query"], "relevant": relevant}
+
+        start = time.perf_counter()
+        docs = retriever.invoke(ex["query"])
+        row["retrieval_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        retrieved = _unique(d.metadata.get("title", "Unknown") for d in docs)
+        row["retrieved"] = retrieved
+        row["retrieval_recall"] = recall_at_k(retrieved, relevant, k)
+        row["retrieval_rr"] = reciprocal_rank(retrieved, relevant)
+
+        if chain is not None:
+            counter = TokenCounter()
+            start = time.perf_counter()
+            try:
+                out = chain.invoke({"input": ex["query"], "profile": ex.get("profile", "")},
+                                   config={"callbacks": [counter]})
+                recs = out.get("recommendations", []) if isinstance(out, dict) else []
+                row["recommended"] = _unique(r.get("title") for r in recs[:3])
+            except Exception as e:
+                row["recommended"] = []
+                row["error"] = f"{type(e).__name__}: {e}"
+            row["chain_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            row["chain_recall"] = recall_at_k(row["recommended"], relevant, 3)
+            row["chain_rr"] = reciprocal_rank(row["recommended"], relevant)
+            row["input_tokens"] = counter.input_tokens
+            row["output_tokens"] = counter.output_tokens
+        rows.append(row)
+
+    def mean(key):
+        vals = [r[key] for r in rows if key in r]
+        return round(float(np.mean(vals)), 4) if vals else None
+
+    summary = {
+        "queries": len(rows),
+        f"retrieval_recall@{k}": mean("retrieval_recall"),
+        "retrieval_mrr": mean("retrieval_rr"),
+        "retrieval_latency_ms": latency_summary([r["retrieval_ms"] for r in rows]),
+    }
+    if chain is not None:
+        summary.update({
+            "chain_recall@3": mean("chain_recall"),
+            "chain_mrr": mean("chain_rr"),
+            "chain_latency_ms": latency_summary([r["chain_ms"] for r in rows]),
+            "input_tokens_per_request": mean("input_tokens"),
+            "output_tokens_per_request": mean("output_tokens"),
+            "errors": sum(1 for r in rows if "error" in r),
+        })
+
+    created = datetime.now(timezone.utc)
+    result = {
+        "run": name or created.strftime("%Y%m%d-%H%M%S"),
+        "created": created.isoformat(),
+        "config": {
+            "llm": llm_name,
+            "k": k,
+            "dataset": str(dataset_path),
+            "prompt_sha": hashlib.sha256(RECOMMENDER_PROMPT.encode()).hexdigest()[:12],
+            "index_size": count_items(vector_store),
+            "first_token_delay": first_token_delay,
+            "token_delay": token_delay,
+        },
+        "summary": summary,
+        "rows": rows,
+    }
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = RESULTS_DIR / f"{result['run']}.json"
+    out_path.write_text(json.dumps(result, indent=2))
+    return result, out_path
+
+def _flatten(d, prefix=""):
+    flat = {}
+    for key, value in d.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def compare(path_a, path_b):
+    """Side-by-side summary of two result files (B minus A)."""
+    a = json.loads(Path(path_a).read_text())
+    b = json.loads(Path(path_b).read_text())
+    fa, fb = _flatten(a["summary"]), _flatten(b["summary"])
+    print(f"{'metric':40} {a['run']:>14} {b['run']:>14} {'delta':>10}")
+    for key in sorted(set(fa) | set(fb)):
+        va, vb = fa.get(key), fb.get(key)
+        delta = f"{vb - va:+.4g}" if isinstance(va, (int, float)) and isinstance(vb, (int, float)) else ""
+        print(f"{key:40} {str(va):>14} {str(vb):>14} {delta:>10}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Offline recommender evaluation")
+    ap.add_argument("--llm", default="fake", help='"fake", "ollama" or "module:attribute"')
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--dataset", default=str(DATASET_PATH))
+    ap.add_argument("--name", help="run name, used as the results file name")
+    ap.add_argument("--first-token-delay", type=float, default=0.0, help="fake LLM prefill delay (s)")
+    ap.add_argument("--token-delay", type=float, default=0.0, help="fake LLM per-token delay (s)")
+    ap.add_argument("--retrieval-only", action="store_true")
+    ap.add_argument("--compare", nargs=2, metavar=("A", "B"))
+    args = ap.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        result, path = run_eval(args.llm, args.k, args.dataset, args.name,
+                                args.first_token_delay, args.token_delay, args.retrieval_only)
+        print(json.dumps(result["summary"], indent=2))
+        print(f"Results written to {path}")
@@ -0,0 +1,81 @@
+# backend/main.py
+"""
+Async HTTP service for the recommender.
+
+    uvicorn backend.main:app --port 8000
+    RECOMMENDER_LLM=fake uvicorn backend.main:app --port 8000   # local stand-in LLM
+
+The embedding model, vector store and LLM client are loaded once at import
+and shared by every request. Embedding and vector search run in worker threads
+so the event loop stays free while they use the CPU.
+"""
+import asyncio
+import json
+import time
+from typing import Optional
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from backend.agents import recommender
+from backend.db.vector_store import embeddings_model
+
+app = FastAPI(title="AI Recommender", version="1.0")
+
+class RecommendRequest(BaseModel):
+    profile: str = ""
+    query: str
+    mode: Optional[str] = None      # "llm" or "fast", defaults to settings.RECOMMENDER_MODE
+    reasons: str = "template"       # fast mode only: "template", "llm" or "none"
+    use_cache: bool = True
+
+@app.on_event("startup")
+async def warm_up():
+    # First encode() call loads weights lazily; pay it before the first request
+    await asyncio.to_thread(embeddings_model.encode, ["warm up"])
+
+def _validate(request: RecommendRequest):
+    if not request.query.strip():
+        raise HTTPException(status_code=400, detail="Query cannot be empty")
+
+@app.post("/recommend")
+async def recommend(request: RecommendRequest):
+    _validate(request)
+    return await recommender.aget_recommendations(
+        request.profile, request.query,
+        mode=request.mode, reasons=request.reasons, use_cache=request.use_cache,
+    )
+
+@app.post("/recommend/stream")
+async def recommend_stream(request: RecommendRequest):
+    """
+    NDJSON stream: one {"type": "recommendation", "item": {...}} line per item as soon
+    as it is parsed, then {"type": "done", ...} or {"type": "error", ...}.
+    """
+    _validate(request)
+
+    async def events():
+        start = time.perf_counter()
+        count = 0
+        try:
+            if (request.mode or recommender.settings.RECOMMENDER_MODE) == "fast":
+                result = await recommender.aget_recommendations(
+                    request.profile, request.query, mode="fast", reasons=request.reasons)
+                items = result["recommendations"]
+                for item in items:
+                    count += 1
+                    yield json.dumps({"type": "recommendation", "item": item}) + "\n"
+            else:
+                async for item in recommender.astream_recommendations(
+                        request.profile, request.query, use_cache=request.use_cache):
+                    count += 1
+                    yield json.dumps({"type": "recommendation", "item": item}) + "\n"
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            yield json.dumps({"type": "done", "count": count, "elapsed_ms": elapsed_ms}) + "\n"
+        except Exception as e:
+            yield json.dumps({"type": "error", "reason": f"Error: {str(e)}"}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.get("/health")
+def health():
+    return {"status": "healthy", "llm": recommender.settings.RECOMMENDER_LLM}
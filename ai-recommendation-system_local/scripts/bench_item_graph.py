@@ -0,0 +1,71 @@
+# scripts/bench_item_graph.py
+"""
+Benchmark for the item-to-item graph: build time, incremental update time, refresh time
+for re-ingested items and lookup latency.
+Uses random MiniLM-sized vectors, so no Chroma or model download is needed.
+
+    python -m scripts.bench_item_graph --items 50000 --k 20
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from backend.db import item_graph
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=50_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--k", type=int, default=20)
+    ap.add_argument("--block-size", type=int, default=4096)
+    ap.add_argument("--new", type=float, default=0.01, help="fraction of items added incrementally")
+    ap.add_argument("--changed", type=float, default=0.001, help="fraction of items re-ingested with a new vector")
+    ap.add_argument("--lookups", type=int, default=10_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.items, args.dim), dtype=np.float32)
+    n_new = max(1, int(args.items * args.new))
+    n_old = args.items - n_new
+
+    start = time.perf_counter()
+    neighbours, scores = item_graph.build_graph(vectors[:n_old], args.k, args.block_size)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    neighbours, scores = item_graph.extend_graph(neighbours, scores, vectors[:n_old], vectors[n_old:], args.block_size)
+    extend_s = time.perf_counter() - start
+
+    n_changed = max(1, int(args.items * args.changed))
+    changed = rng.choice(args.items, n_changed, replace=False)
+    vectors[changed] = rng.standard_normal((n_changed, args.dim), dtype=np.float32)
+    start = time.perf_counter()
+    neighbours, scores = item_graph.refresh_graph(neighbours, scores, vectors, changed, args.block_size)
+    refresh_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "item_graph.npz"
+        item_graph.save_graph(path, list(range(args.items)), [f"item {i}" for i in range(args.items)], neighbours, scores,
+                              item_graph.fingerprints(vectors))
+        size_mb = path.stat().st_size / 1e6
+        item_graph.GRAPH_PATH = path
+
+        item_graph.similar_items(0)  # load once
+        ids = rng.integers(0, args.items, args.lookups)
+        latencies = []
+        for i in ids:
+            t = time.perf_counter()
+            item_graph.similar_items(int(i), 10)
+            latencies.append(time.perf_counter() - t)
+
+    lat_us = np.array(latencies) * 1e6
+    print(f"items={args.items} dim={args.dim} k={args.k} block={args.block_size}")
+    print(f"build ({n_old} items):        {build_s:.2f}s")
+    print(f"incremental (+{n_new} items): {extend_s:.2f}s")
+    print(f"refresh ({n_changed} changed):    {refresh_s:.2f}s")
+    print(f"graph file:                {size_mb:.1f} MB")
+    print(f"lookup latency:            p50={np.percentile(lat_us, 50):.1f}us p99={np.percentile(lat_us, 99):.1f}us")
+
+if __name__ == "__main__":
+    main()
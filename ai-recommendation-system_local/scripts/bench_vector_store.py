@@ -0,0 +1,127 @@
+# scripts/bench_vector_store.py
+"""
+Chroma vs memory-mapped store: memory, cold start and query latency.
+
+    python -m scripts.bench_vector_store --items 100000
+
+Each backend is measured in a fresh subprocess so cold start and resident memory
+are not polluted by the other. On Linux, memory is split into private (RssAnon)
+and file-backed (RssFile) pages; file-backed pages of the mmap store are shared
+by every process that opens it.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+
+def _memory_mb():
+    try:
+        fields = dict(line.split(":", 1) for line in Path("/proc/self/status").read_text().splitlines())
+        kb = lambda key: int(fields[key].split()[0]) / 1024
+        return {"private_mb": round(kb("RssAnon"), 1), "shared_file_mb": round(kb("RssFile"), 1)}
+    except (OSError, KeyError):
+        return {"max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+def _queries(n, dim, seed=1):
+    return np.random.default_rng(seed).standard_normal((n, dim), dtype=np.float32)
+
+def child(backend, path, dim, n_queries, k):
+    before = _memory_mb()
+    queries = _queries(n_queries, dim)
+    start = time.perf_counter()
+    if backend == "chroma":
+        import chromadb
+        collection = chromadb.PersistentClient(path=path).get_collection("bench")
+        search = lambda q: collection.query(query_embeddings=[q.tolist()], n_results=k)
+    else:
+        from backend.db.mmap_store import MmapVectorStore
+        store = MmapVectorStore(path, mode=backend.split("-")[1])
+        search = lambda q: store.search_vector(q, k)
+    search(queries[0])
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    latencies = []
+    for q in queries[1:]:
+        t = time.perf_counter()
+        search(q)
+        latencies.append((time.perf_counter() - t) * 1000)
+    print(json.dumps({
+        "backend": backend,
+        "cold_start_ms": round(cold_ms, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "memory_before": before,
+        "memory_after": _memory_mb(),
+    }))
+
+def build(tmp, items, dim, dtype):
+    from backend.db.mmap_store import MmapVectorStore
+    vectors = np.random.default_rng(0).standard_normal((items, dim), dtype=np.float32)
+    ids = [str(i) for i in range(items)]
+    metadatas = [{"id": i, "title": f"Item {i}"} for i in range(items)]
+    texts = [f"Item {i} - description" for i in range(items)]
+
+    start = time.perf_counter()
+    MmapVectorStore.write(Path(tmp) / "mmap", ids, texts, metadatas, vectors, dtype=dtype)
+    print(f"mmap build:   {time.perf_counter() - start:.1f}s")
+
+    import chromadb
+    start = time.perf_counter()
+    collection = chromadb.PersistentClient(path=str(Path(tmp) / "chroma")).create_collection(
+        "bench", metadata={"hnsw:space": "cosine"})
+    for s in range(0, items, 5000):
+        collection.add(ids=ids[s:s + 5000], embeddings=vectors[s:s + 5000].tolist(),
+                       metadatas=metadatas[s:s + 5000], documents=texts[s:s + 5000])
+    print(f"chroma build: {time.perf_counter() - start:.1f}s")
+
+def approx_recall(path, dim, n_queries, k):
+    from backend.db.mmap_store import MmapVectorStore
+    store = MmapVectorStore(path)
+    hits = 0
+    for q in _queries(n_queries, dim)[:100]:
+        exact, _ = store.search_vector(q, k, mode="exact")
+        approx, _ = store.search_vector(q, k, mode="approx")
+        hits += len(set(exact.tolist()) & set(approx.tolist()))
+    return hits / (min(n_queries, 100) * k)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--dtype", default="float16", choices=["float16", "int8"])
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--path", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child, args.path, args.dim, args.queries, args.k)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build(tmp, args.items, args.dim, args.dtype)
+        rows = []
+        for backend, sub in (("chroma", "chroma"), ("mmap-exact", "mmap"), ("mmap-approx", "mmap")):
+            out = subprocess.run(
+                [sys.executable, "-m", "scripts.bench_vector_store", "--child", backend,
+                 "--path", str(Path(tmp) / sub), "--dim", str(args.dim),
+                 "--queries", str(args.queries), "--k", str(args.k)],
+                capture_output=True, text=True, check=True,
+            )
+            rows.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        recall = approx_recall(Path(tmp) / "mmap", args.dim, args.queries, args.k)
+
+    print(f"\n{args.items} items x {args.dim} dims, k={args.k}, mmap dtype={args.dtype}")
+    for r in rows:
+        print(f"{r['backend']:12} cold={r['cold_start_ms']:>8.1f}ms  p50={r['p50_ms']:>7.3f}ms  "
+              f"p99={r['p99_ms']:>7.3f}ms  memory={r['memory_after']}")
+    print(f"mmap-approx recall@{args.k} vs exact: {recall:.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# scripts/load_test.py
+"""
+Load test for the streaming recommender service.
+
+    RECOMMENDER_LLM=fake uvicorn backend.main:app --port 8000
+    python -m scripts.load_test --url http://localhost:8000 --users 32 --requests 500
+
+Reports requests per second and time-to-first-recommendation (TTFR) vs total latency.
+Queries get a unique suffix so the semantic cache does not hide the LLM cost
+(the request also sets use_cache=false).
+"""
+import argparse
+import asyncio
+import json
+import time
+import httpx
+import numpy as np
+
+PROFILES = ["I love sci-fi and AI", "Space exploration fan", "I like heist films", "Epic political sagas"]
+QUERIES = ["Recommend a movie", "Something mind-bending", "A movie about another planet", "A classic to rewatch"]
+
+async def one_request(client, url, i, mode):
+    payload = {
+        "profile": PROFILES[i % len(PROFILES)],
+        "query": f"{QUERIES[i % len(QUERIES)]} #{i}",
+        "mode": mode,
+        "use_cache": False,
+    }
+    start = time.perf_counter()
+    first = None
+    ok = False
+    async with client.stream("POST", f"{url}/recommend/stream", json=payload) as resp:
+        async for line in resp.aiter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "recommendation" and first is None:
+                first = time.perf_counter() - start
+            ok = event["type"] == "done"
+    return first, time.perf_counter() - start, ok
+
+async def main(url, users, total, mode):
+    sem = asyncio.Semaphore(users)
+    results = []
+
+    async def worker(i):
+        async with sem:
+            try:
+                results.append(await one_request(client, url, i, mode))
+            except httpx.HTTPError:
+                results.append((None, None, False))
+
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    ttfr = np.array([r[0] for r in results if r[0] is not None]) * 1000
+    total_ms = np.array([r[1] for r in results if r[1] is not None]) * 1000
+    failed = sum(1 for r in results if not r[2])
+
+    print(f"{total} requests, {users} concurrent users, mode={mode}")
+    print(f"throughput: {total / elapsed:.1f} req/s, failed: {failed}")
+    for name, values in (("TTFR", ttfr), ("total", total_ms)):
+        if len(values):
+            print(f"{name:6} ms  p50={np.percentile(values, 50):.0f}  p95={np.percentile(values, 95):.0f}  "
+                  f"p99={np.percentile(values, 99):.0f}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://localhost:8000")
+    ap.add_argument("--users", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--mode", default="llm", choices=["llm", "fast"])
+    args = ap.parse_args()
+    asyncio.run(main(args.url, args.users, args.requests, args.mode))
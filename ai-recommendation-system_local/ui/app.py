@@ -1,6 +1,6 @@
 # ui/app.py
 import streamlit as st
-from backend.agents.recommender import get_recommendations
+from backend.agents.recommender import get_recommendations, explain_recommendations, cache
 
 st.set_page_config(page_title="AI Recommender", layout="wide")
 st.title("AI Movie Recommender")
@@ -8,7 +8,11 @@ st.caption("Llama 3.2 + RAG — 100% Local")
 
 with st.sidebar:
     profile = st.text_area("Profile:", "I love sci-fi and AI", height=100)
+    mode = st.radio("Mode:", ["llm", "fast"], format_func=lambda m: "LLM (slow)" if m == "llm" else "Fast (no LLM)")
+    explain = mode == "fast" and st.checkbox("Explain picks with LLM", value=False)
     st.caption("Ollama must be running: `ollama run llama3.2:3b`")
+    stats = cache.stats()
+    st.caption(f"Cache: {stats['entries']} entries · hit rate {stats['hit_rate']:.0%}")
 
 col1, col2 = st.columns([3,1])
 with col1:
@@ -19,13 +23,22 @@ with col2:
 
 if btn:
     with st.spinner("Thinking..."):
-        result = get_recommendations(profile, query)
+        result = get_recommendations(profile, query, mode=mode)
     
     if result.get("recommendations"):
-        st.success("Recommendations:")
-        for r in result["recommendations"]:
-            with st.expander(f"**{r.get('title')}** — {r.get('score', 0):.2f}"):
-                st.write(r.get("reason"))
+        st.success("Recommendations (cached):" if result.get("cached") else "Recommendations:")
+        recs = result["recommendations"]
+        slots = []
+        for r in recs:
+            with st.expander(f"**{r.get('title')}** — {r.get('score', 0):.2f}", expanded=explain):
+                slots.append(st.empty())
+                slots[-1].write(r.get("reason"))
+        # Fast results are already on screen; LLM reasons replace the template text afterwards
+        if explain:
+            with st.spinner("Writing reasons..."):
+                recs = explain_recommendations(profile, query, recs)
+            for slot, r in zip(slots, recs):
+                slot.write(r.get("reason"))
     else:
         st.error(f"Error: {result.get('reason')}")
         st.info("Run: `python -m backend.db.ingest` and `ollama run llama3.2:3b`")
\ No newline at end of file
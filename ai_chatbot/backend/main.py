@@ -2,39 +2,457 @@
 """
 AI Chatbot Backend - Local LLM (Ollama)
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from src.chains import create_chat_chain
+from typing import List, Optional
+from src.chains import (MODEL, TEMPERATURE, create_chat_chain, create_document_store, create_ollama_client,
+                        create_response_cache, create_router, create_summary_chain)
+from src.config import settings
+from src.documents import DocumentTooLarge
+from src.memory import ConversationMemory
+from src.metrics import ERRORS, REQUEST_SECONDS, REQUESTS, STAGE_SECONDS, TOKENS_PER_SECOND, registry
+from src.ollama_client import close_upstream
+from src.prompts import followup_template, prompt_template
+from src.scheduler import Overloaded, RequestScheduler
+import asyncio
+import httpx
+import json
+import logging
+import math
 import os
+import time
 
 # Disable LangSmith
 os.environ["LANGCHAIN_TRACING_V2"] = "false"
 
+logger = logging.getLogger("chatbot")
+# The root logger is left to whoever runs the app. Under plain uvicorn it has no handler,
+# so the chatbot.* loggers write through uvicorn's own handler at its --log-level
+if not logger.handlers and not logging.getLogger().handlers:
+    logger.handlers = list(logging.getLogger("uvicorn").handlers)
+    logger.setLevel(logging.getLogger("uvicorn.error").level)
+
 app = FastAPI(title="AI Chatbot (Local)", version="1.0")
 
 class ChatRequest(BaseModel):
     user_input: str
     context: str = ""
+    conversation_id: Optional[str] = None  # history is kept server-side; send only the new message
+    document_ids: List[str] = []           # uploaded via POST /documents; relevant chunks go into the context
 
 class ChatResponse(BaseModel):
     response: str
+    conversation_id: Optional[str] = None
+
+class DocumentUpload(BaseModel):
+    text: str
+    title: str = ""
+
+# Created in the startup hook: the HTTP pool must belong to the server's event loop
+ollama = None
+router = None
+chain = None
+summary_chain = None
+response_cache = None
+documents = None
+
+memory = ConversationMemory(
+    max_tokens=settings.MEMORY_MAX_TOKENS,
+    summary_tokens=settings.MEMORY_SUMMARY_TOKENS,
+    state_max_tokens=settings.MEMORY_STATE_MAX_TOKENS,
+    max_conversations=settings.MEMORY_MAX_CONVERSATIONS,
+    ttl=settings.MEMORY_TTL,
+)
+
+scheduler = RequestScheduler(
+    max_in_flight=settings.MAX_IN_FLIGHT,
+    max_queue_depth=settings.MAX_QUEUE_DEPTH,
+    max_queue_wait=settings.MAX_QUEUE_WAIT,
+)
+
+# Gauges are read from the live objects at scrape time
+registry.gauge("chatbot_in_flight", "Requests holding an LLM slot",
+               lambda: {(): scheduler.in_flight})
+registry.gauge("chatbot_queue_depth", "Requests waiting for a slot",
+               lambda: {(): scheduler.queued})
+registry.gauge("chatbot_rejected_total", "Requests rejected by admission control",
+               lambda: {(): scheduler.rejected}, kind="counter")
+registry.gauge("chatbot_endpoint_healthy", "1 if the Ollama endpoint is in rotation",
+               lambda: {(e.url,): int(e.healthy) for e in router.endpoints}, labels=("url",))
+registry.gauge("chatbot_endpoint_in_flight", "Requests in flight per Ollama endpoint",
+               lambda: {(e.url,): e.in_flight for e in router.endpoints}, labels=("url",))
+registry.gauge("chatbot_conversations", "Conversations held in memory",
+               lambda: {(): memory.stats()["conversations"]})
+registry.gauge("chatbot_documents", "Uploaded documents held for retrieval",
+               lambda: {(): len(documents.list())})
+if settings.CACHE_ENABLED:
+    registry.gauge("chatbot_cache_entries", "Response cache entries",
+                   lambda: {(): response_cache.stats()["entries"]})
+    registry.gauge("chatbot_cache_lookups_total", "Response cache lookups by result",
+                   lambda: {("hit_exact",): response_cache.hits_exact, ("hit_semantic",): response_cache.hits_semantic,
+                            ("miss",): response_cache.misses, ("bypass",): response_cache.bypassed},
+                   labels=("result",), kind="counter")
+    registry.gauge("chatbot_cache_saved_seconds_total", "Generation time saved by cache hits",
+                   lambda: {(): round(response_cache.saved_seconds, 3)}, kind="counter")
+
+@app.on_event("startup")
+async def startup():
+    global ollama, router, chain, summary_chain, response_cache, documents
+    ollama = create_ollama_client()
+    router = create_router(ollama)
+    chain = create_chat_chain(router)
+    summary_chain = create_summary_chain(router)
+    # Only stateless requests are cached: with a conversation_id the answer depends on history
+    response_cache = create_response_cache(router) if settings.CACHE_ENABLED else None
+    documents = create_document_store(router)
+    router.start_probing()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await router.stop_probing()
+    await documents.flush()
+    # Let requests that are still generating finish before the pool goes away
+    await ollama.aclose(drain_timeout=settings.OLLAMA_DRAIN_TIMEOUT)
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    ERRORS.inc("overloaded")
+    return JSONResponse(
+        status_code=429,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+class Unavailable(Exception):
+    """Ollama unreachable, or no pooled connection freed up in time: worth retrying, unlike a 500."""
+    def __init__(self, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+@app.exception_handler(Unavailable)
+async def unavailable_handler(request: Request, exc: Unavailable):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def _detail(e: Exception) -> str:
+    """Exception type and message; str() of an httpx timeout is empty."""
+    return f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+def _retry_after(e: Exception) -> Optional[float]:
+    """Seconds to wait if `e`, or an error it was raised from, means Ollama is unavailable; else None."""
+    while e is not None:
+        if isinstance(e, httpx.PoolTimeout):
+            return scheduler.avg_service_time  # a connection frees up when a request finishes
+        if isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)):
+            return settings.ROUTER_PROBE_INTERVAL  # when an ejected endpoint is probed again
+        e = e.__cause__ or e.__context__
+    return None
+
+def _client(http_request: Request):
+    """Fairness key and priority: X-Client-ID / X-Priority headers, else the client address."""
+    client_id = http_request.headers.get("X-Client-ID") or (http_request.client.host if http_request.client else "anonymous")
+    return client_id, http_request.headers.get("X-Priority", "normal").lower()
+
+async def _summarize(summary: str, lines: str) -> str:
+    # Background work: low priority, and skipped (retried next turn) when the box is busy
+    async with scheduler.slot("memory", "low"):
+        return await summary_chain.ainvoke({
+            "summary": summary or "(none)",
+            "lines": lines,
+            "max_words": settings.MEMORY_SUMMARY_TOKENS * 3 // 4,
+        })
+
+def _state_payload(convo, request: ChatRequest) -> dict:
+    if memory.can_extend(convo, request.user_input):
+        return ollama.payload(followup_template.format(user_input=request.user_input), convo.ollama_context)
+    return ollama.payload(prompt_template.format(
+        user_input=request.user_input, context=memory.pack(convo, request.context)))
+
+async def _stream_with_state(convo, payload: dict, state: dict):
+    """Generate through /api/generate directly so Ollama's `context` state can be passed in and kept."""
+    async for endpoint, chunk in router.astream_generate(payload, prefer=convo.endpoint):
+        if chunk.get("done"):
+            state.update(ollama_context=chunk.get("context"), endpoint=endpoint)
+            logger.info(
+                "conversation %s prompt_tokens=%s prompt_eval=%.3fs reused_state=%s",
+                convo.id, chunk.get("prompt_eval_count"), chunk.get("prompt_eval_duration", 0) / 1e9,
+                "context" in payload,
+            )
+        elif chunk.get("response"):
+            yield chunk["response"]
+
+async def _metered(stream):
+    """Pass tokens through, recording LLM time-to-first-token, total time and tokens/s."""
+    start = time.perf_counter()
+    first_token, tokens = None, 0
+    try:
+        async for token in stream:
+            if first_token is None:
+                first_token = time.perf_counter() - start
+                STAGE_SECONDS.observe(first_token, "llm_ttft")
+            tokens += 1
+            yield token
+    finally:
+        await close_upstream(stream)
+    total = time.perf_counter() - start
+    STAGE_SECONDS.observe(total, "llm_total")
+    if tokens > 1 and total > first_token:
+        TOKENS_PER_SECOND.observe((tokens - 1) / (total - first_token))
+
+async def _answer(request: ChatRequest):
+    """Answer tokens. With a conversation_id the history comes from memory and the turn is stored afterwards."""
+    if not request.conversation_id:
+        STAGE_SECONDS.observe(0.0, "prompt")  # the client sent its context as-is
+        stream = _metered(chain.astream({"user_input": request.user_input, "context": request.context}))
+        try:
+            async for token in stream:
+                yield token
+        finally:
+            await close_upstream(stream)
+        return
+
+    convo = memory.get(request.conversation_id)
+    async with convo.lock:
+        state, parts = {}, []
+        building = time.perf_counter()
+        if settings.MEMORY_REUSE_OLLAMA_CONTEXT:
+            stream = _stream_with_state(convo, _state_payload(convo, request), state)
+        else:
+            stream = chain.astream({
+                "user_input": request.user_input,
+                "context": memory.pack(convo, request.context)
+            })
+        STAGE_SECONDS.observe(time.perf_counter() - building, "prompt")
+        stream = _metered(stream)
+        try:
+            async for token in stream:
+                parts.append(token)
+                yield token
+        finally:
+            await close_upstream(stream)
+        # only reached when the answer completed: interrupted turns are not remembered
+        memory.record(convo, request.user_input, "".join(parts), **state)
+    if memory.needs_compaction(convo):
+        asyncio.get_running_loop().create_task(memory.compact(convo, _summarize))
+
+async def _cache_lookup(request: ChatRequest, http_request: Request):
+    """(cached answer or None, X-Cache header value, embedding to store the answer with)"""
+    if response_cache is None or request.conversation_id:
+        return None, None, None
+    if http_request.headers.get("X-Cache-Bypass", "").lower() in ("1", "true", "yes"):
+        response_cache.bypassed += 1
+        return None, "bypass", None
+    cached, tier, vector = await response_cache.lookup(request.user_input, request.context, MODEL, TEMPERATURE)
+    return cached, f"hit-{tier}" if cached is not None else "miss", vector
 
-chain = create_chat_chain()
+async def _cache_store(request: ChatRequest, answer: str, gen_time: float, vector):
+    await response_cache.store(request.user_input, request.context, MODEL, TEMPERATURE, answer, gen_time, vector)
+
+async def _with_documents(request: ChatRequest) -> ChatRequest:
+    """Replace document_ids by their most relevant chunks, ahead of the client's own context."""
+    if not request.document_ids:
+        return request
+    missing = documents.missing(request.document_ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Unknown document(s): {', '.join(missing)}")
+    start = time.perf_counter()
+    try:
+        retrieved = await documents.retrieve(request.user_input, request.document_ids)
+    except Exception as e:
+        ERRORS.inc(type(e).__name__)
+        raise HTTPException(status_code=502, detail=f"Document retrieval failed: {e}")
+    STAGE_SECONDS.observe(time.perf_counter() - start, "retrieval")
+    context = "\n\n".join(part for part in (retrieved, request.context) if part)
+    return request.model_copy(update={"context": context, "document_ids": []})
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request, response: Response):
     if not request.user_input.strip():
         raise HTTPException(status_code=400, detail="Input cannot be empty")
-    
+
+    received = time.perf_counter()
+    request = await _with_documents(request)
+    cached, cache_status, vector = await _cache_lookup(request, http_request)
+    REQUESTS.inc("chat", cache_status or "off")
+    if cache_status:
+        response.headers["X-Cache"] = cache_status
+    if cached is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - received, "chat")
+        return ChatResponse(response=cached)
+
+    queued = time.perf_counter()
+    async with scheduler.slot(*_client(http_request)):
+        STAGE_SECONDS.observe(time.perf_counter() - queued, "queue")
+        try:
+            start = time.perf_counter()
+            result = "".join([token async for token in _answer(request)])
+        except Exception as e:
+            ERRORS.inc(type(e).__name__)
+            retry_after = _retry_after(e)
+            if retry_after is not None:
+                raise Unavailable(retry_after, _detail(e))
+            raise HTTPException(status_code=500, detail=_detail(e))
+    if cache_status == "miss":  # a bypass neither reads nor writes the cache
+        await _cache_store(request, result, time.perf_counter() - start, vector)
+    REQUEST_SECONDS.observe(time.perf_counter() - received, "chat")
+    return ChatResponse(response=result, conversation_id=request.conversation_id)
+
+def _sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    """
+    Server-Sent Events: one `data: {"token": ...}` event per token from Ollama,
+    then `event: done` (or `event: error`). If the client goes away, the upstream
+    Ollama request is closed so generation stops instead of running to the end.
+    """
+    if not request.user_input.strip():
+        raise HTTPException(status_code=400, detail="Input cannot be empty")
+
+    received = time.perf_counter()
+    request = await _with_documents(request)
+    sse_headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    cached, cache_status, vector = await _cache_lookup(request, http_request)
+    REQUESTS.inc("chat_stream", cache_status or "off")
+    if cache_status:
+        sse_headers["X-Cache"] = cache_status
+    if cached is not None:
+        # Cache hits skip the queue: nothing to wait for
+        async def cached_events():
+            yield _sse({"token": cached})
+            yield _sse({"tokens": 1, "cached": cache_status}, event="done")
+            REQUEST_SECONDS.observe(time.perf_counter() - received, "chat_stream")
+        return StreamingResponse(cached_events(), media_type="text/event-stream", headers=sse_headers)
+
+    # Admission happens before the response starts, so overload is still a plain 429
+    queued = time.perf_counter()
+    await scheduler.acquire(*_client(http_request))
+    started = time.perf_counter()
+    STAGE_SECONDS.observe(started - queued, "queue")
+    slot = {"held": True}
+
+    def release_slot():
+        # Runs from the stream's finally, or as a background task if the stream never started
+        if slot["held"]:
+            slot["held"] = False
+            scheduler.release(time.perf_counter() - started)
+
+    async def events():
+        start = time.perf_counter()
+        first_token = None
+        tokens = 0
+        parts = []
+        disconnected = False
+        stream = _answer(request)
+        try:
+            async for token in stream:
+                if await http_request.is_disconnected():
+                    disconnected = True
+                    ERRORS.inc("client_disconnected")
+                    break
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                tokens += 1
+                parts.append(token)
+                yield _sse({"token": token})
+            if not disconnected:
+                yield _sse({"tokens": tokens, "conversation_id": request.conversation_id}, event="done")
+                if cache_status == "miss":
+                    await _cache_store(request, "".join(parts), time.perf_counter() - start, vector)
+        except Exception as e:
+            ERRORS.inc(type(e).__name__)
+            # The 200 is already sent: an unavailable Ollama is reported in the event instead
+            error, retry_after = {"detail": _detail(e)}, _retry_after(e)
+            if retry_after is not None:
+                error.update(status=503, retry_after=max(1, math.ceil(retry_after)))
+            yield _sse(error, event="error")
+        finally:
+            try:
+                # Closing the generator closes the HTTP stream to Ollama, which aborts generation;
+                # shielded, since a disconnect has already cancelled this task's scope
+                await close_upstream(stream)
+            finally:
+                # Even if aclose raises or is cancelled by the disconnect
+                total = time.perf_counter() - start
+                release_slot()
+                REQUEST_SECONDS.observe(time.perf_counter() - received, "chat_stream")
+                gen_time = total - (first_token or 0)
+                logger.info(
+                    "chat/stream ttft=%.3fs total=%.3fs tokens=%d tok/s=%.1f%s",
+                    first_token or -1, total, tokens,
+                    tokens / gen_time if tokens and gen_time > 0 else 0.0,
+                    " (client disconnected)" if disconnected else "",
+                )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers=sse_headers,
+        background=BackgroundTask(release_slot),
+    )
+
+@app.post("/documents")
+async def upload_document(upload: DocumentUpload):
+    """Chunk, embed and keep a document; reference the returned id in ChatRequest.document_ids."""
+    if not upload.text.strip():
+        raise HTTPException(status_code=400, detail="Document is empty")
     try:
-        result = await chain.ainvoke({
-            "user_input": request.user_input,
-            "context": request.context
-        })
-        return ChatResponse(response=result)
+        return await documents.add(upload.text, upload.title)
+    except DocumentTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=502, detail=f"Embedding failed: {e}")
+
+@app.get("/documents")
+def list_documents():
+    return {"documents": documents.list(), "stats": documents.stats()}
+
+@app.delete("/documents/{document_id}")
+async def delete_document(document_id: str):
+    if not await documents.delete(document_id):
+        raise HTTPException(status_code=404, detail="Unknown document")
+    return {"deleted": document_id}
+
+@app.delete("/conversations/{conversation_id}")
+def delete_conversation(conversation_id: str):
+    if not memory.delete(conversation_id):
+        raise HTTPException(status_code=404, detail="Unknown conversation")
+    return {"deleted": conversation_id}
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+_readiness = {"checked": 0.0, "body": None}
+
+@app.get("/ready")
+async def ready():
+    """
+    200 only if an endpoint is reachable and has the model pulled (/api/tags), else 503.
+    model_loaded (/api/ps) is reported per endpoint but only gates readiness with
+    READY_REQUIRE_LOADED: an idle model is unloaded and reloads on the next request.
+    Cached for READY_CACHE_SECONDS so frequent probes do not hammer Ollama.
+    """
+    if _readiness["body"] is None or time.monotonic() - _readiness["checked"] > settings.READY_CACHE_SECONDS:
+        endpoints = await router.readiness(MODEL)
+        key = "model_loaded" if settings.READY_REQUIRE_LOADED else "model_available"
+        _readiness.update(checked=time.monotonic(),
+                          body={"ready": any(e[key] for e in endpoints), "model": MODEL, "endpoints": endpoints})
+    body = _readiness["body"]
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
 
 @app.get("/health")
 def health():
-    return {"status": "healthy"}
\ No newline at end of file
+    """Liveness: the process answers. Use /ready for whether Ollama can serve."""
+    return {"status": "healthy", "scheduler": scheduler.stats(), "endpoints": router.stats(),
+            "memory": memory.stats(), "cache": response_cache.stats() if response_cache else None,
+            "documents": documents.stats()}
\ No newline at end of file
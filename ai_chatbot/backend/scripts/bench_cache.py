@@ -0,0 +1,105 @@
+# backend/scripts/bench_cache.py
+"""
+Replay support-style traffic through the backend with and without the response cache.
+
+    cd backend && python -m scripts.bench_cache --requests 300 --concurrency 8
+
+The workload draws from a few FAQ questions, asked verbatim, with different
+casing/punctuation, or reworded. Runs in-process against a stand-in Ollama
+(which also serves /api/embed) and prints latency, hit rates and time saved.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+import httpx
+
+PORT = 11541
+
+QUESTIONS = [
+    ["How do I reset my password?", "how do i reset my password", "How can I reset my password please?"],
+    ["What are your opening hours?", "what are your opening hours??", "What are the opening hours of your store?"],
+    ["Can I change my delivery address?", "can I change my delivery address", "Is it possible to change my delivery address?"],
+    ["How do I cancel my subscription?", "HOW DO I CANCEL MY SUBSCRIPTION", "How do I cancel the subscription I have?"],
+    ["Do you ship internationally?", "do you ship internationally", "Do you ship orders internationally?"],
+]
+
+
+def start_server():
+    proc = subprocess.Popen([sys.executable, "-m", "scripts.fake_ollama", "--port", str(PORT),
+                             "--first-token-delay", "0.3", "--token-delay", "0.01", "--tokens", "40"])
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/api/tags", timeout=0.5)
+            break
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    return proc
+
+
+def workload(n, seed=0):
+    rng = random.Random(seed)
+    # a long tail of one-off questions next to the popular ones
+    return [rng.choice(rng.choice(QUESTIONS)) if rng.random() < 0.8 else f"Unusual question number {i} about item {i * 7}"
+            for i in range(n)]
+
+
+async def replay(app, questions, concurrency, bypass):
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    headers = {"X-Cache-Bypass": "true"} if bypass else {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=120) as client:
+        async def one(q):
+            async with sem:
+                start = time.perf_counter()
+                resp = await client.post("/chat", json={"user_input": q}, headers=headers)
+                resp.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in questions))
+    return time.perf_counter() - start, sorted(latencies)
+
+
+def report(name, elapsed, latencies):
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))]
+    print(f"{name:9} {len(latencies) / elapsed:6.1f} req/s  p50={pct(50):.3f}s  p95={pct(95):.3f}s  p99={pct(99):.3f}s")
+
+
+async def run(requests, concurrency):
+    import main  # after OLLAMA_ENDPOINTS is set
+
+    questions = workload(requests)
+    async with main.app.router.lifespan_context(main.app):  # startup/shutdown hooks
+        report("no cache", *await replay(main.app, questions, concurrency, bypass=True))
+        main.response_cache.clear()
+        report("cache", *await replay(main.app, questions, concurrency, bypass=False))
+        print(main.response_cache.stats())
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=300)
+    ap.add_argument("--concurrency", type=int, default=8)
+    args = ap.parse_args()
+
+    os.environ["OLLAMA_ENDPOINTS"] = f"http://127.0.0.1:{PORT}"
+    os.environ.setdefault("MAX_IN_FLIGHT", "4")
+    # the stand-in's bag-of-words embeddings score rewordings lower than a real embedding model
+    os.environ.setdefault("CACHE_SIMILARITY", "0.75")
+    os.environ.setdefault("CACHE_ENABLED", "true")
+    os.environ.setdefault("CACHE_EMBED_MODEL", "nomic-embed-text")
+    proc = start_server()
+    try:
+        asyncio.run(run(args.requests, args.concurrency))
+    finally:
+        proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# backend/scripts/bench_documents.py
+"""
+Reference text sent in every request vs uploaded once and referenced by ID.
+
+    cd backend && python -m scripts.bench_documents --requests 40 --sections 200
+
+Builds a handbook-style document, then asks the same questions with the whole
+text in `context` and with `document_ids`. Runs in-process against a stand-in
+Ollama whose prompt evaluation costs time per token, and prints bytes sent,
+prompt size and latency for both.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+from src.memory import count_tokens
+
+PORT = 11551
+
+TOPICS = ["refunds", "shipping", "warranty", "passwords", "invoices", "returns", "accounts", "discounts",
+          "deliveries", "subscriptions", "payments", "vouchers", "support", "privacy", "orders", "exchanges"]
+
+
+def start_server():
+    proc = subprocess.Popen([sys.executable, "-m", "scripts.fake_ollama", "--port", str(PORT),
+                             "--first-token-delay", "0.05", "--token-delay", "0.005", "--tokens", "30",
+                             "--prefill-delay", "0.0002"])
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/api/tags", timeout=0.5)
+            break
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    return proc
+
+
+def handbook(sections, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    for i in range(sections):
+        topic = rng.choice(TOPICS)
+        parts.append(f"Section {i} on {topic}. Customers asking about {topic} should be told that rule {i} "
+                     f"applies within {rng.randint(2, 60)} days. Exceptions for {topic} need approval "
+                     f"from team {rng.randint(1, 9)}. Keep a record of every {topic} case.")
+    return " ".join(parts)
+
+
+async def ask(client, questions, body):
+    sent, latencies = 0, []
+    for q in questions:
+        payload = httpx.Request("POST", "http://backend/chat", json={"user_input": q, **body}).content
+        start = time.perf_counter()
+        resp = await client.post("/chat", content=payload, headers={"Content-Type": "application/json",
+                                                                     "X-Cache-Bypass": "true"})
+        resp.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        sent += len(payload)
+    return sent, sorted(latencies)
+
+
+def report(name, requests, sent, latencies, prompt_tokens):
+    pct = lambda q: latencies[min(len(latencies) - 1, int(q / 100 * len(latencies)))]
+    print(f"{name:13} {sent / requests / 1024:8.1f} KiB/request  ~{prompt_tokens:6d} context tokens  "
+          f"p50={pct(50):.3f}s  p95={pct(95):.3f}s")
+
+
+async def run(requests, sections):
+    import main  # after OLLAMA_ENDPOINTS is set
+
+    text = handbook(sections)
+    rng = random.Random(1)
+    questions = [f"What is the rule for {rng.choice(TOPICS)}?" for _ in range(requests)]
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=300) as client:
+            start = time.perf_counter()
+            doc = (await client.post("/documents", json={"text": text, "title": "handbook"})).json()
+            print(f"upload: {len(text.encode()) / 1024:.0f} KiB, {doc['chunks']} chunks "
+                  f"in {time.perf_counter() - start:.2f}s (once)")
+
+            report("full context", requests, *await ask(client, questions, {"context": text}), count_tokens(text))
+            retrieved = await main.documents.retrieve(questions[0], [doc["id"]])
+            report("document_ids", requests, *await ask(client, questions, {"document_ids": [doc["id"]]}),
+                   count_tokens(retrieved))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=40)
+    ap.add_argument("--sections", type=int, default=200)
+    args = ap.parse_args()
+
+    os.environ["OLLAMA_ENDPOINTS"] = f"http://127.0.0.1:{PORT}"
+    os.environ.setdefault("DOCS_EMBED_MODEL", "fake-embed")
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DOCS_DIRECTORY"] = directory
+        proc = start_server()
+        try:
+            asyncio.run(run(args.requests, args.sections))
+        finally:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
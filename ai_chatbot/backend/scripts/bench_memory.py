@@ -0,0 +1,92 @@
+# backend/scripts/bench_memory.py
+"""
+Request size and prompt-processing time as a conversation grows.
+
+    cd backend && python -m scripts.bench_memory --turns 40
+
+Runs the backend in-process against a stand-in Ollama that charges a fixed
+prefill time per prompt token, in three modes:
+
+- client:  the client resends the whole history in `context` every turn (old behaviour)
+- memory:  `conversation_id`, history packed server-side into MEMORY_MAX_TOKENS
+- state:   memory + Ollama `context` reuse (MEMORY_REUSE_OLLAMA_CONTEXT)
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import httpx
+
+PORT = 11531
+
+
+def start_server(prefill_delay):
+    proc = subprocess.Popen([sys.executable, "-m", "scripts.fake_ollama", "--port", str(PORT),
+                             "--first-token-delay", "0.01", "--token-delay", "0.001", "--tokens", "60",
+                             "--prefill-delay", str(prefill_delay)])
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/api/tags", timeout=0.5)
+            break
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    return proc
+
+
+async def converse(app, mode, turns):
+    rows, history = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://backend", timeout=60) as client:
+        for turn in range(turns):
+            user_input = f"Turn {turn}: tell me more about topic number {turn} and how it relates to the last one."
+            body = {"user_input": user_input}
+            if mode == "client":
+                body["context"] = "\n".join(history)
+            else:
+                body["conversation_id"] = f"bench-{mode}"
+            payload = json.dumps(body)
+            start = time.perf_counter()
+            resp = await client.post("/chat", content=payload, headers={"Content-Type": "application/json"})
+            resp.raise_for_status()
+            rows.append((len(payload), time.perf_counter() - start))
+            history.append(f"User: {user_input}\nAssistant: {resp.json()['response']}")
+            await asyncio.sleep(0.05)  # let background summaries run
+    return rows
+
+
+async def run(turns):
+    import main  # after OLLAMA_ENDPOINTS is set
+
+    results = {}
+    async with main.app.router.lifespan_context(main.app):  # startup/shutdown hooks
+        for mode in ("client", "memory", "state"):
+            main.settings.MEMORY_REUSE_OLLAMA_CONTEXT = mode == "state"
+            results[mode] = await converse(main.app, mode, turns)
+
+    checkpoints = [t for t in (1, 5, 10, 20, 40, 80) if t <= turns]
+    print(f"{'turn':>6}" + "".join(f" | {m:>8} bytes  latency" for m in results))
+    for t in checkpoints:
+        print(f"{t:>6}" + "".join(f" | {rows[t - 1][0]:>14d} {rows[t - 1][1]:7.3f}s" for rows in results.values()))
+    print(f"summaries written: {main.memory.stats()['summaries']}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=40)
+    ap.add_argument("--prefill-delay", type=float, default=0.0005, help="seconds per prompt token")
+    args = ap.parse_args()
+
+    os.environ["OLLAMA_ENDPOINTS"] = f"http://127.0.0.1:{PORT}"
+    proc = start_server(args.prefill_delay)
+    try:
+        asyncio.run(run(args.turns))
+    finally:
+        proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# backend/scripts/bench_metrics.py
+"""
+Cost of the /metrics instrumentation.
+
+    cd backend && python -m scripts.bench_metrics
+
+Times the metric updates one chat request makes (counters, stage histograms,
+tokens/s) and one scrape of a registry filled with realistic label sets, and
+compares them with the LLM latency they measure.
+"""
+import argparse
+import random
+import time
+from src.metrics import LATENCY_BUCKETS, RATE_BUCKETS, Registry
+
+STAGES = ("queue", "prompt", "llm_ttft", "llm_total")
+
+
+def build():
+    registry = Registry()
+    metrics = {
+        "requests": registry.counter("chatbot_requests_total", "r", labels=("endpoint", "cache")),
+        "errors": registry.counter("chatbot_errors_total", "e", labels=("type",)),
+        "stages": registry.histogram("chatbot_stage_seconds", "s", LATENCY_BUCKETS, labels=("stage",)),
+        "request": registry.histogram("chatbot_request_seconds", "t", LATENCY_BUCKETS, labels=("endpoint",)),
+        "rate": registry.histogram("chatbot_tokens_per_second", "tps", RATE_BUCKETS),
+    }
+    for i in range(8):
+        registry.gauge(f"chatbot_gauge_{i}", "g", lambda: {(f"http://gpu{j}:11434",): j for j in range(4)},
+                       labels=("url",))
+    return registry, metrics
+
+
+def one_request(m, rng):
+    """The updates main.py makes for one uncached, successful request."""
+    m["requests"].inc("chat", "miss")
+    for stage in STAGES:
+        m["stages"].observe(rng.random() * 3, stage)
+    m["rate"].observe(rng.random() * 60)
+    m["request"].observe(rng.random() * 5, "chat")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200_000)
+    ap.add_argument("--scrapes", type=int, default=2_000)
+    args = ap.parse_args()
+
+    registry, metrics = build()
+    rng = random.Random(0)
+    for name in ("overloaded", "ReadTimeout", "ConnectError", "client_disconnected"):
+        metrics["errors"].inc(name)
+
+    start = time.perf_counter()
+    for _ in range(args.requests):
+        one_request(metrics, rng)
+    per_request = (time.perf_counter() - start) / args.requests
+
+    start = time.perf_counter()
+    for _ in range(args.scrapes):
+        body = registry.render()
+    per_scrape = (time.perf_counter() - start) / args.scrapes
+
+    print(f"per request: {per_request * 1e6:.2f} us of metric updates "
+          f"({per_request * 100:.4f}% of a 1 s LLM call)")
+    print(f"per scrape:  {per_scrape * 1e3:.3f} ms for {len(body.splitlines())} lines / {len(body)} bytes")
+
+
+if __name__ == "__main__":
+    main()
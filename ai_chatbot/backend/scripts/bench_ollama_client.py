@@ -0,0 +1,93 @@
+# backend/scripts/bench_ollama_client.py
+"""
+Pooled native client vs the legacy LangChain Ollama wrapper under concurrency.
+
+    cd backend && python -m scripts.bench_ollama_client --requests 400 --concurrency 32
+
+Streams the same prompts through both against a stand-in Ollama and prints
+throughput, time-to-first-token and total latency percentiles, and how many TCP
+connections the server saw.
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+import httpx
+from src.chains import create_llm, create_ollama_client
+from src.ollama_client import OllamaLLM
+
+PORT = 11561
+URL = f"http://127.0.0.1:{PORT}"
+
+
+def start_server():
+    proc = subprocess.Popen([sys.executable, "-m", "scripts.fake_ollama", "--port", str(PORT),
+                             "--first-token-delay", "0.05", "--token-delay", "0.005", "--tokens", "40"])
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            httpx.get(f"{URL}/api/tags", timeout=0.5)
+            break
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    return proc
+
+
+def connections() -> int:
+    return httpx.get(f"{URL}/stats").json()["connections"]
+
+
+async def run(llm, requests, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    ttfts, totals = [], []
+
+    async def one(i):
+        async with sem:
+            start = time.perf_counter()
+            first = None
+            async for _ in llm.astream(f"User: question {i}\n\nAssistant: "):
+                if first is None:
+                    first = time.perf_counter() - start
+            ttfts.append(first)
+            totals.append(time.perf_counter() - start)
+
+    before = connections()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return elapsed, sorted(ttfts), sorted(totals), connections() - before
+
+
+def report(name, requests, elapsed, ttfts, totals, conns):
+    pct = lambda xs, q: xs[min(len(xs) - 1, int(q / 100 * len(xs)))]
+    print(f"{name:9} {requests / elapsed:7.1f} req/s  ttft p50={pct(ttfts, 50) * 1e3:6.1f}ms "
+          f"p99={pct(ttfts, 99) * 1e3:6.1f}ms  total p50={pct(totals, 50) * 1e3:6.1f}ms "
+          f"p99={pct(totals, 99) * 1e3:6.1f}ms  connections={conns}")
+
+
+async def main_async(requests, concurrency):
+    await run(create_llm(URL), concurrency, concurrency)  # warm up
+    report("langchain", requests, *await run(create_llm(URL), requests, concurrency))
+
+    client = create_ollama_client()
+    await run(OllamaLLM(client, URL), concurrency, concurrency)  # fills the pool
+    report("native", requests, *await run(OllamaLLM(client, URL), requests, concurrency))
+    await client.aclose()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--concurrency", type=int, default=32)
+    args = ap.parse_args()
+
+    proc = start_server()
+    try:
+        asyncio.run(main_async(args.requests, args.concurrency))
+    finally:
+        proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# backend/scripts/bench_scheduler.py
+"""
+Overload benchmark for the admission scheduler, with a local stand-in LLM.
+
+    cd backend && python -m scripts.bench_scheduler --rate 3 --duration 60
+
+The stand-in behaves like one Ollama box: it serves `--parallel` requests at a time
+and queues the rest internally. Requests arrive open-loop at `--rate` per second,
+above its capacity. Without admission control everything piles up inside "Ollama"
+and latency grows for the whole run; with the scheduler, p99 of admitted requests
+stays bounded and the excess gets a fast 429.
+"""
+import argparse
+import asyncio
+import random
+import time
+import numpy as np
+from src.scheduler import Overloaded, RequestScheduler
+
+
+class StandInLLM:
+    def __init__(self, parallel: int, service_time: float):
+        self._slots = asyncio.Semaphore(parallel)
+        self.service_time = service_time
+
+    async def generate(self):
+        async with self._slots:
+            # +-30% jitter around the mean generation time
+            await asyncio.sleep(self.service_time * random.uniform(0.7, 1.3))
+
+
+async def run(mode, rate, duration, parallel, service_time, client_timeout, **scheduler_args):
+    random.seed(0)
+    llm = StandInLLM(parallel, service_time)
+    scheduler = RequestScheduler(max_in_flight=parallel, initial_service_time=service_time, **scheduler_args)
+    latencies, rejected, timed_out = [], 0, 0
+
+    async def one(i):
+        nonlocal rejected, timed_out
+        start = time.monotonic()
+        try:
+            if mode == "scheduler":
+                async with scheduler.slot(client_id=f"client-{i % 8}"):
+                    await asyncio.wait_for(llm.generate(), client_timeout)
+            else:
+                await asyncio.wait_for(llm.generate(), client_timeout)
+            latencies.append(time.monotonic() - start)
+        except Overloaded:
+            rejected += 1
+        except asyncio.TimeoutError:
+            timed_out += 1
+
+    tasks = []
+    start = time.monotonic()
+    i = 0
+    while time.monotonic() - start < duration:
+        tasks.append(asyncio.create_task(one(i)))
+        i += 1
+        await asyncio.sleep(random.expovariate(rate))
+    await asyncio.gather(*tasks)
+
+    lat = np.array(latencies) if latencies else np.array([0.0])
+    print(f"{mode:10} sent={i:5d} ok={len(latencies):5d} 429={rejected:5d} client-timeouts={timed_out:5d}  "
+          f"p50={np.percentile(lat, 50):6.1f}s p99={np.percentile(lat, 99):6.1f}s max={lat.max():6.1f}s")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rate", type=float, default=3.0, help="arrivals per second")
+    ap.add_argument("--duration", type=float, default=60.0, help="seconds of arrivals")
+    ap.add_argument("--parallel", type=int, default=2, help="stand-in LLM parallel slots")
+    ap.add_argument("--service-time", type=float, default=1.0, help="mean seconds per generation")
+    ap.add_argument("--client-timeout", type=float, default=180.0)
+    ap.add_argument("--max-queue-depth", type=int, default=32)
+    ap.add_argument("--max-queue-wait", type=float, default=10.0)
+    args = ap.parse_args()
+
+    capacity = args.parallel / args.service_time
+    print(f"capacity ~{capacity:.1f} req/s, offered {args.rate:.1f} req/s for {args.duration:.0f}s")
+    for mode in ("unbounded", "scheduler"):
+        asyncio.run(run(mode, args.rate, args.duration, args.parallel, args.service_time, args.client_timeout,
+                        max_queue_depth=args.max_queue_depth, max_queue_wait=args.max_queue_wait))
+
+
+if __name__ == "__main__":
+    main()
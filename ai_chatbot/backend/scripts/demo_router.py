@@ -0,0 +1,95 @@
+# backend/scripts/demo_router.py
+"""
+Exercise the router against several fake Ollama endpoints on local ports.
+
+    cd backend && python -m scripts.demo_router --requests 200 --concurrency 16
+
+Starts three stand-in servers: a fast one, a slow one and a flaky one that fails
+half of its requests. Prints how traffic was spread, how many requests needed a
+retry and whether the flaky endpoint got ejected.
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+import httpx
+from langchain_core.output_parsers import StrOutputParser
+from src.chains import create_ollama_client
+from src.prompts import prompt_template
+from src.router import OllamaRouter
+
+SERVERS = [
+    ("fast", 11501, ["--first-token-delay", "0.05", "--token-delay", "0.005"]),
+    ("slow", 11502, ["--first-token-delay", "0.4", "--token-delay", "0.02"]),
+    ("flaky", 11503, ["--first-token-delay", "0.05", "--token-delay", "0.005", "--fail-rate", "0.5"]),
+]
+
+
+def start_servers():
+    procs = []
+    for _, port, extra in SERVERS:
+        procs.append(subprocess.Popen([sys.executable, "-m", "scripts.fake_ollama", "--port", str(port), *extra]))
+    deadline = time.time() + 15
+    for _, port, _ in SERVERS:
+        while time.time() < deadline:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/api/tags", timeout=0.5)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+    return procs
+
+
+async def run(requests, concurrency, stream):
+    endpoints = [(f"http://127.0.0.1:{port}", 1.0) for _, port, _ in SERVERS]
+    client = create_ollama_client()
+    router = OllamaRouter(endpoints, client, failure_threshold=3, probe_interval=2.0)
+    chain = prompt_template | router | StrOutputParser()
+    router.start_probing()
+
+    sem = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def one(i):
+        nonlocal failed
+        async with sem:
+            inputs = {"user_input": f"question {i}", "context": ""}
+            try:
+                if stream:
+                    async for _ in chain.astream(inputs):
+                        pass
+                else:
+                    await chain.ainvoke(inputs)
+            except Exception:
+                failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    await router.stop_probing()
+    await client.aclose()
+
+    print(f"{requests} requests in {elapsed:.1f}s ({requests / elapsed:.1f} req/s), failed after retries: {failed}")
+    for (name, _, _), s in zip(SERVERS, router.stats()):
+        print(f"  {name:6} requests={s['requests']:4d} errors={s['errors']:3d} "
+              f"latency_ewma={s['latency_ewma']:.3f}s healthy={s['healthy']}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--stream", action="store_true")
+    args = ap.parse_args()
+
+    procs = start_servers()
+    try:
+        asyncio.run(run(args.requests, args.concurrency, args.stream))
+    finally:
+        for p in procs:
+            p.terminate()
+
+
+if __name__ == "__main__":
+    main()
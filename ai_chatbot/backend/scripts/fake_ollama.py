@@ -0,0 +1,150 @@
+# backend/scripts/fake_ollama.py
+"""
+Stand-in Ollama server for local tests and benchmarks. Speaks the parts of the
+Ollama API the backend uses (/api/generate, /api/embed, /api/tags, /api/ps).
+
+    python -m scripts.fake_ollama --port 11501 --first-token-delay 0.3 --token-delay 0.02
+    python -m scripts.fake_ollama --port 11502 --fail-rate 0.5      # flaky endpoint
+    python -m scripts.fake_ollama --port 11503 --slow-rate 0.1 --slow-delay 5   # heavy latency tail
+
+Run several on different ports to exercise the router.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import uvicorn
+
+app = FastAPI(title="Fake Ollama")
+config = {
+    "model": "llama3.2:3b",
+    "first_token_delay": 0.2,
+    "token_delay": 0.02,
+    "tokens": 40,
+    "fail_rate": 0.0,
+    "slow_rate": 0.0,    # fraction of requests whose first token takes slow_delay instead
+    "slow_delay": 5.0,
+    "prefill_delay": 0.0,  # seconds per prompt token evaluated (tokens passed as `context` are free)
+    "loaded": True,        # whether /api/ps lists the model
+}
+stats = {"requests": 0, "in_flight": 0, "cancelled": 0, "connections": 0}
+_peers = set()  # client (host, port) pairs seen: one per TCP connection
+
+
+def _answer_tokens(prompt: str, limit: int):
+    words = prompt.split()[-8:] or ["hello"]
+    tokens = ["This", " is", " a", " stand-in", " answer", " about"] + [f" {w}" for w in words]
+    while len(tokens) < limit:
+        tokens.append(f" token{len(tokens)}")
+    return tokens[:limit]
+
+
+def _embed(text: str, dim: int = 256):
+    """Hashed bag of words: texts sharing most words get close vectors."""
+    vec = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        vec[int(hashlib.md5(word.encode()).hexdigest(), 16) % dim] += 1.0
+    return vec
+
+
+@app.post("/api/embed")
+async def embed(body: dict):
+    inputs = body.get("input") or ""
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    await asyncio.sleep(0.005)
+    return {"model": body.get("model"), "embeddings": [_embed(t) for t in inputs]}
+
+
+@app.get("/api/tags")
+async def tags():
+    return {"models": [{"name": config["model"], "model": config["model"]}]}
+
+
+@app.get("/api/ps")
+async def ps():
+    if not config["loaded"]:
+        return {"models": []}
+    return {"models": [{"name": config["model"], "model": config["model"]}]}
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
+
+
+@app.post("/api/generate")
+async def generate(body: dict, request: Request):
+    stats["requests"] += 1
+    if request.client and (request.client.host, request.client.port) not in _peers:
+        _peers.add((request.client.host, request.client.port))
+        stats["connections"] += 1
+    if random.random() < config["fail_rate"]:
+        return JSONResponse(status_code=500, content={"error": "injected failure"})
+
+    options = body.get("options") or {}
+    # answers are `tokens` long; num_predict only caps them, like a model that hits EOS
+    limit = int(options.get("num_predict") or -1)
+    limit = config["tokens"] if limit < 0 else min(limit, config["tokens"])
+    prompt = body.get("prompt", "")
+    tokens = _answer_tokens(prompt, limit)
+    prompt_tokens = max(1, len(prompt) // 4)
+    prefill = prompt_tokens * config["prefill_delay"]
+    context = list(body.get("context") or []) + list(range(prompt_tokens + len(tokens)))
+
+    def final(start):
+        return {
+            "model": config["model"], "done": True, "response": "",
+            "context": context,
+            "prompt_eval_count": prompt_tokens, "eval_count": len(tokens),
+            "prompt_eval_duration": int(prefill * 1e9),
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+        }
+
+    if body.get("stream", True) is False:
+        start = time.perf_counter()
+        await asyncio.sleep(prefill + config["first_token_delay"] + config["token_delay"] * len(tokens))
+        return {**final(start), "response": "".join(tokens)}
+
+    async def lines():
+        start = time.perf_counter()
+        stats["in_flight"] += 1
+        slow = random.random() < config["slow_rate"]
+        try:
+            await asyncio.sleep(prefill + (config["slow_delay"] if slow else config["first_token_delay"]))
+            for tok in tokens:
+                yield json.dumps({"model": config["model"], "response": tok, "done": False}) + "\n"
+                await asyncio.sleep(config["token_delay"])
+            yield json.dumps(final(start)) + "\n"
+        except asyncio.CancelledError:
+            stats["cancelled"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=11434)
+    ap.add_argument("--model", default=config["model"])
+    ap.add_argument("--first-token-delay", type=float, default=config["first_token_delay"])
+    ap.add_argument("--token-delay", type=float, default=config["token_delay"])
+    ap.add_argument("--tokens", type=int, default=config["tokens"])
+    ap.add_argument("--fail-rate", type=float, default=0.0)
+    ap.add_argument("--slow-rate", type=float, default=0.0)
+    ap.add_argument("--slow-delay", type=float, default=config["slow_delay"])
+    ap.add_argument("--prefill-delay", type=float, default=0.0)
+    ap.add_argument("--not-loaded", action="store_true", help="report the model as not loaded in /api/ps")
+    args = ap.parse_args()
+    config.update(model=args.model, first_token_delay=args.first_token_delay, token_delay=args.token_delay,
+                  tokens=args.tokens, fail_rate=args.fail_rate, slow_rate=args.slow_rate,
+                  slow_delay=args.slow_delay, prefill_delay=args.prefill_delay,
+                  loaded=not args.not_loaded)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
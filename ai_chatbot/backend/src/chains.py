@@ -1,19 +1,85 @@
 # backend/src/chains.py
 from langchain_community.llms import Ollama
 from langchain_core.output_parsers import StrOutputParser
-from .prompts import prompt_template
+from .prompts import prompt_template, summary_prompt
 from .config import settings
+from .documents import DocumentStore
+from .ollama_client import OllamaClient
+from .response_cache import ResponseCache
+from .router import OllamaRouter, parse_endpoints
 import os
 
 # Disable LangSmith
 os.environ["LANGCHAIN_TRACING_V2"] = "false"
 
-def create_chat_chain():
-    llm = Ollama(
-        model=settings.MODEL_NAME.split('/')[-1],  # "llama3.2:1b"
-        base_url=settings.OLLAMA_BASE_URL,
-        temperature=0.7
+MODEL = settings.MODEL_NAME.split('/')[-1]
+TEMPERATURE = 0.7
+
+def create_llm(base_url: str = None):
+    """Legacy LangChain wrapper (OLLAMA_CLIENT=langchain): opens a new HTTP session per request."""
+    return Ollama(
+        model=MODEL,  # "llama3.2:1b"
+        base_url=base_url or settings.OLLAMA_BASE_URL,
+        temperature=TEMPERATURE,
+        keep_alive=settings.OLLAMA_KEEP_ALIVE,
+        num_predict=settings.OLLAMA_NUM_PREDICT,
+        stop=settings.OLLAMA_STOP or None,
+        timeout=int(settings.OLLAMA_READ_TIMEOUT)
         # streaming=True REMOVED — not allowed in 0.3.1
     )
-    chain = prompt_template | llm | StrOutputParser()
-    return chain
\ No newline at end of file
+
+def create_ollama_client():
+    """Create inside a running app (startup hook): the pool belongs to that event loop."""
+    return OllamaClient(
+        model=MODEL,
+        temperature=TEMPERATURE,
+        keep_alive=settings.OLLAMA_KEEP_ALIVE,
+        num_predict=settings.OLLAMA_NUM_PREDICT,
+        stop=settings.OLLAMA_STOP,
+        connect_timeout=settings.OLLAMA_CONNECT_TIMEOUT,
+        read_timeout=settings.OLLAMA_READ_TIMEOUT,
+        max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+    )
+
+def create_router(client: OllamaClient):
+    """One router over OLLAMA_ENDPOINTS (falls back to OLLAMA_BASE_URL alone)."""
+    return OllamaRouter(
+        parse_endpoints(settings.OLLAMA_ENDPOINTS or settings.OLLAMA_BASE_URL),
+        client,
+        make_llm=create_llm if settings.OLLAMA_CLIENT == "langchain" else None,
+        failure_threshold=settings.ROUTER_FAILURE_THRESHOLD,
+        probe_interval=settings.ROUTER_PROBE_INTERVAL,
+        max_attempts=settings.ROUTER_MAX_ATTEMPTS,
+    )
+
+def create_chat_chain(router: OllamaRouter):
+    chain = prompt_template | router | StrOutputParser()
+    return chain
+
+def create_summary_chain(router: OllamaRouter):
+    return summary_prompt | router | StrOutputParser()
+
+def create_response_cache(router: OllamaRouter):
+    """Exact tier always; semantic tier when CACHE_EMBED_MODEL is set (embedded by Ollama)."""
+    embed = None
+    if settings.CACHE_EMBED_MODEL:
+        async def embed(texts):
+            return await router.aembed(texts, settings.CACHE_EMBED_MODEL)
+    return ResponseCache(
+        embed=embed,
+        threshold=settings.CACHE_SIMILARITY,
+        ttl=settings.CACHE_TTL,
+        max_entries=settings.CACHE_MAX_ENTRIES,
+    )
+
+def create_document_store(router: OllamaRouter):
+    async def embed(texts):
+        return await router.aembed(texts, settings.DOCS_EMBED_MODEL)
+    return DocumentStore(
+        settings.DOCS_DIRECTORY,
+        embed=embed,
+        chunk_tokens=settings.DOCS_CHUNK_TOKENS,
+        context_tokens=settings.DOCS_CONTEXT_TOKENS,
+        max_documents=settings.DOCS_MAX_DOCUMENTS,
+        max_bytes=int(settings.DOCS_MAX_MB * 1024 * 1024),
+    )
@@ -1,4 +1,5 @@
 # backend/src/config.py
+import codecs
 import os
 from dotenv import load_dotenv
 
@@ -9,5 +10,60 @@ class Settings:
     MODEL_NAME = "ollama/llama3.2:3b"  # ← YOUR MODEL
     OLLAMA_BASE_URL = "http://localhost:11434"
 
+    # Ollama client: "native" = pooled async client (src/ollama_client.py), "langchain" = legacy wrapper
+    OLLAMA_CLIENT = os.getenv("OLLAMA_CLIENT", "native")
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")        # how long the model stays loaded
+    OLLAMA_CONNECT_TIMEOUT = float(os.getenv("OLLAMA_CONNECT_TIMEOUT", "5"))
+    OLLAMA_READ_TIMEOUT = float(os.getenv("OLLAMA_READ_TIMEOUT", "180"))  # max gap between chunks (model load)
+    OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "64"))
+    # Cap on generated tokens, e.g. 512; unset = the model's own default
+    OLLAMA_NUM_PREDICT = int(os.getenv("OLLAMA_NUM_PREDICT")) if os.getenv("OLLAMA_NUM_PREDICT") else None
+    # Stop sequences, comma separated, backslash escapes allowed: "\nUser:,\n\n\n"; unset = none
+    OLLAMA_STOP = [codecs.decode(s, "unicode_escape") for s in os.getenv("OLLAMA_STOP", "").split(",") if s]
+    OLLAMA_DRAIN_TIMEOUT = float(os.getenv("OLLAMA_DRAIN_TIMEOUT", "30"))  # on shutdown
+
+    # Several inference boxes: "http://gpu1:11434|2,http://gpu2:11434|1" (url|weight)
+    OLLAMA_ENDPOINTS = os.getenv("OLLAMA_ENDPOINTS", "")
+    ROUTER_FAILURE_THRESHOLD = int(os.getenv("ROUTER_FAILURE_THRESHOLD", "3"))
+    ROUTER_PROBE_INTERVAL = float(os.getenv("ROUTER_PROBE_INTERVAL", "10"))
+    ROUTER_MAX_ATTEMPTS = int(os.getenv("ROUTER_MAX_ATTEMPTS", "2"))
+
+    # Admission control (see src/scheduler.py)
+    MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "2"))          # match OLLAMA_NUM_PARALLEL
+    MAX_QUEUE_DEPTH = int(os.getenv("MAX_QUEUE_DEPTH", "32"))
+    MAX_QUEUE_WAIT = float(os.getenv("MAX_QUEUE_WAIT", "30"))     # seconds
+
+    # Conversation memory (see src/memory.py)
+    MEMORY_MAX_TOKENS = int(os.getenv("MEMORY_MAX_TOKENS", "1500"))          # history budget per prompt
+    MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "300"))
+    MEMORY_MAX_CONVERSATIONS = int(os.getenv("MEMORY_MAX_CONVERSATIONS", "1000"))
+    MEMORY_TTL = float(os.getenv("MEMORY_TTL", "21600"))                     # seconds idle
+    # Reuse Ollama's returned `context` so follow-ups skip prefill of the shared prefix
+    MEMORY_REUSE_OLLAMA_CONTEXT = os.getenv("MEMORY_REUSE_OLLAMA_CONTEXT", "false").lower() == "true"
+    MEMORY_STATE_MAX_TOKENS = int(os.getenv("MEMORY_STATE_MAX_TOKENS", "3000"))  # keep below num_ctx
+
+    # Response cache (see src/response_cache.py); send "X-Cache-Bypass: true" to skip it.
+    # Opt-in: a hit replays an answer sampled at TEMPERATURE instead of generating a new one
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "false").lower() == "true"
+    CACHE_TTL = float(os.getenv("CACHE_TTL", "3600"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+    # Semantic tier, e.g. "nomic-embed-text" (ollama pull it first); "" = exact tier only
+    CACHE_EMBED_MODEL = os.getenv("CACHE_EMBED_MODEL", "")
+    CACHE_SIMILARITY = float(os.getenv("CACHE_SIMILARITY", "0.92"))
+
+    # Document store (see src/documents.py)
+    DOCS_DIRECTORY = os.getenv("DOCS_DIRECTORY", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "documents"))
+    DOCS_EMBED_MODEL = os.getenv("DOCS_EMBED_MODEL", "nomic-embed-text")
+    DOCS_CHUNK_TOKENS = int(os.getenv("DOCS_CHUNK_TOKENS", "200"))
+    DOCS_CONTEXT_TOKENS = int(os.getenv("DOCS_CONTEXT_TOKENS", "1000"))   # retrieved text per question
+    DOCS_MAX_DOCUMENTS = int(os.getenv("DOCS_MAX_DOCUMENTS", "500"))
+    DOCS_MAX_MB = float(os.getenv("DOCS_MAX_MB", "200"))
+
+    # /ready: by default the model only has to be pulled; "true" also requires it loaded (/api/ps).
+    # Ollama unloads an idle model after OLLAMA_KEEP_ALIVE, so with "true" a readiness probe would
+    # take the pod out of rotation until something else reloads it
+    READY_REQUIRE_LOADED = os.getenv("READY_REQUIRE_LOADED", "false").lower() == "true"
+    READY_CACHE_SECONDS = float(os.getenv("READY_CACHE_SECONDS", "2"))
+
 settings = Settings()
 
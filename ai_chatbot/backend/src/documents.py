@@ -0,0 +1,205 @@
+# backend/src/documents.py
+"""
+Server-side document store, so clients upload reference text once and then send
+only document IDs with their questions.
+
+- documents are split into overlapping chunks and embedded (Ollama /api/embed)
+- a question retrieves the most similar chunks of the referenced documents,
+  best first, until `context_tokens` is used up
+- each document is one .npz (vectors + chunks) under `directory`, plus an
+  index.json with titles, sizes and last use, so the store survives restarts
+- beyond `max_documents` or `max_bytes` the least recently used documents go;
+  a single document larger than `max_bytes` is rejected (DocumentTooLarge)
+- file I/O and the similarity math run in worker threads
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+import numpy as np
+from .memory import count_tokens
+
+logger = logging.getLogger("chatbot.documents")
+
+
+class DocumentTooLarge(Exception):
+    pass
+
+
+def chunk_text(text: str, chunk_tokens: int = 200, overlap_tokens: int = 40) -> List[str]:
+    """Split into ~chunk_tokens pieces, cutting at a sentence end if possible, else between words."""
+    size, overlap = chunk_tokens * 4, overlap_tokens * 4  # ~4 characters per token
+    text = " ".join(text.split())
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            cut = text.rfind(". ", start, end)
+            if cut <= start + size // 2:
+                cut = text.rfind(" ", start, end)
+            if cut > start + size // 2:
+                end = cut + 1
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        space = text.find(" ", start, end)
+        start = space + 1 if space != -1 else start  # don't start mid-word
+    return [c for c in chunks if c]
+
+
+class DocumentStore:
+    def __init__(self, directory: str, embed: Callable[[List[str]], Awaitable[List[List[float]]]],
+                 chunk_tokens: int = 200, overlap_tokens: int = 40, context_tokens: int = 1000,
+                 max_documents: int = 500, max_bytes: int = 200 * 1024 * 1024):
+        self.directory = directory
+        self.embed = embed
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.context_tokens = context_tokens
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, dict]" = OrderedDict()   # id -> metadata, least recently used first
+        self._loaded: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (vectors, chunks) kept in memory
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    # ---------- persistence ----------
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.directory, "index.json")
+
+    def _path(self, doc_id: str) -> str:
+        return os.path.join(self.directory, f"{doc_id}.npz")
+
+    def _load_index(self):
+        if os.path.exists(self._index_path):
+            with open(self._index_path, encoding="utf-8") as f:
+                entries = json.load(f)
+            for meta in sorted(entries, key=lambda m: m["last_used"]):
+                if os.path.exists(self._path(meta["id"])):
+                    self._index[meta["id"]] = meta
+
+    def _save_index(self):
+        tmp = self._index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(list(self._index.values()), f)
+        os.replace(tmp, self._index_path)
+
+    def _write(self, doc_id: str, vectors: np.ndarray, chunks: List[str]):
+        np.savez(self._path(doc_id), vectors=vectors, chunks=np.array(chunks))
+        self._save_index()
+
+    def _read(self, doc_id: str):
+        with np.load(self._path(doc_id)) as data:
+            return data["vectors"], [str(c) for c in data["chunks"]]
+
+    async def _vectors(self, doc_id: str):
+        if doc_id not in self._loaded:
+            self._loaded[doc_id] = await asyncio.to_thread(self._read, doc_id)
+            while len(self._loaded) > 64:  # bound memory; the rest stays on disk
+                self._loaded.popitem(last=False)
+        self._loaded.move_to_end(doc_id)
+        return self._loaded[doc_id]
+
+    # ---------- API ----------
+
+    def _check_size(self, size: int):
+        # otherwise _evict() would drop the new document right away and its id would 404
+        if size > self.max_bytes:
+            raise DocumentTooLarge(f"Document needs {size} bytes, the store holds at most {self.max_bytes}")
+
+    async def add(self, text: str, title: str = "") -> dict:
+        text_bytes = len(text.encode())
+        self._check_size(text_bytes)  # before paying for the embeddings
+        chunks = chunk_text(text, self.chunk_tokens, self.overlap_tokens)
+        if not chunks:
+            raise ValueError("Document is empty")
+        vectors = np.asarray(await self.embed(chunks), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        self._check_size(text_bytes + vectors.nbytes)
+        doc_id = uuid.uuid4().hex[:16]
+        meta = {
+            "id": doc_id, "title": title, "chunks": len(chunks),
+            "bytes": text_bytes + vectors.nbytes, "created": time.time(), "last_used": time.time(),
+        }
+        self._index[doc_id] = meta
+        self._loaded[doc_id] = (vectors, chunks)
+        await asyncio.to_thread(self._write, doc_id, vectors, chunks)
+        await self._evict()
+        return meta
+
+    async def delete(self, doc_id: str) -> bool:
+        if self._index.pop(doc_id, None) is None:
+            return False
+        self._loaded.pop(doc_id, None)
+        await asyncio.to_thread(self._remove_file, doc_id)
+        return True
+
+    def _remove_file(self, doc_id: str):
+        if os.path.exists(self._path(doc_id)):
+            os.remove(self._path(doc_id))
+        self._save_index()
+
+    async def _evict(self):
+        total = sum(m["bytes"] for m in self._index.values())
+        while self._index and (len(self._index) > self.max_documents or total > self.max_bytes):
+            doc_id, meta = next(iter(self._index.items()))
+            total -= meta["bytes"]
+            await self.delete(doc_id)
+            self.evictions += 1
+            logger.info("evicted document %s (%s)", doc_id, meta["title"])
+
+    def missing(self, doc_ids: List[str]) -> List[str]:
+        return [d for d in doc_ids if d not in self._index]
+
+    async def retrieve(self, query: str, doc_ids: List[str], budget: Optional[int] = None) -> str:
+        """Most relevant chunks of `doc_ids` for `query`, best first, within `budget` tokens."""
+        budget = budget or self.context_tokens
+        doc_ids = [d for d in doc_ids if d in self._index]  # may have been evicted meanwhile
+        docs = [(d, *await self._vectors(d)) for d in doc_ids]
+        for d in doc_ids:
+            self._index.move_to_end(d)
+            self._index[d]["last_used"] = time.time()
+        query_vec = np.asarray((await self.embed([query]))[0], dtype=np.float32)
+        query_vec /= max(float(np.linalg.norm(query_vec)), 1e-12)
+
+        def rank():
+            scored = []
+            for doc_id, vectors, chunks in docs:
+                for i, score in enumerate(vectors @ query_vec):
+                    scored.append((float(score), doc_id, i, chunks[i]))
+            return sorted(scored, key=lambda s: -s[0])
+
+        picked, used = [], 0
+        for score, doc_id, i, chunk in await asyncio.to_thread(rank):
+            cost = count_tokens(chunk)
+            if used + cost > budget:
+                continue
+            picked.append((doc_id, i, chunk))
+            used += cost
+        # keep document order inside the prompt so adjacent chunks read naturally
+        picked.sort(key=lambda p: (doc_ids.index(p[0]), p[1]))
+        return "\n\n".join(chunk for _, _, chunk in picked)
+
+    def list(self) -> List[dict]:
+        return list(reversed(self._index.values()))
+
+    async def flush(self):
+        """Persist last-use times (called on shutdown)."""
+        await asyncio.to_thread(self._save_index)
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self._index),
+            "bytes": sum(m["bytes"] for m in self._index.values()),
+            "max_documents": self.max_documents,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
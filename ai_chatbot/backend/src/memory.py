@@ -0,0 +1,146 @@
+# backend/src/memory.py
+"""
+Server-side conversation memory keyed by conversation ID.
+
+- the prompt context is packed into a fixed token budget: the rolling summary of
+  older turns first, then the most recent turns verbatim, newest first, as many
+  as fit
+- turns that no longer fit are folded into the summary in the background, so the
+  summary absorbs history instead of the prompt growing with it
+- optionally the `context` state returned by Ollama is kept per conversation, so a
+  follow-up turn only sends the new message and Ollama reuses the shared prefix;
+  once that state outgrows `state_max_tokens` the next turn starts over from the
+  packed summary + recent turns
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger("chatbot.memory")
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def format_turn(user: str, assistant: str) -> str:
+    return f"User: {user}\nAssistant: {assistant}"
+
+
+class Conversation:
+    def __init__(self, conversation_id: str):
+        self.id = conversation_id
+        self.turns: List[tuple] = []     # (user, assistant)
+        self.summary = ""
+        self.summarized = 0              # turns[:summarized] are covered by the summary
+        self.ollama_context: Optional[List[int]] = None
+        self.endpoint: Optional[str] = None  # where ollama_context lives in the KV cache
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()       # turns of one conversation run one at a time
+        self.compacting = False
+
+
+class ConversationMemory:
+    def __init__(self, max_tokens: int = 1500, summary_tokens: int = 300,
+                 state_max_tokens: int = 3000, max_conversations: int = 1000, ttl: float = 6 * 3600):
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.state_max_tokens = state_max_tokens
+        self.max_conversations = max_conversations
+        self.ttl = ttl
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.summaries = 0
+
+    def get(self, conversation_id: str) -> Conversation:
+        self._expire()
+        convo = self._conversations.get(conversation_id)
+        if convo is None:
+            convo = self._conversations[conversation_id] = Conversation(conversation_id)
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+        self._conversations.move_to_end(conversation_id)
+        convo.updated_at = time.monotonic()
+        return convo
+
+    def delete(self, conversation_id: str) -> bool:
+        return self._conversations.pop(conversation_id, None) is not None
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._conversations:
+            oldest = next(iter(self._conversations.values()))
+            if oldest.updated_at >= cutoff:
+                break
+            self._conversations.popitem(last=False)
+
+    # ---------- packing ----------
+
+    def _window(self, convo: Conversation, budget: int) -> int:
+        """Index of the oldest turn that still fits verbatim after the summary."""
+        used = count_tokens(convo.summary)
+        start = len(convo.turns)
+        while start > convo.summarized:
+            cost = count_tokens(format_turn(*convo.turns[start - 1]))
+            if used + cost > budget:
+                break
+            used += cost
+            start -= 1
+        return start
+
+    def pack(self, convo: Conversation, extra: str = "") -> str:
+        """History for the prompt's {context}: summary, then recent turns, within max_tokens."""
+        budget = self.max_tokens - count_tokens(extra)
+        start = self._window(convo, budget)
+        parts = []
+        if extra:
+            parts.append(extra)
+        if convo.summary:
+            parts.append(f"Summary of the earlier conversation: {convo.summary}")
+        parts.extend(format_turn(u, a) for u, a in convo.turns[start:])
+        return "\n\n".join(parts)
+
+    def can_extend(self, convo: Conversation, user_input: str) -> bool:
+        """Whether the next turn can build on the stored Ollama context state."""
+        return bool(convo.ollama_context) and \
+            len(convo.ollama_context) + count_tokens(user_input) <= self.state_max_tokens
+
+    def record(self, convo: Conversation, user_input: str, answer: str,
+               ollama_context: Optional[List[int]] = None, endpoint: Optional[str] = None):
+        convo.turns.append((user_input, answer))
+        convo.ollama_context = ollama_context
+        convo.endpoint = endpoint
+        convo.updated_at = time.monotonic()
+
+    # ---------- rolling summary ----------
+
+    def needs_compaction(self, convo: Conversation) -> bool:
+        return self._window(convo, self.max_tokens) > convo.summarized
+
+    async def compact(self, convo: Conversation, summarize: Callable[[str, str], Awaitable[str]]):
+        """Fold older turns into the summary, down to half the budget, so this runs every few turns."""
+        if convo.compacting or not self.needs_compaction(convo):
+            return
+        convo.compacting = True
+        try:
+            end = self._window(convo, self.max_tokens // 2)
+            lines = "\n".join(format_turn(u, a) for u, a in convo.turns[convo.summarized:end])
+            summary = (await summarize(convo.summary, lines)).strip()
+            # keep the summary inside its own budget whatever the model returned
+            convo.summary = summary[: self.summary_tokens * 4]
+            convo.summarized = end
+            self.summaries += 1
+        except Exception as e:
+            # the turns just stay out of the prompt until the next attempt
+            logger.warning("summarizing conversation %s failed: %s", convo.id, e)
+        finally:
+            convo.compacting = False
+
+    def stats(self) -> dict:
+        return {
+            "conversations": len(self._conversations),
+            "max_conversations": self.max_conversations,
+            "summaries": self.summaries,
+        }
@@ -0,0 +1,121 @@
+# backend/src/metrics.py
+"""
+Minimal Prometheus metrics (text exposition format 0.0.4), no client library.
+
+Updates are a dict lookup plus a few additions on the event loop thread, so
+no locking is needed; see scripts/bench_metrics.py for the measured cost.
+"""
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200)
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge:
+    """Read at scrape time from a callback returning {label values: value}.
+    kind="counter" for running totals that are kept elsewhere (e.g. cache hits)."""
+
+    def __init__(self, name: str, help: str, read: Callable[[], Dict[Tuple[str, ...], float]],
+                 labels: Sequence[str] = (), kind: str = "gauge"):
+        self.name, self.help, self.label_names, self.read = name, help, tuple(labels), read
+        self.kind = kind
+
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in self.read().items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS,
+                 labels: Sequence[str] = ()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        i = bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            series[i] += 1  # per-bucket here, made cumulative when rendered
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, series in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _labels(self.label_names, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self) -> str:
+        lines = []
+        for m in self.metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            lines.extend(m.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.counter("chatbot_requests_total", "Chat requests", labels=("endpoint", "cache"))
+ERRORS = registry.counter("chatbot_errors_total", "Errors by type", labels=("type",))
+STAGE_SECONDS = registry.histogram(
+    "chatbot_stage_seconds",
+    "Time per stage: retrieval (document chunks), queue (waiting for a slot), prompt (building it), "
+    "llm_ttft, llm_total",
+    labels=("stage",),
+)
+REQUEST_SECONDS = registry.histogram("chatbot_request_seconds", "End-to-end request time", labels=("endpoint",))
+TOKENS_PER_SECOND = registry.histogram("chatbot_tokens_per_second", "Generation speed after the first token",
+                                       buckets=RATE_BUCKETS)
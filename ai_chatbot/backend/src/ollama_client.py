@@ -0,0 +1,195 @@
+# backend/src/ollama_client.py
+"""
+Async Ollama client on one shared httpx connection pool.
+
+- connections to every endpoint are reused (keep-alive) instead of a new
+  session per request as in langchain_community's Ollama
+- separate connect / read timeouts; read is the longest gap between chunks
+- model `keep_alive` on every request, plus a `num_predict` cap and stop
+  sequences when configured
+- `aclose()` waits for in-flight requests to finish before closing the pool
+- a stream is read by its own task, which only the stream's consumer cancels:
+  a client disconnect cancels the request's whole anyio scope (LangChain's
+  per-chunk tasks included) over and over, which would also cancel httpx's
+  cleanup and leave the connection checked out while Ollama keeps generating.
+  Callers close token streams with `close_upstream`, shielded for the same reason
+
+OllamaLLM is the Runnable for one endpoint, so chains and the router can use it
+in place of the LangChain wrapper.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, List, Optional, Sequence
+import anyio
+import httpx
+from langchain_core.runnables import Runnable, RunnableConfig
+
+logger = logging.getLogger("chatbot.ollama")
+
+CLOSE_TIMEOUT = 5.0
+
+
+async def close_upstream(stream, timeout: float = CLOSE_TIMEOUT):
+    """
+    aclose() a token stream even while the caller is being cancelled. A disconnect
+    cancels the whole anyio scope, so an unshielded await in a finally block is
+    cancelled too and the Ollama request is never closed.
+    """
+    with anyio.move_on_after(timeout, shield=True):
+        await stream.aclose()
+
+
+class OllamaClient:
+    def __init__(self, model: str, temperature: float = 0.7, keep_alive: str = "30m",
+                 num_predict: Optional[int] = None, stop: Sequence[str] = (),
+                 connect_timeout: float = 5.0, read_timeout: float = 120.0,
+                 max_connections: int = 64, max_keepalive: int = 32):
+        self.model = model
+        self.temperature = temperature
+        self.keep_alive = keep_alive
+        self.num_predict = num_predict
+        self.stop = list(stop)
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closing = False
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+        )
+
+    def payload(self, prompt: str, context: Optional[List[int]] = None, **options: Any) -> dict:
+        """Body for /api/generate; `context` is the state Ollama returned for the previous turn."""
+        body = {
+            "model": self.model,
+            "prompt": prompt,
+            "keep_alive": self.keep_alive,
+            "options": {"temperature": self.temperature, **options},
+        }
+        if self.num_predict is not None:
+            body["options"].setdefault("num_predict", self.num_predict)
+        if self.stop:
+            body["options"]["stop"] = self.stop
+        if context:
+            body["context"] = context
+        return body
+
+    def _enter(self):
+        if self._closing:
+            raise RuntimeError("Ollama client is shutting down")
+        self.in_flight += 1
+        self._idle.clear()
+
+    def _exit(self):
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    async def _read(self, base_url: str, payload: dict, chunks: asyncio.Queue):
+        """
+        Put each chunk on `chunks`, then None, or the exception that ended the stream.
+        Counted as in flight until the connection is closed, however the consumer ended.
+        """
+        try:
+            async with self._http.stream("POST", f"{base_url}/api/generate", json={**payload, "stream": True}) as resp:
+                resp.raise_for_status()
+                buffer = b""
+                # NDJSON split by hand: cheaper per chunk than aiter_lines' text decoding
+                async for data in resp.aiter_bytes():
+                    buffer += data
+                    *lines, buffer = buffer.split(b"\n")
+                    for line in lines:
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise RuntimeError(chunk["error"])
+                        chunks.put_nowait(chunk)
+        except Exception as e:
+            chunks.put_nowait(e)
+        else:
+            chunks.put_nowait(None)
+        finally:
+            self._exit()
+
+    async def stream(self, base_url: str, payload: dict) -> AsyncIterator[dict]:
+        """Chunks of a streamed /api/generate call."""
+        self._enter()
+        chunks: asyncio.Queue = asyncio.Queue()
+        reader = asyncio.get_running_loop().create_task(self._read(base_url, payload, chunks))
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    return
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            if not reader.done():
+                # one cancel: httpx closes the connection, and Ollama stops generating
+                reader.cancel()
+                with anyio.move_on_after(CLOSE_TIMEOUT, shield=True):
+                    await asyncio.wait([reader])
+
+    async def generate(self, base_url: str, payload: dict) -> dict:
+        self._enter()
+        try:
+            resp = await self._http.post(f"{base_url}/api/generate", json={**payload, "stream": False})
+            resp.raise_for_status()
+            return resp.json()
+        finally:
+            self._exit()
+
+    async def embed(self, base_url: str, model: str, texts: List[str]) -> List[List[float]]:
+        self._enter()
+        try:
+            resp = await self._http.post(f"{base_url}/api/embed", json={"model": model, "input": texts}, timeout=10.0)
+            resp.raise_for_status()
+            return resp.json()["embeddings"]
+        finally:
+            self._exit()
+
+    async def get(self, base_url: str, path: str, timeout: float = 2.0) -> httpx.Response:
+        """Health/readiness calls; not counted as in-flight work."""
+        return await self._http.get(f"{base_url}{path}", timeout=timeout)
+
+    async def aclose(self, drain_timeout: float = 30.0):
+        """Refuse new requests, wait up to `drain_timeout` for in-flight ones, then close the pool."""
+        self._closing = True
+        if self.in_flight:
+            logger.info("draining %d in-flight Ollama requests", self.in_flight)
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning("closing with %d Ollama requests still in flight", self.in_flight)
+        await self._http.aclose()
+
+
+class OllamaLLM(Runnable):
+    """Prompt -> text for one endpoint, through the shared client."""
+
+    def __init__(self, client: OllamaClient, base_url: str):
+        self.client = client
+        self.base_url = base_url
+
+    @staticmethod
+    def _prompt(input: Any) -> str:
+        return input.to_string() if hasattr(input, "to_string") else str(input)
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[str]:
+        async for chunk in self.client.stream(self.base_url, self.client.payload(self._prompt(input), **kwargs)):
+            if chunk.get("response"):
+                yield chunk["response"]
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> str:
+        result = await self.client.generate(self.base_url, self.client.payload(self._prompt(input), **kwargs))
+        return result.get("response", "")
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> str:
+        # Sync callers (scripts) only; the server stays on the async path
+        payload = {**self.client.payload(self._prompt(input), **kwargs), "stream": False}
+        resp = httpx.post(f"{self.base_url}/api/generate", json=payload, timeout=self.client._http.timeout)
+        resp.raise_for_status()
+        return resp.json().get("response", "")
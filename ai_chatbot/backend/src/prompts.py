@@ -9,4 +9,23 @@ Context: {context}
 User: {user_input}
 
 Assistant: """
-)
\ No newline at end of file
+)
+
+# Follow-up turn when Ollama's context state already holds the conversation
+followup_template = PromptTemplate.from_template(
+    """User: {user_input}
+
+Assistant: """
+)
+
+summary_prompt = PromptTemplate.from_template(
+    """Update the summary of a conversation between a user and an AI assistant.
+Keep names, facts, decisions and open questions. Answer with the summary only, at most {max_words} words.
+
+Current summary: {summary}
+
+New lines:
+{lines}
+
+Updated summary: """
+)
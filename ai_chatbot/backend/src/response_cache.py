@@ -0,0 +1,212 @@
+# backend/src/response_cache.py
+"""
+Two-tier response cache in front of the LLM.
+
+- exact tier: key = normalized input + context hash + model + temperature
+- semantic tier: cosine similarity of input embeddings, only between entries with
+  the same context, model and temperature, accepted above `threshold`
+- entries expire after `ttl` seconds; beyond `max_entries` the least recently
+  used go first
+- the exact tier is a dict lookup; embedding is an async HTTP call and the
+  similarity scan runs in a worker thread, so lookups never block the event loop
+- semantic vectors live in one growing matrix: a write appends a row, a removal
+  only marks its row dead, and a compaction drops dead rows once they are half of it
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+import numpy as np
+
+logger = logging.getLogger("chatbot.cache")
+
+# Returned by lookup() in place of a vector when embedding failed, so store() does not try again
+EMBED_FAILED = object()
+
+
+def normalize(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return text.strip(" ?!.")
+
+
+class Entry:
+    def __init__(self, response: str, scope: str, gen_time: float):
+        self.response = response
+        self.scope = scope
+        self.row: Optional[int] = None  # row in the semantic matrix, if embedded
+        self.gen_time = gen_time   # what a hit saves
+        self.created = time.monotonic()
+
+
+class ResponseCache:
+    def __init__(self, embed: Optional[Callable[[List[str]], Awaitable[List[List[float]]]]] = None,
+                 threshold: float = 0.92, ttl: float = 3600, max_entries: int = 5000):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        # Semantic tier: rows [0, len(_row_keys)) of _vectors are in use; a dead row has key None
+        # and scope id -1. Arrays are replaced, never rewritten, when they grow or are compacted,
+        # so a scan running in a worker thread keeps a consistent view.
+        self._vectors: Optional[np.ndarray] = None
+        self._row_scopes = np.zeros(0, dtype=np.int64)
+        self._row_keys: List[Optional[str]] = []
+        self._scope_ids = {}
+        self._dead_rows = 0
+        self.hits_exact = self.hits_semantic = self.misses = self.bypassed = 0
+        self.evictions = self.embed_errors = 0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def scope(context: str, model: str, temperature: float) -> str:
+        context_hash = hashlib.sha1(context.encode()).hexdigest()[:16]
+        return f"{model}|{temperature}|{context_hash}"
+
+    def _key(self, user_input: str, scope: str) -> str:
+        return f"{scope}|{normalize(user_input)}"
+
+    async def _vector(self, user_input: str) -> Optional[np.ndarray]:
+        if self.embed is None:
+            return None
+        try:
+            vector = np.asarray((await self.embed([normalize(user_input)]))[0], dtype=np.float32)
+        except Exception as e:
+            self.embed_errors += 1
+            logger.warning("embedding failed, exact tier only: %s", e)
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _alive(self, key: str, entry: Entry) -> bool:
+        if time.monotonic() - entry.created <= self.ttl:
+            return True
+        self._remove(key)
+        return False
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        if entry.row is not None:
+            self._row_keys[entry.row] = None
+            self._row_scopes[entry.row] = -1
+            self._dead_rows += 1
+
+    def _append(self, entry: Entry, key: str, vector: np.ndarray):
+        rows = len(self._row_keys)
+        if self._vectors is None or rows == len(self._vectors):
+            if self._dead_rows * 2 >= rows > 0:
+                self._compact()
+                rows = len(self._row_keys)
+            if self._vectors is None or rows == len(self._vectors):
+                self._resize(max(64, rows * 2), len(vector))
+        self._vectors[rows] = vector
+        self._row_scopes[rows] = self._scope_ids.setdefault(entry.scope, len(self._scope_ids))
+        self._row_keys.append(key)
+        entry.row = rows
+
+    def _resize(self, capacity: int, dim: int):
+        vectors = np.empty((capacity, dim), dtype=np.float32)
+        scopes = np.full(capacity, -1, dtype=np.int64)
+        rows = len(self._row_keys)
+        if rows:
+            vectors[:rows] = self._vectors[:rows]
+            scopes[:rows] = self._row_scopes[:rows]
+        self._vectors, self._row_scopes = vectors, scopes
+
+    def _compact(self):
+        """Drop dead rows (O(live rows)); runs once they are half of the matrix."""
+        live = [(key, entry) for key, entry in self._entries.items() if entry.row is not None]
+        old_rows = np.array([entry.row for _, entry in live], dtype=np.int64)
+        capacity = max(64, len(live) * 2)
+        vectors = np.empty((capacity, self._vectors.shape[1]), dtype=np.float32)
+        vectors[:len(live)] = self._vectors[old_rows]
+        scopes = np.full(capacity, -1, dtype=np.int64)
+        self._scope_ids = {}
+        for row, (key, entry) in enumerate(live):
+            scopes[row] = self._scope_ids.setdefault(entry.scope, len(self._scope_ids))
+            entry.row = row
+        self._vectors, self._row_scopes = vectors, scopes
+        self._row_keys = [key for key, _ in live]
+        self._dead_rows = 0
+
+    @staticmethod
+    def _nearest(index, vector: np.ndarray, scope_id: int):
+        """Best (similarity, key) in the same scope; runs in a worker thread."""
+        vectors, scopes, keys, rows = index
+        sims = vectors[:rows] @ vector
+        sims[scopes[:rows] != scope_id] = -1.0
+        i = int(np.argmax(sims))
+        return float(sims[i]), keys[i]
+
+    async def lookup(self, user_input: str, context: str, model: str, temperature: float):
+        """
+        (response, tier, vector) on a hit, (None, None, vector) on a miss; pass vector on to store().
+        vector is EMBED_FAILED when the semantic tier could not embed the input.
+        """
+        scope = self.scope(context, model, temperature)
+        key = self._key(user_input, scope)
+        entry = self._entries.get(key)
+        if entry is not None and self._alive(key, entry):
+            self._entries.move_to_end(key)
+            self.hits_exact += 1
+            self.saved_seconds += entry.gen_time
+            return entry.response, "exact", None
+
+        vector = await self._vector(user_input)
+        scope_id = self._scope_ids.get(scope)
+        if vector is not None and scope_id is not None and self._row_keys:
+            # snapshot on the loop; rows appended meanwhile are past `rows` and not scanned
+            index = (self._vectors, self._row_scopes, self._row_keys, len(self._row_keys))
+            similarity, near = await asyncio.to_thread(self._nearest, index, vector, scope_id)
+            entry = self._entries.get(near) if near else None
+            if entry is not None and similarity >= self.threshold and self._alive(near, entry):
+                self._entries.move_to_end(near)
+                self.hits_semantic += 1
+                self.saved_seconds += entry.gen_time
+                return entry.response, "semantic", vector
+        self.misses += 1
+        return None, None, EMBED_FAILED if vector is None and self.embed is not None else vector
+
+    async def store(self, user_input: str, context: str, model: str, temperature: float,
+                    response: str, gen_time: float, vector: Optional[np.ndarray] = None):
+        if not response.strip():
+            return
+        scope = self.scope(context, model, temperature)
+        if vector is EMBED_FAILED:
+            vector = None
+        elif vector is None:
+            vector = await self._vector(user_input)
+        key = self._key(user_input, scope)
+        if key in self._entries:
+            self._remove(key)
+        entry = self._entries[key] = Entry(response, scope, gen_time)
+        if vector is not None:
+            self._append(entry, key, vector)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._vectors = None
+        self._row_scopes = np.zeros(0, dtype=np.int64)
+        self._row_keys = []
+        self._scope_ids = {}
+        self._dead_rows = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits_exact + self.hits_semantic + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits_exact": self.hits_exact,
+            "hits_semantic": self.hits_semantic,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round((self.hits_exact + self.hits_semantic) / lookups, 3) if lookups else 0.0,
+            "latency_saved_s": round(self.saved_seconds, 2),
+            "evictions": self.evictions,
+            "embed_errors": self.embed_errors,
+        }
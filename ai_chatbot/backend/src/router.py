@@ -0,0 +1,266 @@
+# backend/src/router.py
+"""
+Least-loaded router over several Ollama endpoints.
+
+- score = (in-flight + 1) * rolling latency / weight, lowest healthy score wins
+- an endpoint is ejected after `failure_threshold` consecutive errors and probed
+  with GET /api/tags until it answers again
+- failed requests are retried on another endpoint; streams only before the first
+  token has been sent, since after that the client has seen partial output
+"""
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+import httpx
+from langchain_core.runnables import Runnable, RunnableConfig
+from .ollama_client import OllamaClient, OllamaLLM, close_upstream
+
+logger = logging.getLogger("chatbot.router")
+
+
+def parse_endpoints(spec: str) -> List[Tuple[str, float]]:
+    """"http://a:11434|2,http://b:11434" -> [("http://a:11434", 2.0), ("http://b:11434", 1.0)]"""
+    endpoints = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        url, _, weight = item.partition("|")
+        endpoints.append((url.rstrip("/"), float(weight or 1)))
+    return endpoints
+
+
+class Endpoint:
+    def __init__(self, url: str, weight: float, llm: Any):
+        self.url = url
+        self.weight = weight
+        self.llm = llm
+        self.in_flight = 0
+        self.latency = 1.0          # EWMA of request duration, seconds
+        self.failures = 0           # consecutive
+        self.healthy = True
+        self.ejected_at = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def score(self) -> float:
+        return (self.in_flight + 1) * self.latency / self.weight
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url, "weight": self.weight, "healthy": self.healthy,
+            "in_flight": self.in_flight, "latency_ewma": round(self.latency, 3),
+            "requests": self.requests, "errors": self.errors,
+        }
+
+
+class OllamaRouter(Runnable):
+    def __init__(self, endpoints: List[Tuple[str, float]], client: OllamaClient,
+                 make_llm: Optional[Callable[[str], Any]] = None,
+                 failure_threshold: int = 3, probe_interval: float = 10.0,
+                 max_attempts: int = 2, idempotent: bool = True):
+        if not endpoints:
+            raise ValueError("OllamaRouter needs at least one endpoint")
+        self.client = client
+        make_llm = make_llm or (lambda url: OllamaLLM(client, url))
+        self.endpoints = [Endpoint(url, weight, make_llm(url)) for url, weight in endpoints]
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.max_attempts = max_attempts
+        self.idempotent = idempotent
+        self._probe_task: Optional[asyncio.Task] = None
+
+    # ---------- selection & bookkeeping ----------
+
+    def pick(self, exclude=()) -> Endpoint:
+        candidates = [e for e in self.endpoints if e.healthy and e not in exclude]
+        if not candidates:
+            # everything is ejected: try the one that has been out the longest
+            candidates = sorted((e for e in self.endpoints if e not in exclude), key=lambda e: e.ejected_at)[:1]
+        if not candidates:
+            raise RuntimeError("No Ollama endpoint available")
+        return min(candidates, key=Endpoint.score)
+
+    def _start(self, ep: Endpoint) -> float:
+        ep.in_flight += 1
+        ep.requests += 1
+        return time.monotonic()
+
+    def _success(self, ep: Endpoint, started: float):
+        ep.in_flight -= 1
+        ep.latency = 0.8 * ep.latency + 0.2 * (time.monotonic() - started)
+        ep.failures = 0
+
+    def _failure(self, ep: Endpoint, error: Exception):
+        ep.in_flight -= 1
+        ep.errors += 1
+        ep.latency *= 1.5  # errors make an endpoint look slower, so traffic drifts away early
+        ep.failures += 1
+        if ep.healthy and ep.failures >= self.failure_threshold:
+            ep.healthy = False
+            ep.ejected_at = time.monotonic()
+            logger.warning("ejecting %s after %d failures: %s", ep.url, ep.failures, error)
+
+    def _attempts(self) -> int:
+        return min(self.max_attempts, len(self.endpoints)) if self.idempotent else 1
+
+    # ---------- Runnable interface ----------
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> str:
+        tried, last_error = [], None
+        for _ in range(self._attempts()):
+            ep = self.pick(exclude=tried)
+            tried.append(ep)
+            started = self._start(ep)
+            try:
+                result = ep.llm.invoke(input, config, **kwargs)
+            except Exception as e:
+                self._failure(ep, e)
+                last_error = e
+                continue
+            self._success(ep, started)
+            return result
+        raise last_error
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> str:
+        tried, last_error = [], None
+        for _ in range(self._attempts()):
+            ep = self.pick(exclude=tried)
+            tried.append(ep)
+            started = self._start(ep)
+            try:
+                result = await ep.llm.ainvoke(input, config, **kwargs)
+            except asyncio.CancelledError:
+                ep.in_flight -= 1
+                raise
+            except Exception as e:
+                self._failure(ep, e)
+                last_error = e
+                continue
+            self._success(ep, started)
+            return result
+        raise last_error
+
+    async def astream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> AsyncIterator[str]:
+        tried, last_error = [], None
+        for _ in range(self._attempts()):
+            ep = self.pick(exclude=tried)
+            tried.append(ep)
+            started = self._start(ep)
+            sent = False
+            stream = ep.llm.astream(input, config, **kwargs)
+            try:
+                async for token in stream:
+                    sent = True
+                    yield token
+            except (asyncio.CancelledError, GeneratorExit):
+                ep.in_flight -= 1
+                raise
+            except Exception as e:
+                self._failure(ep, e)
+                last_error = e
+                if sent:
+                    raise
+                continue
+            finally:
+                await close_upstream(stream)
+            self._success(ep, started)
+            return
+        raise last_error
+
+    async def astream_generate(self, payload: dict, prefer: Optional[str] = None) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Raw /api/generate stream, yielding (endpoint url, chunk), for callers that
+        need more than text (the `context` state in and out, eval counts).
+        `prefer` keeps a conversation on the endpoint that holds its KV cache.
+        """
+        tried, last_error = [], None
+        for _ in range(self._attempts()):
+            preferred = [e for e in self.endpoints if e.url == prefer and e.healthy and e not in tried]
+            ep = preferred[0] if preferred else self.pick(exclude=tried)
+            tried.append(ep)
+            started = self._start(ep)
+            sent = False
+            stream = self.client.stream(ep.url, payload)
+            try:
+                async for chunk in stream:
+                    sent = sent or bool(chunk.get("response"))
+                    yield ep.url, chunk
+            except (asyncio.CancelledError, GeneratorExit):
+                ep.in_flight -= 1
+                raise
+            except Exception as e:
+                self._failure(ep, e)
+                last_error = e
+                if sent:
+                    raise
+                continue
+            finally:
+                await close_upstream(stream)
+            self._success(ep, started)
+            return
+        raise last_error
+
+    async def aembed(self, texts: List[str], model: str) -> List[List[float]]:
+        """Embeddings from /api/embed on the least-loaded endpoint."""
+        ep = self.pick()
+        ep.in_flight += 1  # load only: embedding latency says nothing about generation speed
+        try:
+            return await self.client.embed(ep.url, model, texts)
+        finally:
+            ep.in_flight -= 1
+
+    # ---------- health probing ----------
+
+    async def probe_once(self):
+        for ep in self.endpoints:
+            if ep.healthy:
+                continue
+            try:
+                resp = await self.client.get(ep.url, "/api/tags")
+                if resp.status_code == 200:
+                    ep.healthy, ep.failures = True, 0
+                    logger.info("endpoint %s is back", ep.url)
+            except httpx.HTTPError:
+                pass
+
+    async def readiness(self, model: str, timeout: float = 2.0) -> list:
+        """Per endpoint: reachable (/api/tags answers), has the model, and has it loaded (/api/ps)."""
+
+        def names(resp):
+            return {m.get("name") for m in resp.json().get("models", [])} | \
+                   {m.get("model") for m in resp.json().get("models", [])}
+
+        async def check(ep: Endpoint) -> dict:
+            status = {"url": ep.url, "reachable": False, "model_available": False, "model_loaded": False}
+            try:
+                tags, ps = await asyncio.gather(
+                    self.client.get(ep.url, "/api/tags", timeout=timeout),
+                    self.client.get(ep.url, "/api/ps", timeout=timeout),
+                )
+                status["reachable"] = tags.status_code == 200
+                status["model_available"] = status["reachable"] and model in names(tags)
+                status["model_loaded"] = ps.status_code == 200 and model in names(ps)
+            except (httpx.HTTPError, ValueError) as e:
+                status["error"] = str(e) or type(e).__name__
+            return status
+
+        return list(await asyncio.gather(*(check(ep) for ep in self.endpoints)))
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self.probe_once()
+
+    def start_probing(self):
+        if self._probe_task is None:
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop())
+
+    async def stop_probing(self):
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+    def stats(self) -> list:
+        return [e.stats() for e in self.endpoints]
@@ -0,0 +1,132 @@
+# backend/src/scheduler.py
+"""
+Admission control in front of the LLM.
+
+- at most `max_in_flight` requests reach Ollama at once
+- the rest wait in a queue: strict priority between levels, round-robin between
+  clients inside a level, FIFO per client
+- a request is rejected with Overloaded (-> 429 + Retry-After) when the queue is full
+  or its estimated wait is longer than `max_queue_wait`
+"""
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.reason = reason
+
+
+class RequestScheduler:
+    def __init__(self, max_in_flight: int = 2, max_queue_depth: int = 32,
+                 max_queue_wait: float = 30.0, initial_service_time: float = 5.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue_depth = max_queue_depth
+        self.max_queue_wait = max_queue_wait
+        self.in_flight = 0
+        self.queued = 0
+        self.avg_service_time = initial_service_time  # EWMA of time holding a slot
+        self.admitted = 0
+        self.rejected = 0
+        # one OrderedDict per priority level: client_id -> deque of waiting futures
+        self._queues = [OrderedDict() for _ in PRIORITIES]
+
+    def estimated_wait(self, position: int) -> float:
+        """Expected seconds until the request at `position` in the queue gets a slot."""
+        return math.ceil(position / self.max_in_flight) * self.avg_service_time
+
+    async def acquire(self, client_id: str = "anonymous", priority: str = "normal"):
+        if self.in_flight < self.max_in_flight and self.queued == 0:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self.queued >= self.max_queue_depth:
+            self.rejected += 1
+            raise Overloaded(self.estimated_wait(self.queued + 1), "Queue is full")
+        wait = self.estimated_wait(self.queued + 1)
+        if wait > self.max_queue_wait:
+            self.rejected += 1
+            raise Overloaded(wait, f"Estimated wait {wait:.0f}s exceeds {self.max_queue_wait:.0f}s")
+
+        level = self._queues[PRIORITIES.get(priority, PRIORITIES["normal"])]
+        future = asyncio.get_running_loop().create_future()
+        level.setdefault(client_id, deque()).append(future)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_queue_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # slot was granted while we were giving up: hand it on
+                self.release()
+            else:
+                future.cancel()
+                self._remove(level, client_id, future)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise Overloaded(self.avg_service_time, "Timed out waiting in queue")
+            raise
+        self.admitted += 1
+
+    def release(self, service_time: float = None):
+        if service_time is not None:
+            self.avg_service_time = 0.8 * self.avg_service_time + 0.2 * service_time
+        self.in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, client_id: str = "anonymous", priority: str = "normal"):
+        await self.acquire(client_id, priority)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+    def _remove(self, level, client_id, future):
+        waiting = level.get(client_id)
+        if waiting and future in waiting:
+            waiting.remove(future)
+            self.queued -= 1
+            if not waiting:
+                del level[client_id]
+
+    def _next(self):
+        for level in self._queues:
+            while level:
+                client_id, waiting = next(iter(level.items()))
+                future = waiting.popleft()
+                self.queued -= 1
+                if waiting:
+                    level.move_to_end(client_id)  # round-robin: client goes to the back
+                else:
+                    del level[client_id]
+                if not future.done():
+                    return future
+        return None
+
+    def _dispatch(self):
+        while self.in_flight < self.max_in_flight:
+            future = self._next()
+            if future is None:
+                return
+            self.in_flight += 1
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_service_time": round(self.avg_service_time, 3),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
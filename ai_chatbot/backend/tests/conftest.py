@@ -0,0 +1,66 @@
+# backend/tests/conftest.py
+"""
+The backend and the stand-in Ollama (scripts/fake_ollama.py), each served by
+uvicorn in a thread so tests can drop real connections and inspect both sides.
+
+    cd backend && python -m pytest tests
+"""
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+import pytest
+import uvicorn
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(app):
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.fixture(scope="session")
+def fake_ollama():
+    from scripts import fake_ollama
+    fake_ollama.config.update(first_token_delay=0.05, token_delay=0.05, tokens=40)
+    server, thread, url = _serve(fake_ollama.app)
+    yield fake_ollama, url
+    server.should_exit = True
+    thread.join()
+
+
+@pytest.fixture(scope="session")
+def backend(fake_ollama):
+    """(main module, base url). Settings are read at import, so the environment is set first."""
+    _, ollama_url = fake_ollama
+    os.environ.update(OLLAMA_ENDPOINTS=ollama_url, OLLAMA_MAX_CONNECTIONS="4", CACHE_ENABLED="true",
+                      DOCS_DIRECTORY=tempfile.mkdtemp())
+    import main
+    server, thread, url = _serve(main.app)
+    yield main, url
+    server.should_exit = True
+    thread.join()
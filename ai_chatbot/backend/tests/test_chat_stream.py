@@ -0,0 +1,45 @@
+# backend/tests/test_chat_stream.py
+import httpx
+from conftest import wait_for
+
+
+def _read_tokens(url: str, n: int, **body):
+    """Open /chat/stream, read n token events, then drop the connection."""
+    with httpx.Client(timeout=10) as client:
+        with client.stream("POST", f"{url}/chat/stream", json={"user_input": "hi", **body}) as resp:
+            assert resp.status_code == 200
+            seen = 0
+            for line in resp.iter_lines():
+                if line.startswith("data:"):
+                    seen += 1
+                    if seen == n:
+                        return
+
+
+def test_disconnect_cancels_upstream_and_frees_the_connection(backend, fake_ollama):
+    main, url = backend
+    ollama, _ = fake_ollama
+    cancelled = ollama.stats["cancelled"]
+
+    _read_tokens(url, 3)
+
+    assert wait_for(lambda: ollama.stats["cancelled"] == cancelled + 1), ollama.stats
+    assert wait_for(lambda: ollama.stats["in_flight"] == 0), ollama.stats
+    pool = main.ollama._http._transport._pool
+    assert wait_for(lambda: not pool.connections), pool.connections
+    assert wait_for(lambda: main.ollama.in_flight == 0)
+    assert wait_for(lambda: main.scheduler.in_flight == 0)
+
+
+def test_disconnects_do_not_exhaust_the_pool(backend, fake_ollama):
+    main, url = backend
+    ollama, _ = fake_ollama
+    cancelled = ollama.stats["cancelled"]
+
+    # more aborted streams than the pool has connections
+    for i in range(main.settings.OLLAMA_MAX_CONNECTIONS + 2):
+        _read_tokens(url, 2, conversation_id=f"disconnect-{i}")
+
+    assert wait_for(lambda: ollama.stats["cancelled"] == cancelled + main.settings.OLLAMA_MAX_CONNECTIONS + 2)
+    resp = httpx.post(f"{url}/chat", json={"user_input": "still there?"}, timeout=10)
+    assert resp.status_code == 200
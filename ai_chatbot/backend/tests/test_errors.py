@@ -0,0 +1,52 @@
+# backend/tests/test_errors.py
+import json
+import httpx
+import pytest
+
+
+class FailingChain:
+    """Stands in for the chain: raises `error` before the first token."""
+    def __init__(self, error: Exception):
+        self.error = error
+
+    async def astream(self, input, config=None, **kwargs):
+        raise self.error
+        yield
+
+
+@pytest.mark.parametrize("error", [
+    httpx.PoolTimeout(""),
+    httpx.ConnectError("[Errno 111] Connection refused"),
+])
+def test_unavailable_ollama_is_a_503_with_retry_after(backend, monkeypatch, error):
+    main, url = backend
+    monkeypatch.setattr(main, "chain", FailingChain(error))
+
+    resp = httpx.post(f"{url}/chat", json={"user_input": "hi"}, timeout=10)
+
+    assert resp.status_code == 503
+    assert int(resp.headers["Retry-After"]) >= 1
+    assert resp.json()["detail"].startswith(type(error).__name__)
+
+
+def test_other_errors_are_a_500_naming_the_type(backend, monkeypatch):
+    main, url = backend
+    monkeypatch.setattr(main, "chain", FailingChain(RuntimeError()))
+
+    resp = httpx.post(f"{url}/chat", json={"user_input": "hi"}, timeout=10)
+
+    assert resp.status_code == 500
+    assert resp.json()["detail"] == "RuntimeError"
+
+
+def test_stream_error_event_carries_retry_after(backend, monkeypatch):
+    main, url = backend
+    monkeypatch.setattr(main, "chain", FailingChain(httpx.PoolTimeout("")))
+
+    resp = httpx.post(f"{url}/chat/stream", json={"user_input": "hi"}, timeout=10)
+
+    lines = resp.text.splitlines()
+    assert "event: error" in lines
+    error = json.loads(lines[lines.index("event: error") + 1].removeprefix("data: "))
+    assert error == {"detail": "PoolTimeout", "status": 503, "retry_after": error["retry_after"]}
+    assert error["retry_after"] >= 1
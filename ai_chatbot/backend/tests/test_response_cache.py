@@ -0,0 +1,28 @@
+# backend/tests/test_response_cache.py
+import httpx
+
+
+def _chat(url: str, question: str, bypass: bool = False) -> httpx.Response:
+    headers = {"X-Cache-Bypass": "true"} if bypass else {}
+    resp = httpx.post(f"{url}/chat", json={"user_input": question}, headers=headers, timeout=10)
+    assert resp.status_code == 200
+    return resp
+
+
+def test_bypass_does_not_store(backend):
+    main, url = backend
+    entries = main.response_cache.stats()["entries"]
+
+    for i in range(3):
+        assert _chat(url, f"bypassed question {i}", bypass=True).headers["X-Cache"] == "bypass"
+
+    assert main.response_cache.stats()["entries"] == entries
+
+
+def test_miss_is_stored_and_then_hit(backend):
+    main, url = backend
+    entries = main.response_cache.stats()["entries"]
+
+    assert _chat(url, "cached question").headers["X-Cache"] == "miss"
+    assert main.response_cache.stats()["entries"] == entries + 1
+    assert _chat(url, "cached question").headers["X-Cache"] == "hit-exact"
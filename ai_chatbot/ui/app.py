@@ -5,10 +5,15 @@ Uses Groq (fast, free) - Local Ollama for dev
 """
 import streamlit as st
 import os
+import uuid
 from langchain_groq import ChatGroq  # ← For cloud
 from langchain_community.llms import Ollama  # ← For local
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from components.hedging import HedgedChain
+from components.chat import backend_health, stream_message
+from components.history import SUMMARY_PROMPT, ChatHistory
+from components.history_view import render_history
 
 # ui/app.py - Add this at top
 try:
@@ -23,6 +28,18 @@ load_dotenv()
 # Config
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 USE_LOCAL = not GROQ_API_KEY  # Auto-detect: local if no key
+USE_BACKEND = bool(os.getenv("BACKEND_URL"))  # chat through backend/main.py instead of calling the LLM here
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # point at a stand-in server for tests
+# Hedging: send to Groq, and to local Ollama too if Groq has not answered within
+# the HEDGE_PERCENTILE of its recent time-to-first-token
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true" and not USE_LOCAL
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_INITIAL_DELAY = float(os.getenv("HEDGE_INITIAL_DELAY", "2.0"))
+# History: render one page of messages per rerun, summarize older turns into the context
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", "200"))
+HISTORY_CONTEXT_TOKENS = int(os.getenv("HISTORY_CONTEXT_TOKENS", "1000"))
 
 # Prompt
 prompt_template = PromptTemplate.from_template(
@@ -35,69 +52,107 @@ User: {user_input}
 Assistant: """
 )
 
+def ollama_chain():
+    llm = Ollama(
+        model="llama3.2:3b",
+        base_url=OLLAMA_BASE_URL,
+        temperature=0.7
+    )
+    return prompt_template | llm | StrOutputParser()
+
+def groq_chain():
+    llm = ChatGroq(
+        groq_api_key=GROQ_API_KEY,
+        model_name="llama-3.1-8b-instant",  # Fast & smart
+        temperature=0.7,
+        base_url=GROQ_BASE_URL
+    )
+    return prompt_template | llm | StrOutputParser()
+
+summary_template = PromptTemplate.from_template(SUMMARY_PROMPT)
+
 # Chain Factory
 @st.cache_resource
 def create_chain():
     if USE_LOCAL:
-        # Local Ollama
-        llm = Ollama(
-            model="llama3.2:3b",
-            base_url="http://localhost:11434",
-            temperature=0.7
-        )
         st.info("🖥️ Using Local Ollama")
+        return ollama_chain()
+    if HEDGE_REQUESTS:
+        st.info("☁️ Using Groq Cloud, hedged with Local Ollama")
+        return HedgedChain(groq_chain(), ollama_chain(),
+                           percentile=HEDGE_PERCENTILE, initial_delay=HEDGE_INITIAL_DELAY)
+    st.info("☁️ Using Groq Cloud (Fast & Free)")
+    return groq_chain()
+
+@st.cache_resource
+def create_summary_chain():
+    if USE_LOCAL:
+        llm = Ollama(model="llama3.2:3b", base_url=OLLAMA_BASE_URL, temperature=0)
     else:
-        # Cloud Groq
-        llm = ChatGroq(
-            groq_api_key=GROQ_API_KEY,
-            model_name="llama-3.1-8b-instant",  # Fast & smart
-            temperature=0.7
-        )
-        st.info("☁️ Using Groq Cloud (Fast & Free)")
-    
-    chain = prompt_template | llm | StrOutputParser()
-    return chain
+        llm = ChatGroq(groq_api_key=GROQ_API_KEY, model_name="llama-3.1-8b-instant", temperature=0,
+                       base_url=GROQ_BASE_URL)
+    return summary_template | llm | StrOutputParser()
+
+def summarize(summary: str, turns: str) -> str:
+    return create_summary_chain().invoke({"summary": summary or "(none)", "turns": turns, "words": 150})
 
 # Streamlit UI
 st.set_page_config(page_title="AI Chatbot", page_icon="🤖", layout="centered")
 
 st.title("🤖 AI Chatbot")
-st.caption(f"Powered by {'Ollama (Local)' if USE_LOCAL else 'Groq + LangChain'}")
+st.caption("Powered by the chat backend" if USE_BACKEND else
+           f"Powered by {'Ollama (Local)' if USE_LOCAL else 'Groq + LangChain'}")
 
 # Initialize chat history
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+if "history" not in st.session_state:
+    st.session_state.history = ChatHistory(page_size=HISTORY_PAGE_SIZE, max_messages=HISTORY_MAX_MESSAGES,
+                                           context_tokens=HISTORY_CONTEXT_TOKENS)
+    st.session_state.history_page = 0
+if "conversation_id" not in st.session_state:
+    st.session_state.conversation_id = uuid.uuid4().hex  # backend mode: history is kept server-side
+history = st.session_state.history
 
-# Display chat messages
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+# Display one page of chat messages; older ones behind the pager, oldest only in the summary
+render_history(history)
 
 # Chat input
 if prompt := st.chat_input("Ask anything..."):
+    st.session_state.history_page = 0
+    context = "" if USE_BACKEND else history.context()  # the backend keeps its own history
     # Add user message
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    history.append("user", prompt)
     with st.chat_message("user"):
         st.markdown(prompt)
 
     # Get AI response
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            chain = create_chain()
-            try:
-                response = chain.invoke({
+        try:
+            if USE_BACKEND:
+                response = st.write_stream(stream_message(prompt, conversation_id=st.session_state.conversation_id))
+            else:
+                response = st.write_stream(create_chain().stream({
                     "user_input": prompt,
-                    "context": ""
-                })
-                st.markdown(response)
-                st.session_state.messages.append({"role": "assistant", "content": response})
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
+                    "context": context
+                }))
+            history.append("assistant", response)
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+    if history.needs_compaction():
+        with st.spinner("Summarizing earlier messages..."):
+            history.compact(None if USE_BACKEND else summarize)
 
 # Sidebar: Instructions
 with st.sidebar:
     st.header("🚀 Deployed!")
-    if USE_LOCAL:
+    if USE_BACKEND:
+        with st.expander("🩺 Backend health"):
+            st.json(backend_health())
+    elif USE_LOCAL:
         st.warning("💡 Add GROQ_API_KEY to .env for cloud deploy")
+    if not USE_BACKEND:
+        chain = create_chain()
+        if isinstance(chain, HedgedChain):
+            with st.expander("⏱️ Hedging"):
+                st.json(chain.metrics())
     st.markdown("---")
     st.markdown("[GitHub Repo](https://github.com/yourname/ai-chatbot)")
@@ -0,0 +1,316 @@
+# ui/components/backend_client.py
+"""
+HTTP client for the chat backend (backend/main.py), sync and async.
+
+- one pooled httpx session per client, reused across messages (keep-alive)
+- separate connect and read timeouts; read is the longest gap between chunks,
+  so a slow first token on a cold model does not need a 3 minute total timeout
+- connection errors and 429/503 are retried with jittered exponential backoff,
+  waiting at least as long as the server's Retry-After
+- /chat/stream is parsed as it arrives (Server-Sent Events), token by token
+- every call's latency, time-to-first-token and outcome are kept for `health()`
+
+Streams are only retried before the first token, so an answer is never repeated.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Iterator, List, Optional
+import httpx
+
+RETRY_STATUSES = (429, 503)
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class BackendError(Exception):
+    """A call that failed after retries; `kind` is unreachable, busy, timeout, http or stream."""
+
+    def __init__(self, message: str, kind: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+
+
+def _pct(values, q):
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def retry_after(resp: httpx.Response) -> Optional[float]:
+    """Retry-After in seconds (delta-seconds or an HTTP date), None if absent or unparsable."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class _SSE:
+    """Feeds /chat/stream lines; returns a token, DONE, or None; raises on an error event."""
+    DONE = object()
+
+    def __init__(self):
+        self.event = None
+
+    def feed(self, line: str):
+        if not line:
+            self.event = None
+        elif line.startswith("event:"):
+            self.event = line[6:].strip()
+        elif line.startswith("data:"):
+            data = json.loads(line[5:])
+            if self.event == "done":
+                return self.DONE
+            if self.event == "error":
+                raise BackendError(data.get("detail", "stream failed"), "stream")
+            return data.get("token") or None
+        return None
+
+
+class _ClientBase:
+    def __init__(self, base_url: str = "http://localhost:8000", connect_timeout: float = 5.0,
+                 read_timeout: float = 180.0, retries: int = 3, backoff: float = 0.5,
+                 max_backoff: float = 10.0, max_connections: int = 10, window: int = 100):
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.latencies = deque(maxlen=window)  # seconds per successful call
+        self.ttfts = deque(maxlen=window)      # streams: seconds to the first token
+        self.outcomes = deque(maxlen=window)   # True/False per call
+        self.calls = 0
+        self.retried = 0
+        self.last_error = None
+        self.last_error_at = None
+        self._lock = threading.Lock()          # Streamlit runs scripts on several threads
+
+    @staticmethod
+    def _body(user_input: str, context: str, conversation_id: Optional[str],
+              document_ids: Optional[List[str]]) -> dict:
+        body = {"user_input": user_input, "context": context, "conversation_id": conversation_id}
+        if document_ids:
+            body["document_ids"] = document_ids
+        return body
+
+    def _delay(self, attempt: int, resp: Optional[httpx.Response] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        hint = retry_after(resp) if resp is not None else None
+        return max(delay, hint + random.uniform(0, self.backoff)) if hint is not None else delay
+
+    def _should_retry(self, attempt: int, resp: Optional[httpx.Response] = None) -> bool:
+        if attempt >= self.retries or (resp is not None and resp.status_code not in RETRY_STATUSES):
+            return False
+        with self._lock:
+            self.retried += 1
+        return True
+
+    def _error(self, exc: Exception) -> BackendError:
+        if isinstance(exc, BackendError):
+            return exc
+        if isinstance(exc, RETRY_ERRORS):
+            return BackendError(f"Backend unreachable at {self.base_url} ({type(exc).__name__})", "unreachable")
+        if isinstance(exc, httpx.ReadTimeout):
+            return BackendError(f"No data from the backend for {self.timeout.read:.0f}s "
+                                "(is the model still loading?)", "timeout")
+        if isinstance(exc, httpx.HTTPStatusError):
+            status = exc.response.status_code
+            if status in RETRY_STATUSES:
+                return BackendError(f"Backend busy (HTTP {status}), try again shortly", "busy", status)
+            return BackendError(f"Backend error (HTTP {status})", "http", status)
+        return BackendError(f"{type(exc).__name__}: {exc}", "http")
+
+    def _record(self, start: float, error: Optional[BackendError] = None, ttft: Optional[float] = None):
+        with self._lock:
+            self.calls += 1
+            self.outcomes.append(error is None)
+            if error is None:
+                self.latencies.append(time.perf_counter() - start)
+                if ttft is not None:
+                    self.ttfts.append(ttft)
+            else:
+                self.last_error, self.last_error_at = str(error), time.time()
+
+    def health(self) -> dict:
+        """Recent client-side view of the backend: ok / degraded (some failures) / down (last call failed)."""
+        with self._lock:
+            outcomes = list(self.outcomes)
+            status = ("unknown" if not outcomes else "down" if not outcomes[-1]
+                      else "degraded" if not all(outcomes) else "ok")
+            round3 = lambda v: None if v is None else round(v, 3)
+            return {
+                "status": status,
+                "calls": self.calls,
+                "retries": self.retried,
+                "error_rate": round3(outcomes.count(False) / len(outcomes)) if outcomes else None,
+                "latency_p50": round3(_pct(self.latencies, 50)),
+                "latency_p95": round3(_pct(self.latencies, 95)),
+                "ttft_p50": round3(_pct(self.ttfts, 50)),
+                "ttft_p95": round3(_pct(self.ttfts, 95)),
+                "last_error": self.last_error,
+                "last_error_age": round(time.time() - self.last_error_at) if self.last_error_at else None,
+            }
+
+
+class BackendClient(_ClientBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._http = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+
+    def _send(self, request: httpx.Request, stream: bool = False) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            try:
+                resp = self._http.send(request, stream=stream)
+            except RETRY_ERRORS:
+                if not self._should_retry(attempt):
+                    raise
+                time.sleep(self._delay(attempt))
+                continue
+            if resp.status_code in RETRY_STATUSES and self._should_retry(attempt, resp):
+                resp.close()
+                time.sleep(self._delay(attempt, resp))
+                continue
+            return resp
+
+    def chat(self, user_input: str, context: str = "", conversation_id: Optional[str] = None,
+             document_ids: Optional[List[str]] = None) -> str:
+        start = time.perf_counter()
+        try:
+            resp = self._send(self._http.build_request(
+                "POST", "/chat", json=self._body(user_input, context, conversation_id, document_ids)))
+            resp.raise_for_status()
+            answer = resp.json()["response"]
+        except Exception as e:
+            error = self._error(e)
+            self._record(start, error)
+            raise error from e
+        self._record(start)
+        return answer
+
+    def stream(self, user_input: str, context: str = "", conversation_id: Optional[str] = None,
+               document_ids: Optional[List[str]] = None) -> Iterator[str]:
+        """Tokens as they arrive. Closing the generator closes the connection (the server stops)."""
+        start, ttft, error = time.perf_counter(), None, None
+        try:
+            resp = self._send(self._http.build_request(
+                "POST", "/chat/stream", json=self._body(user_input, context, conversation_id, document_ids)),
+                stream=True)
+            try:
+                resp.raise_for_status()
+                sse = _SSE()
+                for line in resp.iter_lines():
+                    token = sse.feed(line)
+                    if token is _SSE.DONE:
+                        break
+                    if token:
+                        if ttft is None:
+                            ttft = time.perf_counter() - start
+                        yield token
+            finally:
+                resp.close()
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            error = self._error(e)
+            raise error from e
+        finally:
+            self._record(start, error, ttft)
+
+    def ready(self, timeout: float = 2.0) -> bool:
+        try:
+            return self._http.get("/ready", timeout=timeout).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    def close(self):
+        self._http.close()
+
+
+class AsyncBackendClient(_ClientBase):
+    """Same as BackendClient for asyncio callers; create and use it on one event loop."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._http = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+
+    async def _send(self, request: httpx.Request, stream: bool = False) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            try:
+                resp = await self._http.send(request, stream=stream)
+            except RETRY_ERRORS:
+                if not self._should_retry(attempt):
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            if resp.status_code in RETRY_STATUSES and self._should_retry(attempt, resp):
+                await resp.aclose()
+                await asyncio.sleep(self._delay(attempt, resp))
+                continue
+            return resp
+
+    async def chat(self, user_input: str, context: str = "", conversation_id: Optional[str] = None,
+                   document_ids: Optional[List[str]] = None) -> str:
+        start = time.perf_counter()
+        try:
+            resp = await self._send(self._http.build_request(
+                "POST", "/chat", json=self._body(user_input, context, conversation_id, document_ids)))
+            resp.raise_for_status()
+            answer = resp.json()["response"]
+        except Exception as e:
+            error = self._error(e)
+            self._record(start, error)
+            raise error from e
+        self._record(start)
+        return answer
+
+    async def stream(self, user_input: str, context: str = "", conversation_id: Optional[str] = None,
+                     document_ids: Optional[List[str]] = None) -> AsyncIterator[str]:
+        start, ttft, error = time.perf_counter(), None, None
+        try:
+            resp = await self._send(self._http.build_request(
+                "POST", "/chat/stream", json=self._body(user_input, context, conversation_id, document_ids)),
+                stream=True)
+            try:
+                resp.raise_for_status()
+                sse = _SSE()
+                async for line in resp.aiter_lines():
+                    token = sse.feed(line)
+                    if token is _SSE.DONE:
+                        break
+                    if token:
+                        if ttft is None:
+                            ttft = time.perf_counter() - start
+                        yield token
+            finally:
+                await resp.aclose()
+        except (GeneratorExit, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            error = self._error(e)
+            raise error from e
+        finally:
+            self._record(start, error, ttft)
+
+    async def ready(self, timeout: float = 2.0) -> bool:
+        try:
+            return (await self._http.get("/ready", timeout=timeout)).status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def aclose(self):
+        await self._http.aclose()
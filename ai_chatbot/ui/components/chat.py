@@ -1,18 +1,41 @@
 # ui/components/chat.py
-import requests
+import os
+from .backend_client import BackendClient, BackendError
 
-BACKEND_URL = "http://localhost:8000/chat"
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
 
-def send_message(user_input: str, context: str = ""):
-    try:
-        resp = requests.post(
+_client = None
+
+def get_client() -> BackendClient:
+    """One pooled client per process, so every message reuses the same connections."""
+    global _client
+    if _client is None:
+        _client = BackendClient(
             BACKEND_URL,
-            json={"user_input": user_input, "context": context},
-            timeout=180  # ← 3 minutes for first load
+            connect_timeout=float(os.getenv("BACKEND_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("BACKEND_READ_TIMEOUT", "180")),  # first token on a cold model
+            retries=int(os.getenv("BACKEND_RETRIES", "3")),
         )
-        resp.raise_for_status()
-        return resp.json()["response"]
-    except requests.exceptions.Timeout:
-        return "Ollama is loading `llama3.2:3b`... Please wait 30–60 seconds and try again."
-    except Exception as e:
-        return f"Error: {str(e)}"
\ No newline at end of file
+    return _client
+
+def send_message(user_input: str, context: str = "", conversation_id: str = None):
+    """With a conversation_id the backend keeps the history; send only the new message."""
+    try:
+        return get_client().chat(user_input, context, conversation_id)
+    except BackendError as e:
+        return f"Error: {e}"
+
+def stream_message(user_input: str, context: str = "", conversation_id: str = None):
+    """
+    Yields tokens from /chat/stream as they arrive (use with st.write_stream).
+    Closing the generator early closes the connection, which stops generation on the server.
+    """
+    try:
+        yield from get_client().stream(user_input, context, conversation_id)
+    except BackendError as e:
+        yield f"\n\nError: {e}"
+
+def backend_health() -> dict:
+    """Latency and error rate of recent calls, plus whether /ready answers."""
+    client = get_client()
+    return {**client.health(), "ready": client.ready()}
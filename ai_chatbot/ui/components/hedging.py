@@ -0,0 +1,195 @@
+# ui/components/hedging.py
+"""
+Hedged requests across two LLM chains (e.g. Groq primary, local Ollama alternate).
+
+The request goes to the primary first. If no token has arrived after the hedge
+delay (a percentile of recent primary time-to-first-token), the same request is
+sent to the alternate. Whichever produces a token first answers; the other stream
+is cancelled.
+
+To report how much latency hedging saves, a small `shadow_rate` fraction of the
+primaries that lose is left running until their first token (then cancelled), so
+the tail the user would have seen without hedging can be estimated.
+
+The hedge delay only uses primaries that produced a token: a cancelled primary's
+elapsed time is a lower bound, and counting it as a TTFT pulls the percentile
+toward the delay itself, which then keeps shrinking. Completed primaries alone
+are biased the other way (the slow ones are the ones that lose), so each shadow
+sample counts 1 / shadow_rate times, once for every loser it stands for.
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+
+
+def _pct(values, q, weights=None):
+    """Nearest-rank percentile; with weights, each value counts `weight` times."""
+    if not values:
+        return None
+    if weights is None:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+    pairs = sorted(zip(values, weights))
+    target, seen = q / 100 * sum(weights), 0.0
+    for value, weight in pairs:
+        seen += weight
+        if seen >= target:
+            return value
+    return pairs[-1][0]
+
+
+class HedgedChain:
+    def __init__(self, primary, alternate, percentile: float = 95, initial_delay: float = 2.0,
+                 min_delay: float = 0.3, max_delay: float = 10.0, window: int = 200,
+                 shadow_rate: float = 0.1):
+        self.primary = primary
+        self.alternate = alternate
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.shadow_rate = shadow_rate
+        self.observed_ttft = deque(maxlen=window)  # what the user actually waited
+        self.primary_ttft = deque(maxlen=window)   # (TTFT, weight) of primaries that produced a token
+        self.censored_ttft = deque(maxlen=window)  # lower bounds: primaries cancelled when the alternate won
+        self.won_ttft = deque(maxlen=window)       # TTFT of requests the primary won
+        self.lost_ttft = deque(maxlen=window)      # observed TTFT of requests the alternate won
+        self.shadow_ttft = deque(maxlen=window)    # real primary TTFT of shadowed losers
+        self._shadows = set()
+        self.requests = 0
+        self.hedges_fired = 0
+        self.alternate_wins = 0
+        # One long-lived loop so async clients (httpx pools) always see the same loop
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+
+    def hedge_delay(self) -> float:
+        if len(self.primary_ttft) < 10:
+            return self.initial_delay
+        ttfts, weights = zip(*self.primary_ttft)
+        return min(self.max_delay, max(self.min_delay, _pct(ttfts, self.percentile, weights)))
+
+    @staticmethod
+    async def _cancel(task, stream):
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        await stream.aclose()
+
+    async def _shadow(self, task, stream, start):
+        weight = 1 / self.shadow_rate
+        try:
+            await asyncio.wait_for(task, timeout=self.max_delay * 3)
+            ttft = time.monotonic() - start
+            self.shadow_ttft.append(ttft)
+            self.primary_ttft.append((ttft, weight))
+        except asyncio.TimeoutError:
+            self.primary_ttft.append((self.max_delay * 3, weight))  # past max_delay, so exact enough
+        except (StopAsyncIteration, Exception):
+            pass
+        finally:
+            await stream.aclose()
+
+    async def astream(self, inputs):
+        self.requests += 1
+        start = time.monotonic()
+        delay = self.hedge_delay()
+
+        streams = {"primary": self.primary.astream(inputs)}
+        tasks = {"primary": asyncio.ensure_future(streams["primary"].__anext__())}
+        done, _ = await asyncio.wait(tasks.values(), timeout=delay)
+
+        if not done or tasks["primary"].exception() is not None:
+            self.hedges_fired += 1
+            streams["alternate"] = self.alternate.astream(inputs)
+            tasks["alternate"] = asyncio.ensure_future(streams["alternate"].__anext__())
+
+        winner, first, error = None, None, None
+        pending = dict(tasks)
+        while pending and winner is None:
+            done, _ = await asyncio.wait(pending.values(), return_when=asyncio.FIRST_COMPLETED)
+            for name in [n for n, t in pending.items() if t in done]:
+                task = pending.pop(name)
+                try:
+                    first = task.result()
+                    winner = name
+                    break
+                except StopAsyncIteration:
+                    error = RuntimeError(f"{name} returned an empty response")
+                    await streams[name].aclose()
+                except Exception as e:
+                    error = e
+                    await streams[name].aclose()
+        if winner is None:
+            raise error or RuntimeError("no backend answered")
+
+        ttft = time.monotonic() - start
+        self.observed_ttft.append(ttft)
+        if winner == "alternate":
+            self.alternate_wins += 1
+            self.lost_ttft.append(ttft)
+            if "primary" in pending:
+                self.censored_ttft.append(ttft)  # the primary needed at least this long
+        else:
+            self.won_ttft.append(ttft)
+            self.primary_ttft.append((ttft, 1.0))
+        for name, task in pending.items():
+            if name == "primary" and random.random() < self.shadow_rate:
+                shadow = asyncio.ensure_future(self._shadow(task, streams[name], start))
+                self._shadows.add(shadow)
+                shadow.add_done_callback(self._shadows.discard)
+            else:
+                await self._cancel(task, streams[name])
+
+        stream = streams[winner]
+        try:
+            yield first
+            async for token in stream:
+                yield token
+        finally:
+            await stream.aclose()
+
+    def stream(self, inputs):
+        """Sync generator for Streamlit (st.write_stream); the async work runs on the chain's loop."""
+        agen = self.astream(inputs)
+        try:
+            while True:
+                future = asyncio.run_coroutine_threadsafe(agen.__anext__(), self._loop)
+                try:
+                    yield future.result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), self._loop).result()
+
+    def invoke(self, inputs):
+        return "".join(self.stream(inputs))
+
+    def unhedged_estimate(self) -> list:
+        """Primary-only TTFT: requests the alternate won get a shadow sample (never below what was observed)."""
+        if not self.shadow_ttft:
+            return list(self.won_ttft) + list(self.lost_ttft)
+        rng = random.Random(0)
+        return list(self.won_ttft) + [max(t, rng.choice(self.shadow_ttft)) for t in self.lost_ttft]
+
+    def metrics(self) -> dict:
+        observed, unhedged = list(self.observed_ttft), self.unhedged_estimate()
+        stats = {
+            "requests": self.requests,
+            "hedges_fired": self.hedges_fired,
+            "hedge_rate": round(self.hedges_fired / self.requests, 3) if self.requests else 0.0,
+            "alternate_wins": self.alternate_wins,
+            "shadow_samples": len(self.shadow_ttft),
+            "censored_samples": len(self.censored_ttft),
+            "hedge_delay_s": round(self.hedge_delay(), 3),
+        }
+        for q in (50, 95, 99):
+            if observed:
+                stats[f"ttft_p{q}_s"] = round(_pct(observed, q), 3)
+                # without shadow samples this is a lower bound
+                stats[f"saved_p{q}_s"] = round(_pct(unhedged, q) - _pct(observed, q), 3)
+        return stats
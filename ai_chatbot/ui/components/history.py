@@ -0,0 +1,116 @@
+# ui/components/history.py
+"""
+Chat history for one Streamlit session, bounded in what is rendered and kept.
+
+- `page(n)` returns one page of messages (0 = newest), so a rerun renders
+  `page_size` messages however long the session is
+- older turns are folded into a rolling `summary` once they add up to
+  `compact_tokens` (LLM summarizer if given, else an extractive fallback)
+- at most `max_messages` are kept verbatim; older ones live only in the summary
+- `context()` is summary + latest turns within `context_tokens`, for the chain's
+  {context} variable
+"""
+from typing import Callable, List, Optional
+
+CHARS_PER_TOKEN = 4  # close enough for budgeting
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and an AI assistant.
+Keep names, facts, decisions and open questions; drop small talk. At most {words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+
+Updated summary:"""
+
+
+def count_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def format_turns(messages: List[dict]) -> str:
+    return "\n".join(f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}" for m in messages)
+
+
+class ChatHistory:
+    def __init__(self, page_size: int = 20, max_messages: int = 200, context_tokens: int = 1000,
+                 summary_tokens: int = 300, recent_messages: int = 6, compact_tokens: int = 800):
+        self.page_size = page_size
+        self.max_messages = max_messages
+        self.context_tokens = context_tokens
+        self.summary_tokens = summary_tokens
+        self.recent_messages = recent_messages  # never summarized away, always in context
+        self.compact_tokens = compact_tokens
+        self.messages: List[dict] = []  # verbatim, oldest first
+        self.dropped = 0                # messages before self.messages (summary only)
+        self.summarized = 0             # messages (counted from the start) folded into the summary
+        self.summary = ""
+
+    def append(self, role: str, content: str):
+        self.messages.append({"role": role, "content": content})
+
+    @property
+    def total(self) -> int:
+        return self.dropped + len(self.messages)
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-len(self.messages) // self.page_size))
+
+    def page(self, n: int = 0) -> List[dict]:
+        end = max(0, len(self.messages) - n * self.page_size)
+        return self.messages[max(0, end - self.page_size):end]
+
+    def _pending(self) -> List[dict]:
+        """Messages older than the recent ones that are not in the summary yet."""
+        start = self.summarized - self.dropped
+        return self.messages[start:max(start, len(self.messages) - self.recent_messages)]
+
+    def needs_compaction(self) -> bool:
+        return (sum(count_tokens(m["content"]) for m in self._pending()) >= self.compact_tokens
+                or len(self.messages) > self.max_messages)
+
+    def _extract(self, turns: List[dict]) -> str:
+        """Fallback summary: first sentence of each turn, newest kept when over budget."""
+        lines = [f"{m['role']}: {m['content'].split('. ')[0][:200]}" for m in turns]
+        text = "\n".join(filter(None, [self.summary, *lines]))
+        return text[-self.summary_tokens * CHARS_PER_TOKEN:]
+
+    def compact(self, summarize: Optional[Callable[[str, str], str]] = None):
+        """Fold pending turns into the summary with summarize(summary, turns), then drop the
+        oldest summarized messages beyond max_messages."""
+        pending = self._pending()
+        if pending:
+            summary = None
+            if summarize is not None:
+                try:
+                    summary = summarize(self.summary, format_turns(pending)).strip()
+                except Exception:
+                    summary = None  # keep the session usable if the LLM call fails
+            self.summary = (summary or self._extract(pending))[-self.summary_tokens * CHARS_PER_TOKEN:]
+            self.summarized += len(pending)
+        excess = min(len(self.messages) - self.max_messages, self.summarized - self.dropped)
+        if excess > 0:
+            del self.messages[:excess]
+            self.dropped += excess
+
+    def context(self, budget: Optional[int] = None) -> str:
+        """Summary first, then as many of the latest messages as fit, oldest to newest."""
+        budget = budget or self.context_tokens
+        parts = [f"Summary of the conversation so far: {self.summary}"] if self.summary else []
+        used = sum(count_tokens(p) for p in parts)
+        recent = []
+        for message in reversed(self.messages[self.summarized - self.dropped:]):
+            cost = count_tokens(message["content"]) + 2
+            if used + cost > budget:
+                break
+            recent.append(message)
+            used += cost
+        if recent:
+            parts.append(format_turns(list(reversed(recent))))
+        return "\n\n".join(parts)
+
+    def clear(self):
+        self.messages, self.dropped, self.summarized, self.summary = [], 0, 0, ""
@@ -0,0 +1,25 @@
+# ui/components/history_view.py
+"""
+Streamlit rendering of a ChatHistory, shared by ui/app.py and ai_chatbot_clean/app.py:
+the summary of earlier messages, the ◀ Older / Newer ▶ pager and one page of messages.
+The page shown lives in st.session_state.history_page (0 = newest).
+"""
+import streamlit as st
+from .history import ChatHistory
+
+
+def render_history(history: ChatHistory):
+    page = min(st.session_state.get("history_page", 0), history.pages - 1)
+    if history.summary:
+        with st.expander("📝 Summary of earlier messages"):
+            st.markdown(history.summary)
+    if history.pages > 1:
+        older, info, newer = st.columns([1, 3, 1])
+        older.button("◀ Older", disabled=page >= history.pages - 1,
+                     on_click=lambda: st.session_state.update(history_page=page + 1))
+        info.caption(f"Page {page + 1} of {history.pages} · {history.total} messages")
+        newer.button("Newer ▶", disabled=page == 0,
+                     on_click=lambda: st.session_state.update(history_page=page - 1))
+    for message in history.page(page):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
@@ -0,0 +1,104 @@
+# ui/scripts/bench_backend_client.py
+"""
+Pooled, retrying backend client vs a fresh request per message.
+
+    cd ui && python -m scripts.bench_backend_client --requests 200 --concurrency 12
+
+Starts the real backend (uvicorn) on a stand-in Ollama with a small admission
+queue, so bursts get 429 + Retry-After. The same streamed workload runs with a
+new connection and no retries per message (the old chat.py), then through one
+shared BackendClient. Prints failures, latency percentiles and the client's
+health() view.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from components.backend_client import BackendClient, BackendError, _SSE, _pct
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+OLLAMA_PORT, BACKEND_PORT = 11521, 18021
+BACKEND_URL = f"http://127.0.0.1:{BACKEND_PORT}"
+
+
+def wait_for(url):
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(url, timeout=0.5)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+
+
+def start_servers():
+    env = {**os.environ, "OLLAMA_ENDPOINTS": f"http://127.0.0.1:{OLLAMA_PORT}", "CACHE_ENABLED": "false",
+           "MAX_IN_FLIGHT": "4", "MAX_QUEUE_DEPTH": "4"}
+    procs = [
+        subprocess.Popen([sys.executable, "-m", "scripts.fake_ollama", "--port", str(OLLAMA_PORT),
+                          "--first-token-delay", "0.1", "--token-delay", "0.005", "--tokens", "20"], cwd=BACKEND_DIR),
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(BACKEND_PORT),
+                          "--log-level", "warning"], cwd=BACKEND_DIR, env=env),
+    ]
+    wait_for(f"http://127.0.0.1:{OLLAMA_PORT}/api/tags")
+    wait_for(f"{BACKEND_URL}/health")
+    return procs
+
+
+def fresh_request(i):
+    """What chat.py did before: a new connection per message, no retry."""
+    with httpx.stream("POST", f"{BACKEND_URL}/chat/stream", json={"user_input": f"question {i}"},
+                      timeout=httpx.Timeout(180, connect=5)) as resp:
+        resp.raise_for_status()
+        sse = _SSE()
+        for line in resp.iter_lines():
+            if sse.feed(line) is _SSE.DONE:
+                break
+
+
+def run(name, call, requests, concurrency):
+    latencies, failures = [], 0
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            call(i)
+            return time.perf_counter() - start
+        except (httpx.HTTPError, BackendError):
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for latency in pool.map(one, range(requests)):
+            if latency is None:
+                failures += 1
+            else:
+                latencies.append(latency)
+    elapsed = time.perf_counter() - start
+    print(f"{name:8} failed={failures:3d}/{requests}  p50={_pct(latencies, 50) or 0:.3f}s  "
+          f"p95={_pct(latencies, 95) or 0:.3f}s  wall={elapsed:.1f}s")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=12)
+    args = ap.parse_args()
+
+    procs = start_servers()
+    try:
+        run("fresh", fresh_request, args.requests, args.concurrency)
+        client = BackendClient(BACKEND_URL, retries=5, backoff=0.2)
+        run("pooled", lambda i: "".join(client.stream(f"question {i}")), args.requests, args.concurrency)
+        print(client.health())
+        client.close()
+    finally:
+        for proc in procs:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
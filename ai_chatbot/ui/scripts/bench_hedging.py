@@ -0,0 +1,112 @@
+# ui/scripts/bench_hedging.py
+"""
+Measure what hedging buys against local stand-in servers.
+
+    cd ui && python -m scripts.bench_hedging --requests 200 --concurrency 4
+
+Starts two fake Ollama servers from backend/scripts: the "primary" (standing in
+for Groq) is fast but 10% of its requests stall before the first token; the
+"alternate" (standing in for local Ollama) is slower but steady. The same
+workload runs primary-only and then hedged, and time-to-first-token
+percentiles are printed for both.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import httpx
+from langchain_community.llms import Ollama
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from components.hedging import HedgedChain, _pct
+
+BACKEND_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "backend")
+PRIMARY_PORT, ALTERNATE_PORT = 11511, 11512
+
+prompt_template = PromptTemplate.from_template("Context: {context}\n\nUser: {user_input}\n\nAssistant: ")
+
+
+def start_servers(slow_rate, slow_delay):
+    servers = [
+        (PRIMARY_PORT, ["--first-token-delay", "0.1", "--slow-rate", str(slow_rate), "--slow-delay", str(slow_delay)]),
+        (ALTERNATE_PORT, ["--first-token-delay", "0.4"]),
+    ]
+    procs = [subprocess.Popen([sys.executable, "-m", "scripts.fake_ollama", "--port", str(port),
+                               "--tokens", "20", "--token-delay", "0.01", *extra], cwd=BACKEND_DIR)
+             for port, extra in servers]
+    deadline = time.time() + 15
+    for port, _ in servers:
+        while time.time() < deadline:
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/api/tags", timeout=0.5)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+    return procs
+
+
+def chain_for(port):
+    llm = Ollama(model="llama3.2:3b", base_url=f"http://127.0.0.1:{port}")
+    return prompt_template | llm | StrOutputParser()
+
+
+async def run(chain, requests, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+    ttfts = []
+
+    async def one(i):
+        async with sem:
+            start = time.monotonic()
+            first = True
+            async for _ in chain.astream({"user_input": f"question {i}", "context": ""}):
+                if first:
+                    ttfts.append(time.monotonic() - start)
+                    first = False
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return ttfts
+
+
+def report(name, ttfts):
+    print(f"{name:13} p50={_pct(ttfts, 50):.3f}s p95={_pct(ttfts, 95):.3f}s p99={_pct(ttfts, 99):.3f}s")
+
+
+async def main_async(args):
+    primary_only = await run(chain_for(PRIMARY_PORT), args.requests, args.concurrency)
+
+    hedged = HedgedChain(chain_for(PRIMARY_PORT), chain_for(ALTERNATE_PORT),
+                         percentile=args.percentile, initial_delay=0.5)
+    await run(hedged, 20, args.concurrency)  # warm up the delay estimate
+    hedged_ttfts = await run(hedged, args.requests, args.concurrency)
+
+    report("primary only", primary_only)
+    report("hedged", hedged_ttfts)
+    m = hedged.metrics()
+    print(f"hedge delay {m['hedge_delay_s']}s, hedge rate {m['hedge_rate']:.1%}, "
+          f"alternate wins {m['alternate_wins']}/{m['requests']}")
+    for q in (95, 99):
+        print(f"p{q} saved: {_pct(primary_only, q) - _pct(hedged_ttfts, q):.3f}s "
+              f"(chain's own estimate {m[f'saved_p{q}_s']}s)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--percentile", type=float, default=90)
+    ap.add_argument("--slow-rate", type=float, default=0.1)
+    ap.add_argument("--slow-delay", type=float, default=3.0)
+    args = ap.parse_args()
+
+    procs = start_servers(args.slow_rate, args.slow_delay)
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        for p in procs:
+            p.terminate()
+
+
+if __name__ == "__main__":
+    main()
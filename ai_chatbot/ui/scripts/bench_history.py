@@ -0,0 +1,97 @@
+# ui/scripts/bench_history.py
+"""
+Rerun latency over a long chat session: render everything vs ChatHistory.
+
+    cd ui && python -m scripts.bench_history --turns 500
+
+Drives the chat loop of ui/app.py with Streamlit's AppTest (a canned answer
+stands in for the LLM), once keeping every message in st.session_state.messages
+and rendering all of them, once with components/history.py. Prints the mean
+rerun time at several points of the session and the size of the session state.
+"""
+import argparse
+import os
+import pickle
+import statistics
+import time
+from streamlit.testing.v1 import AppTest
+
+UI_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ANSWER = ("Here is a **detailed** answer with a list:\\n\\n- first point about the question\\n"
+          "- second point with `code`\\n- third point\\n\\n" + "More explanation follows here. " * 12)
+
+FULL = f'''
+import streamlit as st
+if "messages" not in st.session_state:
+    st.session_state.messages = []
+for message in st.session_state.messages:
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+if prompt := st.chat_input("Ask anything..."):
+    st.session_state.messages.append({{"role": "user", "content": prompt}})
+    with st.chat_message("user"):
+        st.markdown(prompt)
+    with st.chat_message("assistant"):
+        response = "{ANSWER}"
+        st.markdown(response)
+    st.session_state.messages.append({{"role": "assistant", "content": response}})
+'''
+
+BOUNDED = f'''
+import sys
+sys.path.insert(0, {UI_DIR!r})
+import streamlit as st
+from components.history import ChatHistory
+from components.history_view import render_history
+if "history" not in st.session_state:
+    st.session_state.history = ChatHistory()
+    st.session_state.history_page = 0
+history = st.session_state.history
+render_history(history)
+if prompt := st.chat_input("Ask anything..."):
+    st.session_state.history_page = 0
+    context = history.context()
+    history.append("user", prompt)
+    with st.chat_message("user"):
+        st.markdown(prompt)
+    with st.chat_message("assistant"):
+        response = "{ANSWER}"
+        st.markdown(response)
+    history.append("assistant", response)
+    if history.needs_compaction():
+        history.compact()
+'''
+
+
+def session(script, turns, checkpoints):
+    at = AppTest.from_string(script, default_timeout=60)
+    at.run()
+    times, results = [], {}
+    for turn in range(1, turns + 1):
+        at.chat_input[0].set_value(f"Question number {turn}: how does feature {turn % 17} work?")
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+        if turn in checkpoints:
+            state = {k: at.session_state[k] for k in ("messages", "history") if k in at.session_state}
+            results[turn] = (statistics.mean(times[-10:]), len(pickle.dumps(state)))
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--turns", type=int, default=500)
+    args = ap.parse_args()
+    checkpoints = sorted({t for t in (10, 50, 100, 250, 500, args.turns) if t <= args.turns})
+
+    full = session(FULL, args.turns, checkpoints)
+    bounded = session(BOUNDED, args.turns, checkpoints)
+    print(f"{'turn':>5}  {'full rerun':>10}  {'bounded rerun':>13}  {'full state':>10}  {'bounded state':>13}")
+    for turn in checkpoints:
+        print(f"{turn:5d}  {full[turn][0] * 1e3:8.1f}ms  {bounded[turn][0] * 1e3:11.1f}ms  "
+              f"{full[turn][1] / 1024:8.0f}KB  {bounded[turn][1] / 1024:11.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
 import streamlit as st
 import os
+import sys
+from pathlib import Path
+
+# Chat history (paging, summaries) is shared with ai_chatbot/ui; deploy from the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "ai_chatbot" / "ui"))
+from components.history import SUMMARY_PROMPT, ChatHistory
+from components.history_view import render_history
 
 # Streamlit Secrets (MUST HAVE GROQ_API_KEY)
 GROQ_API_KEY = st.secrets.get("GROQ_API_KEY")
@@ -39,21 +46,35 @@ def create_chain():
     chain = prompt_template | llm | StrOutputParser()
     return chain
 
+@st.cache_resource
+def create_summary_chain():
+    llm = ChatGroq(
+        groq_api_key=GROQ_API_KEY,
+        model_name="llama-3.1-8b-instant",
+        temperature=0
+    )
+    return PromptTemplate.from_template(SUMMARY_PROMPT) | llm | StrOutputParser()
+
+def summarize(summary, turns):
+    return create_summary_chain().invoke({"summary": summary or "(none)", "turns": turns, "words": 150})
+
 # UI
 st.set_page_config(page_title="AI Chatbot", page_icon="🤖", layout="centered")
 
 st.title("🤖 AI Chatbot")
 st.caption("Powered by Groq + LangChain")
 
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-
-for message in st.session_state.messages:
-    with st.chat_message(message["role"]):
-        st.markdown(message["content"])
+# Only one page of messages is rendered per rerun; older turns are summarized into the context
+if "history" not in st.session_state:
+    st.session_state.history = ChatHistory(page_size=20, max_messages=200, context_tokens=1000)
+    st.session_state.history_page = 0
+history = st.session_state.history
+render_history(history)
 
 if prompt := st.chat_input("Ask anything..."):
-    st.session_state.messages.append({"role": "user", "content": prompt})
+    st.session_state.history_page = 0
+    context = history.context()
+    history.append("user", prompt)
     with st.chat_message("user"):
         st.markdown(prompt)
 
@@ -62,10 +83,13 @@ if prompt := st.chat_input("Ask anything..."):
             chain = create_chain()
             response = chain.invoke({
                 "user_input": prompt,
-                "context": ""
+                "context": context
             })
         st.markdown(response)
-        st.session_state.messages.append({"role": "assistant", "content": response})
+        history.append("assistant", response)
+    if history.needs_compaction():
+        with st.spinner("Summarizing earlier messages..."):
+            history.compact(summarize)
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("**Status:** ✅ Live with Groq!")
\ No newline at end of file
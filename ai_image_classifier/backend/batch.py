@@ -0,0 +1,387 @@
+"""
+Batch classification: a directory, glob or list of images through one ImageClassifier.
+
+Pipeline:
+  - read + validate + resize + encode in a process pool (CPU-bound, off the event loop)
+  - inference in `concurrency` async workers, each request taking a token from the
+    backend's bucket (RATE_LIMITS, requests per minute); a 429 empties the bucket
+    until Retry-After and the image is retried
+  - optionally several images per request (images_per_request); images whose part of
+    the answer is missing or malformed are classified again one by one
+  - every result is appended to JSONL or CSV as soon as it arrives; with resume,
+    images already in the output without an error are skipped
+  - with a classifier cache, the workers also hash each image and cache hits skip
+    the rate limiter and inference
+  - with a cascade, the local CLIP model runs first (in a thread, one image at a
+    time) and only escalated images reach the rate limiter and the vision LLM
+
+Run from the project folder:
+    python -m backend.batch photos/ "more/*.png" --mode groq --output results.jsonl
+"""
+
+import argparse
+import asyncio
+import base64
+import csv
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from .cache import ResultCache
+from .classifier import (BATCH_LAYOUT, CASCADE_MARGIN, MAX_IMAGES_PER_REQUEST, ImageClassifier, RateLimited,
+                         encode_prepared, prepare_image, preprocess_hashed)
+from .zero_shot import DEFAULT_MODEL, ZeroShotClassifier
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif"}
+
+# Requests per minute per backend (None = only bounded by concurrency)
+RATE_LIMITS = {"groq": 30, "ollama": None}
+
+CSV_FIELDS = ["path", "label", "confidence", "reason", "seconds"]
+
+
+def collect_images(images: Union[str, Iterable[str]]) -> List[str]:
+    """
+    Expand directories (recursively) and glob patterns; keep explicit files as given.
+    """
+    if isinstance(images, str):
+        images = [images]
+    paths = []
+    for item in images:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, f) for f in sorted(files)
+                             if os.path.splitext(f)[1].lower() in IMAGE_EXTENSIONS)
+        elif os.path.isfile(item):
+            paths.append(item)
+        else:
+            paths.extend(sorted(p for p in glob.glob(item, recursive=True)
+                                if os.path.splitext(p)[1].lower() in IMAGE_EXTENSIONS))
+    return list(dict.fromkeys(paths))  # drop duplicates, keep order
+
+
+def _prepare(path: str, max_side: int, quality: int, with_hash: bool):
+    """
+    Worker process: file -> (path, base64 JPEG or None, error or None, seconds, pHash or None).
+    """
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as f:
+            image_bytes = f.read()
+        if with_hash:  # one decode for the hash and the request image
+            img, key = preprocess_hashed(image_bytes, max_side)
+            img_b64 = encode_prepared(image_bytes, img, max_side, quality)
+        else:
+            img_b64, key = prepare_image(image_bytes, max_side, quality), None
+    except Exception as e:
+        return path, None, str(e), time.perf_counter() - start, None
+    return path, img_b64, None, time.perf_counter() - start, key
+
+
+class TokenBucket:
+    """
+    `rate_per_minute` requests with bursts of up to `burst`; pause() blocks everyone
+    until a server-given Retry-After has passed.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class ResultWriter:
+    """
+    Appends one row per image to .jsonl or .csv and flushes, so an interrupted run keeps
+    everything finished so far. A retried image gets a new row; the last one counts.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_csv = path.lower().endswith(".csv")
+        self._file = None
+        self._csv = None
+
+    def completed(self) -> set:
+        """
+        Paths whose latest row has no error.
+        """
+        if not os.path.exists(self.path):
+            return set()
+        latest = {}
+        with open(self.path, newline="", encoding="utf-8") as f:
+            rows = csv.DictReader(f) if self.is_csv else (json.loads(line) for line in f if line.strip())
+            for row in rows:
+                latest[row["path"]] = row.get("label")
+        return {path for path, label in latest.items() if label != "error"}
+
+    def __enter__(self):
+        new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, "a", newline="", encoding="utf-8")
+        if self.is_csv:
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if new:
+                self._csv.writeheader()
+        return self
+
+    def write(self, row: Dict):
+        if self._csv:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+async def request_with_backoff(call: Callable[[], Awaitable], bucket: Optional[TokenBucket], max_retries: int,
+                               stages: Dict, counts: Dict):
+    """
+    One backend request behind the rate limiter, retried on 429 (after Retry-After, else
+    exponential back-off); None if it never got through. Adds to stages["rate_limit_wait"],
+    stages["inference"] and counts["rate_limited"].
+    """
+    for attempt in range(max_retries + 1):
+        if bucket:
+            start = time.perf_counter()
+            await bucket.acquire()
+            stages["rate_limit_wait"] += time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            result = await call()
+            stages["inference"] += time.perf_counter() - start
+            return result
+        except RateLimited as e:
+            stages["inference"] += time.perf_counter() - start
+            counts["rate_limited"] += 1
+            delay = e.retry_after if e.retry_after is not None else min(60.0, 2.0 ** attempt)
+            if bucket:
+                bucket.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+    return None
+
+
+def rate_limited_error(max_retries: int) -> Dict:
+    return {"label": "error", "confidence": 0.0, "reason": f"Rate limited {max_retries + 1} times"}
+
+
+async def aclassify_many(classifier: ImageClassifier, images: Union[str, Iterable[str]],
+                         output: Optional[str] = None, concurrency: int = 4,
+                         rpm: Optional[float] = -1, burst: int = 1, processes: Optional[int] = None,
+                         resume: bool = True, max_retries: int = 5, images_per_request: int = 1,
+                         layout: Optional[str] = None,
+                         on_result: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Classify many images; see the module docstring. rpm=-1 uses RATE_LIMITS for the
+    classifier's mode, None disables the limiter. images_per_request > 1 packs images
+    into one request (layout "images" or "grid", default per backend). Returns a report
+    with throughput and per-stage seconds; it includes the results unless `output` or
+    `on_result` takes them.
+    """
+    paths = collect_images(images)
+    classifier._async_client = None  # async clients belong to one event loop; each run has its own
+    writer = ResultWriter(output) if output else None
+    done = writer.completed() if writer and resume else set()
+    todo = [p for p in paths if p not in done]
+    rpm = RATE_LIMITS.get(classifier.mode) if rpm == -1 else rpm
+    bucket = TokenBucket(rpm, burst) if rpm else None
+    processes = processes or os.cpu_count() or 1
+    keep = output is None and on_result is None
+    layout = layout or BATCH_LAYOUT.get(classifier.mode, "images")
+    if layout == "images" and classifier.mode in MAX_IMAGES_PER_REQUEST:
+        images_per_request = min(images_per_request, MAX_IMAGES_PER_REQUEST[classifier.mode])
+    results = []
+    stages = {"preprocess": 0.0, "rate_limit_wait": 0.0, "inference": 0.0, "write": 0.0}
+    if classifier.cascade is not None:
+        stages["zero_shot"] = 0.0
+    counts = {"classified": 0, "errors": 0, "rate_limited": 0, "cache_hits": 0, "answered_locally": 0, "escalated": 0,
+              "fallbacks": 0}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * images_per_request * 2)
+
+    async def produce(pool):
+        loop = asyncio.get_running_loop()
+        pending = set()
+        for path in todo:
+            pending.add(loop.run_in_executor(pool, _prepare, path, classifier.max_side, classifier.quality,
+                                             classifier.cache is not None))
+            if len(pending) >= processes * 2:  # bound the prepared images held in memory
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in finished:
+                    await queue.put(future.result())
+        for future in asyncio.as_completed(pending):
+            await queue.put(await future)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    def request(call: Callable[[], Awaitable]):
+        return request_with_backoff(call, bucket, max_retries, stages, counts)
+
+    async def infer(img_b64: str) -> Dict:
+        result = await request(lambda: classifier.aclassify_encoded(img_b64))
+        return result or rate_limited_error(max_retries)
+
+    async def infer_group(images_b64: List[str]) -> List[Dict]:
+        if len(images_b64) == 1:
+            return [await infer(images_b64[0])]
+        results = await request(lambda: classifier.aclassify_group(images_b64, layout)) or [None] * len(images_b64)
+        counts["fallbacks"] += results.count(None)
+        return [result or await infer(img_b64) for result, img_b64 in zip(results, images_b64)]
+
+    def finish(path: str, result: Dict, start: float):
+        row = {"path": path, **result, "seconds": round(time.perf_counter() - start, 3)}
+        counts["errors" if row.get("label") == "error" else "classified"] += 1
+        start = time.perf_counter()
+        if writer:
+            writer.write(row)
+        if on_result:
+            on_result(row)
+        if keep:
+            results.append(row)
+        stages["write"] += time.perf_counter() - start
+
+    async def work():
+        finished = False
+        while not finished:
+            group = []  # images for one request: (path, base64 JPEG, cache key, start)
+            while len(group) < images_per_request:
+                if (item := await queue.get()) is None:
+                    finished = True
+                    break
+                path, img_b64, error, seconds, key = item
+                stages["preprocess"] += seconds
+                start = time.perf_counter()
+                cached = classifier.cache.get(classifier.cache_scope, key) if key is not None else None
+                if error:
+                    finish(path, {"label": "error", "confidence": 0.0, "reason": error}, start)
+                elif cached is not None:
+                    counts["cache_hits"] += 1
+                    finish(path, cached, start)
+                else:
+                    result = None
+                    if classifier.cascade is not None:
+                        local_start = time.perf_counter()
+                        result = await asyncio.to_thread(classifier.zero_shot, base64.b64decode(img_b64))
+                        stages["zero_shot"] += time.perf_counter() - local_start
+                        counts["answered_locally" if result is not None else "escalated"] += 1
+                    if result is None:
+                        group.append((path, img_b64, key, start))
+                        continue
+                    finish(path, result, start)  # local answers are not cached, see classify()
+            if group:
+                answers = await infer_group([img_b64 for _, img_b64, _, _ in group])
+                for (path, _, key, start), result in zip(group, answers):
+                    if key is not None:
+                        classifier.cache.put(classifier.cache_scope, key, result)
+                    finish(path, result, start)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        if writer:
+            writer.__enter__()
+        try:
+            await asyncio.gather(produce(pool), *(work() for _ in range(concurrency)))
+        finally:
+            if writer:
+                writer.__exit__()
+    elapsed = time.perf_counter() - start
+
+    processed = counts["classified"] + counts["errors"]
+    return {
+        "images": len(paths),
+        "skipped": len(paths) - len(todo),
+        **counts,
+        "seconds": round(elapsed, 3),
+        "images_per_second": round(processed / elapsed, 3) if elapsed else 0.0,
+        "images_per_request": images_per_request,
+        # summed over workers, so stages overlap and can add up to more than `seconds`
+        "stage_seconds": {k: round(v, 3) for k, v in stages.items()},
+        "results": results,
+    }
+
+
+def classify_many(classifier: ImageClassifier, images: Union[str, Iterable[str]], **kwargs) -> Dict:
+    """
+    Blocking wrapper around aclassify_many (scripts, notebooks, Streamlit).
+    """
+    return asyncio.run(aclassify_many(classifier, images, **kwargs))
+
+
+def format_report(report: Dict) -> str:
+    processed = max(1, report["classified"] + report["errors"])
+    per_image = ", ".join(f"{stage} {seconds / processed * 1000:.0f} ms"
+                          for stage, seconds in report["stage_seconds"].items())
+    cascade = report["answered_locally"] + report["escalated"]
+    escalated = f", {report['escalated']}/{cascade} escalated to the LLM" if cascade else ""
+    if report["images_per_request"] > 1:
+        escalated += f", up to {report['images_per_request']} per request ({report['fallbacks']} retried alone)"
+    return (f"{report['classified']} classified, {report['errors']} errors, {report['skipped']} skipped "
+            f"of {report['images']} in {report['seconds']:.1f}s ({report['images_per_second']:.2f} img/s); "
+            f"rate limited {report['rate_limited']}x, {report['cache_hits']} cache hits{escalated}\n"
+            f"per image: {per_image}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify many images into JSONL or CSV.")
+    parser.add_argument("images", nargs="+", help="image files, directories or glob patterns")
+    parser.add_argument("--mode", default="ollama", choices=["ollama", "groq"])
+    parser.add_argument("--labels", help="comma-separated labels (default: prompts.DEFAULT_LABELS)")
+    parser.add_argument("--output", "-o", default="results.jsonl", help=".jsonl or .csv")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight")
+    parser.add_argument("--rpm", type=float, default=-1, help="requests per minute (default: per backend)")
+    parser.add_argument("--burst", type=int, default=1)
+    parser.add_argument("--processes", type=int, help="preprocessing processes (default: CPU count)")
+    parser.add_argument("--no-resume", action="store_true", help="classify images already in the output again")
+    parser.add_argument("--cache", help="SQLite file for the near-duplicate result cache")
+    parser.add_argument("--cache-radius", type=int, default=6, help="max differing pHash bits for a hit")
+    parser.add_argument("--images-per-request", type=int, default=1, help="images packed into one LLM request")
+    parser.add_argument("--layout", choices=["images", "grid"],
+                        help="attach the images in order, or tile them into one grid (default: per backend)")
+    parser.add_argument("--cascade", action="store_true", help="answer confident images with a local CLIP model")
+    parser.add_argument("--cascade-margin", type=float, default=CASCADE_MARGIN,
+                        help="min probability lead of the top label to skip the LLM")
+    parser.add_argument("--cascade-model", default=DEFAULT_MODEL, help="sentence-transformers CLIP model")
+    args = parser.parse_args()
+
+    labels = [l.strip() for l in args.labels.split(",") if l.strip()] if args.labels else None
+    cache = ResultCache(args.cache, radius=args.cache_radius) if args.cache else None
+    cascade = ZeroShotClassifier(args.cascade_model) if args.cascade else None
+    classifier = ImageClassifier(mode=args.mode, labels=labels, cache=cache, cascade=cascade,
+                                 cascade_margin=args.cascade_margin)
+    try:
+        report = classify_many(classifier, args.images, output=args.output, concurrency=args.concurrency,
+                               rpm=args.rpm, burst=args.burst, processes=args.processes,
+                               resume=not args.no_resume, images_per_request=args.images_per_request,
+                               layout=args.layout)
+    finally:
+        if cache:
+            cache.close()
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
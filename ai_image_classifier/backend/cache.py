@@ -0,0 +1,196 @@
+"""
+Persistent classification cache for repeated and near-duplicate images.
+
+- key: 64-bit perceptual hash (DCT pHash of a 32x32 grayscale thumbnail) of the
+  already decoded and downsized image, within a scope of backend + model + label set
+- near-duplicates (re-compressed, resized, lightly edited) hit when their hash is
+  within `radius` bits (Hamming distance), found by multi-index hashing per scope
+- least recently used entries go beyond `max_entries`
+- entries live in SQLite so they survive restarts; hits only touch memory
+  (last use is written back by flush()/close())
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    m = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n)) * np.sqrt(2 / n)
+    m[0] /= np.sqrt(2)
+    return m
+
+
+_DCT = _dct_matrix(32)
+
+
+# Thumbnails flatter than this (std of gray levels) have no structure to hash:
+# their bits would be noise, and a plain red and a plain blue image could collide
+MIN_CONTRAST = 2.0
+
+
+def image_hash(img: Image.Image) -> Optional[int]:
+    """
+    pHash: low 8x8 DCT frequencies of a 32x32 grayscale thumbnail, one bit per
+    coefficient above their median. Pass the image preprocessing already decoded at
+    reduced scale (classifier.preprocess_hashed); hashing it takes well under a millisecond.
+    None for (nearly) flat images, which are not cached.
+    """
+    if img.mode not in ("L", "RGB"):
+        img = img.convert("RGB")
+    # sample a 128x128 grid first: filtering the whole decoded image costs 1-2 ms
+    small = img.resize((128, 128), Image.NEAREST).convert("L").resize((32, 32), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.float32)
+    if pixels.std() < MIN_CONTRAST:
+        return None
+    low = (_DCT @ pixels @ _DCT.T)[:8, :8].flatten()
+    bits = low > np.median(low[1:])  # the DC term only reflects overall brightness
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class MultiIndex:
+    """
+    Multi-index hashing: the 64 bits are split into radius + 1 chunks. Two hashes
+    within `radius` bits agree exactly on at least one chunk (pigeonhole), so a
+    search only compares hashes that share a chunk with the query.
+    """
+
+    def __init__(self, radius: int):
+        n = min(64, radius + 1)
+        bounds = [round(i * 64 / n) for i in range(n + 1)]
+        self._chunks = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+        self._tables: List[Dict[int, set]] = [{} for _ in self._chunks]
+
+    def _keys(self, h: int):
+        return [(h >> lo) & mask for lo, mask in self._chunks]
+
+    def add(self, h: int):
+        for table, key in zip(self._tables, self._keys(h)):
+            table.setdefault(key, set()).add(h)
+
+    def remove(self, h: int):
+        for table, key in zip(self._tables, self._keys(h)):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(h)
+                if not bucket:
+                    del table[key]
+
+    def search(self, h: int, radius: int) -> List[Tuple[int, int]]:
+        """
+        (distance, hash) of every stored hash within `radius`.
+        """
+        candidates = set()
+        for table, key in zip(self._tables, self._keys(h)):
+            candidates.update(table.get(key, ()))
+        return [(d, c) for c in candidates if (d := hamming(h, c)) <= radius]
+
+
+class ResultCache:
+    def __init__(self, path: str = ":memory:", radius: int = 6, max_entries: int = 10000):
+        self.radius = radius
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], list]" = OrderedDict()  # LRU first: [result, last_used]
+        self._indexes: Dict[str, MultiIndex] = {}
+        self._touched = set()
+        self._lock = threading.Lock()  # Streamlit shares one classifier across sessions
+        self.hits_exact = self.hits_near = self.misses = self.evictions = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS results (scope TEXT, hash TEXT, result TEXT, last_used REAL, "
+                         "PRIMARY KEY (scope, hash))")
+        for scope, h, result, last_used in self._db.execute("SELECT * FROM results ORDER BY last_used"):
+            self._insert(scope, int(h, 16), json.loads(result), last_used)
+
+    @staticmethod
+    def scope(mode: str, model: str, labels: List[str]) -> str:
+        """
+        Results are only shared between requests with the same backend, model and labels.
+        """
+        key = json.dumps([mode, model, sorted(labels)])
+        return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    def _insert(self, scope: str, h: int, result: Dict, last_used: float):
+        self._entries[(scope, h)] = [result, last_used]
+        if scope not in self._indexes:
+            self._indexes[scope] = MultiIndex(self.radius)
+        self._indexes[scope].add(h)
+
+    def get(self, scope: str, h: int) -> Optional[Dict]:
+        """
+        Result for the nearest cached hash within `radius`, or None.
+        """
+        with self._lock:
+            key = (scope, h)
+            if key not in self._entries:
+                index = self._indexes.get(scope)
+                near = index.search(h, self.radius) if index else []
+                if not near:
+                    self.misses += 1
+                    return None
+                key = (scope, min(near)[1])
+                self.hits_near += 1
+            else:
+                self.hits_exact += 1
+            entry = self._entries[key]
+            entry[1] = time.time()
+            self._entries.move_to_end(key)
+            self._touched.add(key)
+            return dict(entry[0])
+
+    def put(self, scope: str, h: int, result: Dict):
+        """
+        Cache a successful result (errors and unparsable answers are not cached).
+        """
+        if result.get("label") in ("error", "unknown"):
+            return
+        with self._lock:
+            now = time.time()
+            self._insert(scope, h, dict(result), now)
+            self._entries.move_to_end((scope, h))
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                             (scope, f"{h:016x}", json.dumps(result), now))
+            while len(self._entries) > self.max_entries:
+                (old_scope, old_h), _ = self._entries.popitem(last=False)
+                self._touched.discard((old_scope, old_h))
+                self._indexes[old_scope].remove(old_h)
+                self._db.execute("DELETE FROM results WHERE scope = ? AND hash = ?", (old_scope, f"{old_h:016x}"))
+                self.evictions += 1
+            self._db.commit()
+
+    def flush(self):
+        """
+        Persist last-use times of hits, so LRU order survives a restart.
+        """
+        with self._lock:
+            rows = [(self._entries[k][1], k[0], f"{k[1]:016x}") for k in self._touched if k in self._entries]
+            self._db.executemany("UPDATE results SET last_used = ? WHERE scope = ? AND hash = ?", rows)
+            self._db.commit()
+            self._touched.clear()
+
+    def close(self):
+        self.flush()
+        self._db.close()
+
+    def stats(self) -> Dict:
+        lookups = self.hits_exact + self.hits_near + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "radius": self.radius,
+            "hits_exact": self.hits_exact,
+            "hits_near": self.hits_near,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_exact + self.hits_near) / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+        }
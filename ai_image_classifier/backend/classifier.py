@@ -6,37 +6,265 @@ Supports:
 
 Features:
   - Image validation (size, format)
-  - Auto-resize for efficiency
-  - Base64 encoding for API
+  - Auto-resize for efficiency (reduced-scale JPEG decoding, target size per backend)
+  - Base64 encoding for API; small JPEGs are sent as uploaded, without re-encoding
   - JSON response parsing with fallback
+  - Async inference for batches (see batch.py), with rate limits surfaced as RateLimited
+  - Optional ResultCache (cache.py): repeated and near-duplicate images skip inference
+  - Optional cascade (zero_shot.py): a local CLIP model answers confident cases,
+    only ambiguous images go to the vision LLM
+  - Video files and streams as a time-coded label timeline (see video.py)
+  - Several images per request for batches (attached in order, or tiled into one
+    numbered grid); malformed per-image answers are reported as None for a retry
 """
 
+import asyncio
 import base64
 import io
 import json
+import math
 import os
-from typing import Dict, List, Optional
-from PIL import Image
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageDraw, ImageFont
 import ollama
-from groq import Groq
+from groq import AsyncGroq, Groq, RateLimitError
 from dotenv import load_dotenv
-from .prompts import CLASSIFIER_PROMPT, DEFAULT_LABELS
+from .cache import ResultCache, image_hash
+from .prompts import BATCH_CLASSIFIER_PROMPT, BATCH_LAYOUTS, CLASSIFIER_PROMPT, DEFAULT_LABELS
+from .zero_shot import CLIP_SIDE, ZeroShotClassifier
 
 # Load environment variables (for Groq API key)
 load_dotenv()
 
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+MAX_SIDE = 1024
+
+# Target size and JPEG quality per backend. LLaVA tiles images at up to 672 px,
+# so anything larger only costs encode time and upload size there.
+PREPROCESS = {
+    "ollama": {"max_side": 672, "quality": 85},
+    "groq": {"max_side": 1024, "quality": 85},
+}
+
+# Several images per request: LLaVA is trained on one image per prompt, so it gets a
+# tiled grid; Groq takes up to 5 attached images per request.
+BATCH_LAYOUT = {"ollama": "grid", "groq": "images"}
+MAX_IMAGES_PER_REQUEST = {"groq": 5}
+
+# Cascade: CLIP answers when its top label's probability beats the runner-up by this much
+CASCADE_MARGIN = 0.5
+
+
+class RateLimited(Exception):
+    """The backend answered 429; retry after `retry_after` seconds (None = not given)."""
+
+    def __init__(self, retry_after: Optional[float] = None):
+        super().__init__(f"rate limited (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+def _open(image_bytes: bytes) -> Image.Image:
+    """
+    Size check + lazy open (reads the header only).
+    """
+    if len(image_bytes) > MAX_IMAGE_BYTES:
+        raise ValueError("Image exceeds 5MB limit")
+    try:
+        return Image.open(io.BytesIO(image_bytes))
+    except Exception as e:
+        raise ValueError(f"Invalid or corrupted image: {e}")
+
+
+def _decode(img: Image.Image, max_side: int) -> Image.Image:
+    try:
+        # JPEG: let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of full resolution
+        img.draft("RGB", (max_side, max_side))
+        img.load()  # decode here, so corrupt data is reported as ValueError
+        return img if img.mode == "RGB" else img.convert("RGB")
+    except Exception as e:
+        raise ValueError(f"Invalid or corrupted image: {e}")
+
+
+def _shrink(img: Image.Image, max_side: int) -> Image.Image:
+    img = _decode(img, max_side)
+    img.thumbnail((max_side, max_side))  # Reduce compute & memory
+    return img
+
+
+def preprocess_image(image_bytes: bytes, max_side: int = MAX_SIDE) -> Image.Image:
+    """
+    Validate and preprocess image.
+    - Rejects files > 5MB
+    - Converts to RGB
+    - Resizes to max `max_side` px per side
+    """
+    return _shrink(_open(image_bytes), max_side)
+
+
+def _passes_through(img: Image.Image, image_bytes: bytes, max_side: int) -> bool:
+    """
+    A complete RGB JPEG already within `max_side` is sent as uploaded.
+    """
+    return (img.format == "JPEG" and img.mode == "RGB" and max(img.size) <= max_side
+            and image_bytes.endswith(b"\xff\xd9"))  # EOI marker: not truncated
+
+
+def _hash_or_none(img: Image.Image) -> Optional[int]:
+    try:
+        return image_hash(img)
+    except Exception:
+        return None  # not cached, but still classified
+
+
+def preprocess_hashed(image_bytes: bytes, max_side: int = MAX_SIDE) -> Tuple[Optional[Image.Image], Optional[int]]:
+    """
+    Preprocessing's one (reduced-scale) decode, hashed for the cache: (decoded RGB image,
+    pHash). The final resize and JPEG encode are left to encode_prepared(), so a cache hit
+    skips them. The image is None for a JPEG that prepare_image() passes through as
+    uploaded; its hash comes from a 1/8-scale draft decode.
+    """
+    img = _open(image_bytes)
+    if _passes_through(img, image_bytes, max_side):
+        img.draft("L", (64, 64))
+        return None, _hash_or_none(img)
+    img = _decode(img, max_side)
+    return img, _hash_or_none(img)
+
+
+def encode_prepared(image_bytes: bytes, img: Optional[Image.Image], max_side: int = MAX_SIDE,
+                    quality: int = 85) -> str:
+    """
+    Base64 JPEG for a preprocess_hashed() result; same as prepare_image(image_bytes).
+    """
+    if img is None:
+        return base64.b64encode(image_bytes).decode("ascii")
+    img.thumbnail((max_side, max_side))
+    return encode_image(img, quality)
+
+
+def encode_image(img: Image.Image, quality: int = 85) -> str:
+    """
+    Convert PIL image to base64 string (used by both backends).
+    """
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG", quality=quality)
+    return base64.b64encode(buffered.getbuffer()).decode("ascii")  # no copy of the JPEG bytes
+
+
+def prepare_image(image_bytes: bytes, max_side: int = MAX_SIDE, quality: int = 85) -> str:
+    """
+    Preprocess + encode in one picklable call (runs in batch.py's process pool).
+    A complete RGB JPEG already within `max_side` is passed through as uploaded.
+    """
+    img = _open(image_bytes)
+    if _passes_through(img, image_bytes, max_side):
+        return base64.b64encode(image_bytes).decode("ascii")
+    return encode_image(_shrink(img, max_side), quality)
+
+
+def parse_response(raw_text: str) -> Dict:
+    try:
+        return json.loads(raw_text)
+    except json.JSONDecodeError:
+        return {"label": "unknown", "confidence": 0.0, "reason": "Failed to parse model output"}
+
+
+def parse_group_response(raw_text: str, count: int, labels: List[str]) -> List[Optional[Dict]]:
+    """
+    Per-image results from a batched answer: a JSON array of {"image", "label",
+    "confidence", "reason"}, matched by "image" number (1-based), or by position
+    when there are no numbers and the count is right. Missing, duplicated or
+    unknown-label entries are None, so the caller classifies those images alone.
+    """
+    results: List[Optional[Dict]] = [None] * count
+    start, end = raw_text.find("["), raw_text.rfind("]")  # tolerate fences or prose around it
+    try:
+        items = json.loads(raw_text[start:end + 1] if 0 <= start < end else raw_text)
+    except json.JSONDecodeError:
+        return results
+    if isinstance(items, dict):
+        items = items.get("results", [])
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return results
+    if all("image" in item for item in items):
+        numbered = [(item["image"], item) for item in items]
+    elif len(items) == count:
+        numbered = list(enumerate(items, 1))
+    else:
+        return results
+    known = {label.lower(): label for label in labels}
+    answers = Counter(str(number) for number, _ in numbered)
+    for number, item in numbered:
+        label = known.get(str(item.get("label", "")).strip().lower())
+        if label is None or answers[str(number)] > 1:  # two answers for one image: trust neither
+            continue
+        try:
+            number, confidence = int(number), float(item.get("confidence", 0.0))
+        except (TypeError, ValueError):
+            continue
+        if 1 <= number <= count:
+            results[number - 1] = {"label": label, "confidence": confidence, "reason": str(item.get("reason", ""))}
+    return results
+
+
+def make_mosaic(images_b64: List[str], max_side: int = MAX_SIDE, quality: int = 85) -> str:
+    """
+    Tile prepared images into one square-ish grid of at most `max_side` px, each tile
+    numbered 1..n in its top-left corner (left to right, then top to bottom).
+    """
+    cols = math.ceil(math.sqrt(len(images_b64)))
+    rows = math.ceil(len(images_b64) / cols)
+    gap = 4
+    tile = (max_side - gap * (cols - 1)) // cols
+    grid = Image.new("RGB", (cols * tile + gap * (cols - 1), rows * tile + gap * (rows - 1)), "white")
+    draw = ImageDraw.Draw(grid)
+    font = ImageFont.load_default(size=max(12, tile // 8))
+    for i, img_b64 in enumerate(images_b64):
+        img = Image.open(io.BytesIO(base64.b64decode(img_b64)))
+        img.draft("RGB", (tile, tile))
+        img = img.convert("RGB")
+        img.thumbnail((tile, tile))
+        x, y = (i % cols) * (tile + gap), (i // cols) * (tile + gap)
+        grid.paste(img, (x + (tile - img.width) // 2, y + (tile - img.height) // 2))
+        box = draw.textbbox((x + 4, y + 4), str(i + 1), font=font)
+        draw.rectangle((box[0] - 4, box[1] - 4, box[2] + 4, box[3] + 4), fill="black")
+        draw.text((x + 4, y + 4), str(i + 1), fill="yellow", font=font)
+    return encode_image(grid, quality)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
 class ImageClassifier:
-    def __init__(self, mode: str = "ollama", labels: Optional[List[str]] = None):
+    def __init__(self, mode: str = "ollama", labels: Optional[List[str]] = None,
+                 max_side: Optional[int] = None, quality: Optional[int] = None,
+                 cache: Optional[ResultCache] = None, cascade: Optional[ZeroShotClassifier] = None,
+                 cascade_margin: float = CASCADE_MARGIN):
         """
         Initialize classifier with mode and custom labels.
-        
+
         Args:
             mode (str): "ollama" for local, "groq" for cloud
             labels (List[str], optional): Custom classification labels
+            max_side, quality (int, optional): Override PREPROCESS for this backend
+            cache (ResultCache, optional): Reuse results for the same or near-identical images
+            cascade (ZeroShotClassifier, optional): Try local CLIP first, escalate below cascade_margin
         """
         self.mode = mode.lower()
         self.labels = labels or DEFAULT_LABELS
         self.label_str = ", ".join(self.labels)
+        settings = PREPROCESS.get(self.mode, {"max_side": MAX_SIDE, "quality": 85})
+        self.max_side = max_side or settings["max_side"]
+        self.quality = quality or settings["quality"]
+        self._async_client = None
+        self.model = "llava"
 
         # Setup Groq client if in cloud mode
         if self.mode == "groq":
@@ -46,90 +274,189 @@ class ImageClassifier:
             self.client = Groq(api_key=api_key)
             self.model = "llama-3.2-11b-vision-preview"  # Fast vision model
 
+        self.cache = cache
+        self.cache_scope = ResultCache.scope(self.mode, self.model, self.labels)
+        self.cascade = cascade
+        self.cascade_margin = cascade_margin
+
     def _preprocess_image(self, image_bytes: bytes) -> Image.Image:
+        return preprocess_image(image_bytes, self.max_side)
+
+    def _encode_image(self, img: Image.Image) -> str:
+        return encode_image(img, self.quality)
+
+    def prepare(self, image_bytes: bytes) -> str:
         """
-        Validate and preprocess image.
-        - Rejects files > 5MB
-        - Converts to RGB
-        - Resizes to max 1024px per side
+        Bytes -> base64 JPEG at this backend's size and quality.
         """
-        if len(image_bytes) > 5 * 1024 * 1024:
-            raise ValueError("Image exceeds 5MB limit")
-        
-        try:
-            img = Image.open(io.BytesIO(image_bytes))
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            img.thumbnail((1024, 1024))  # Reduce compute & memory
-            return img
-        except Exception as e:
-            raise ValueError(f"Invalid or corrupted image: {e}")
+        return prepare_image(image_bytes, self.max_side, self.quality)
 
-    def _encode_image(self, img: Image.Image) -> str:
+    def cache_key(self, image_bytes: bytes) -> Optional[int]:
         """
-        Convert PIL image to base64 string (used by both backends).
+        Perceptual hash of the preprocessed image; None for flat images.
         """
-        buffered = io.BytesIO()
-        img.save(buffered, format="JPEG", quality=85)
-        return base64.b64encode(buffered.getvalue()).decode()
+        return preprocess_hashed(image_bytes, self.max_side)[1]
 
-    def _classify_ollama(self, img: Image.Image) -> Dict:
+    def zero_shot(self, image_bytes: bytes) -> Optional[Dict]:
+        """
+        Cascade fast path: the local CLIP answer when it is confident, None to escalate
+        (also without a cascade, or for invalid images; prepare() then reports the error).
+        """
+        if self.cascade is None:
+            return None
+        try:
+            img = _open(image_bytes)
+            img.draft("RGB", (CLIP_SIDE, CLIP_SIDE))  # CLIP's processor does the final resize
+            return self.cascade.classify(img.convert("RGB"), self.labels, self.cascade_margin)
+        except Exception:
+            return None
+
+    def _ollama_messages(self, images: List[str], prompt: Optional[str] = None) -> List[Dict]:
+        prompt = prompt or CLASSIFIER_PROMPT.format(labels=self.label_str)
+        return [{"role": "user", "content": prompt, "images": images}]
+
+    def _groq_messages(self, images: List[str], prompt: Optional[str] = None) -> List[Dict]:
+        prompt = prompt or CLASSIFIER_PROMPT.format(labels=self.label_str)
+        return [{
+            "role": "user",
+            "content": [{"type": "text", "text": prompt}] + [
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}
+                }
+                for img_b64 in images
+            ]
+        }]
+
+    def _classify_ollama(self, img_b64: str) -> Dict:
         """
         Run inference using local Ollama + LLaVA.
         Requires: `ollama serve` and `ollama pull llava`
         """
-        img_b64 = self._encode_image(img)
-        prompt = CLASSIFIER_PROMPT.format(labels=self.label_str)
-
         try:
             response = ollama.chat(
-                model="llava",  # ← Use vision model
-                messages=[{"role": "user", "content": prompt, "images": [img_b64]}]
+                model=self.model,  # ← Use vision model
+                messages=self._ollama_messages([img_b64])
                 )
-            raw_text = response["message"]["content"]
-            return json.loads(raw_text)
-        except json.JSONDecodeError:
-            return {"label": "unknown", "confidence": 0.0, "reason": "Failed to parse model output"}
+            return parse_response(response["message"]["content"])
         except Exception as e:
             return {"label": "error", "confidence": 0.0, "reason": f"Ollama error: {e}"}
 
-    def _classify_groq(self, img: Image.Image) -> Dict:
+    def _classify_groq(self, img_b64: str) -> Dict:
         """
         Run inference using Groq cloud API.
         Fast, rate-limited (free tier: ~30 req/min).
         """
-        img_b64 = self._encode_image(img)
-        prompt = CLASSIFIER_PROMPT.format(labels=self.label_str)
-
         try:
             completion = self.client.chat.completions.create(
                 model=self.model,
-                messages=[{
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": f"data:image/jpeg;base64,{img_b64}"}
-                        }
-                    ]
-                }],
+                messages=self._groq_messages([img_b64]),
                 temperature=0.1,   # Low for consistency
                 max_tokens=100     # Short JSON response
             )
-            raw_text = completion.choices[0].message.content
-            return json.loads(raw_text)
-        except json.JSONDecodeError:
-            return {"label": "unknown", "confidence": 0.0, "reason": "Failed to parse model output"}
+            return parse_response(completion.choices[0].message.content)
         except Exception as e:
             return {"label": "error", "confidence": 0.0, "reason": f"Groq API error: {e}"}
 
     def classify(self, image_bytes: bytes) -> Dict:
         """
-        Public method: Preprocess → classify → return JSON result.
+        Public method: preprocess → cache lookup → local CLIP → classify → return JSON result.
+        With a cache the image is decoded once, for both the hash and the request.
+        """
+        key = img = None
+        if self.cache is not None:
+            img, key = preprocess_hashed(image_bytes, self.max_side)
+            if key is not None:
+                cached = self.cache.get(self.cache_scope, key)
+                if cached is not None:
+                    return cached
+        result = self.zero_shot(image_bytes)
+        if result is None:
+            if self.cache is not None:
+                img_b64 = encode_prepared(image_bytes, img, self.max_side, self.quality)  # only on a miss
+            else:
+                img_b64 = self.prepare(image_bytes)
+            if self.mode == "ollama":
+                result = self._classify_ollama(img_b64)
+            else:
+                result = self._classify_groq(img_b64)
+            if key is not None:  # CLIP answers depend on the cascade and its margin, so only model answers are kept
+                self.cache.put(self.cache_scope, key, result)
+        return result
+
+    async def _achat(self, images: List[str], prompt: Optional[str] = None, max_tokens: int = 100) -> str:
+        """
+        One async request; returns the model's answer text.
         """
-        img = self._preprocess_image(image_bytes)
         if self.mode == "ollama":
-            return self._classify_ollama(img)
-        else:
-            return self._classify_groq(img)
\ No newline at end of file
+            if self._async_client is None:
+                self._async_client = ollama.AsyncClient()
+            response = await self._async_client.chat(model=self.model, messages=self._ollama_messages(images, prompt))
+            return response["message"]["content"]
+        if self._async_client is None:
+            self._async_client = AsyncGroq(api_key=self.client.api_key, max_retries=0)  # batch.py backs off
+        completion = await self._async_client.chat.completions.create(
+            model=self.model,
+            messages=self._groq_messages(images, prompt),
+            temperature=0.1,
+            max_tokens=max_tokens
+        )
+        return completion.choices[0].message.content
+
+    async def aclassify_encoded(self, img_b64: str) -> Dict:
+        """
+        Async inference on an already prepared image (see prepare).
+        Raises RateLimited on 429 so the caller can back off; other errors
+        become {"label": "error"} as in classify().
+        """
+        try:
+            return parse_response(await self._achat([img_b64]))
+        except RateLimitError as e:
+            raise RateLimited(_retry_after(e))
+        except ollama.ResponseError as e:
+            if e.status_code == 429:
+                raise RateLimited()
+            return {"label": "error", "confidence": 0.0, "reason": f"Ollama error: {e}"}
+        except Exception as e:
+            backend = "Ollama" if self.mode == "ollama" else "Groq API"
+            return {"label": "error", "confidence": 0.0, "reason": f"{backend} error: {e}"}
+
+    async def aclassify_group(self, images_b64: List[str], layout: Optional[str] = None) -> List[Optional[Dict]]:
+        """
+        Several prepared images in one request, attached in order ("images") or tiled
+        into one numbered grid ("grid"); default BATCH_LAYOUT for this backend.
+        Returns one result per image, None where the answer was missing or malformed
+        (classify those with aclassify_encoded). Raises RateLimited like aclassify_encoded.
+        """
+        layout = layout or BATCH_LAYOUT.get(self.mode, "images")
+        prompt = BATCH_CLASSIFIER_PROMPT.format(count=len(images_b64), layout=BATCH_LAYOUTS[layout],
+                                                labels=self.label_str)
+        try:
+            if layout == "grid":
+                images = [await asyncio.to_thread(make_mosaic, images_b64, self.max_side, self.quality)]
+            else:
+                images = images_b64
+            raw = await self._achat(images, prompt, max_tokens=100 * len(images_b64))
+            return parse_group_response(raw, len(images_b64), self.labels)
+        except RateLimitError as e:
+            raise RateLimited(_retry_after(e))
+        except ollama.ResponseError as e:
+            if e.status_code == 429:
+                raise RateLimited()
+            return [None] * len(images_b64)
+        except Exception:
+            return [None] * len(images_b64)
+
+    def classify_many(self, images, output: Optional[str] = None, **kwargs) -> Dict:
+        """
+        Classify a directory, glob or list of image paths; see batch.classify_many.
+        """
+        from .batch import classify_many
+        return classify_many(self, images, output=output, **kwargs)
+
+    def classify_video(self, source: str, fps: Optional[float] = 1.0, **kwargs) -> Dict:
+        """
+        Label timeline for a video file or stream URL; see video.classify_video.
+        """
+        from .video import classify_video
+        return classify_video(self, source, fps=fps, **kwargs)
@@ -19,4 +19,25 @@ Respond ONLY in this exact JSON format (no extra text, no markdown):
 {{"label": "chosen_label", "confidence": 0.95, "reason": "Brief explanation based on visual features."}}
 
 Image analysis begins now.
-"""
\ No newline at end of file
+"""
+
+# Several images per request (batch.py, images_per_request > 1). {layout} says how
+# the images are attached; the answer must be an array in image order.
+BATCH_CLASSIFIER_PROMPT = """
+You are an expert image classifier. You are given {count} images{layout}.
+For EACH image select exactly ONE label from the list below.
+Do not invent new labels. If uncertain, choose the closest match.
+
+Available labels: {labels}
+
+Respond ONLY with a JSON array of exactly {count} objects, one per image, in image order (no extra text, no markdown):
+[{{"image": 1, "label": "chosen_label", "confidence": 0.95, "reason": "Brief explanation based on visual features."}}]
+
+Image analysis begins now.
+"""
+
+BATCH_LAYOUTS = {
+    "images": ", attached in order (image 1 is the first attachment)",
+    "grid": " as numbered tiles of one grid (the number is in each tile's top-left corner; "
+            "tiles run left to right, then top to bottom)",
+}
@@ -0,0 +1,245 @@
+"""
+Video / frame-stream classification: a time-coded label timeline for a recording or a
+camera stream (any file or URL FFmpeg opens: .mp4, .mkv, rtsp://, http://...).
+
+Pipeline:
+  - frames are decoded one at a time (PyAV); only the current frame, the last
+    classified frame's thumbnail and at most `concurrency * 2` prepared frames
+    waiting for inference are held, so memory does not grow with the video
+  - a frame is sampled every 1/fps seconds of stream time (fps=None: every frame)
+  - a sampled frame whose 32x32 grayscale thumbnail differs from the last classified
+    frame's by less than `diff_threshold` (mean absolute difference, 0-255) is
+    skipped and inherits that frame's label
+  - the others are resized + JPEG-encoded and classified by `concurrency` async
+    workers behind the backend's rate limiter (as in batch.py; the cascade, if any,
+    answers first)
+  - consecutive samples with the same label are merged into timeline segments
+
+Run from the project folder:
+    python -m backend.video recording.mp4 --fps 1 --mode groq --output timeline.json
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from .batch import RATE_LIMITS, TokenBucket, rate_limited_error, request_with_backoff
+from .classifier import ImageClassifier, encode_image
+
+try:
+    import av
+except ImportError:
+    av = None  # only needed for video: pip install av
+
+THUMB_SIDE = 32
+DIFF_THRESHOLD = 4.0
+
+
+def _sample_frames(source: str, fps: Optional[float], diff_threshold: float, max_side: int, quality: int,
+                   max_seconds: Optional[float], stages: Dict, counts: Dict
+                   ) -> Iterator[Tuple[float, Optional[str]]]:
+    """
+    Decode `source` and yield (seconds, base64 JPEG) per sampled frame, with None
+    instead of the JPEG when the frame is near-identical to the last classified one.
+    """
+    with av.open(source) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"  # frame + slice threads in the decoder
+        rate = float(stream.average_rate or stream.guessed_rate or 25)
+        next_sample, first, last_thumb = None, None, None
+        start = time.perf_counter()
+        for frame in container.decode(stream):
+            stages["decode"] += time.perf_counter() - start
+            counts["frames_decoded"] += 1
+            t = frame.time if frame.time is not None else counts["frames_decoded"] / rate
+            first = t if first is None else first
+            t -= first
+            if max_seconds is not None and t > max_seconds:
+                break
+            counts["video_seconds"] = t + 1 / rate
+            if fps:
+                if next_sample is not None and t < next_sample:
+                    start = time.perf_counter()
+                    continue
+                # stay on the 1/fps grid unless the stream jumped past the next slot
+                behind = next_sample is not None and t < next_sample + 1 / fps
+                next_sample = next_sample + 1 / fps if behind else t + 1 / fps
+
+            start = time.perf_counter()
+            thumb = frame.reformat(width=THUMB_SIDE, height=THUMB_SIDE, format="gray").to_ndarray().astype(np.int16)
+            similar = last_thumb is not None and np.abs(thumb - last_thumb).mean() < diff_threshold
+            stages["diff"] += time.perf_counter() - start
+            if similar:
+                yield t, None
+                start = time.perf_counter()
+                continue
+            last_thumb = thumb
+            start = time.perf_counter()
+            scale = min(1.0, max_side / max(frame.width, frame.height))
+            img = frame.to_image(width=round(frame.width * scale), height=round(frame.height * scale))
+            img_b64 = encode_image(img, quality)
+            stages["prepare"] += time.perf_counter() - start
+            yield t, img_b64
+            start = time.perf_counter()
+
+
+def build_segments(samples: List[Dict], end: float) -> List[Dict]:
+    """
+    Merge consecutive samples with the same label: [{"start", "end", "label", "confidence"}].
+    Each segment runs until the next one starts; the last one until `end`.
+    """
+    segments = []
+    for sample in samples:
+        if segments and segments[-1]["label"] == sample["label"]:
+            segments[-1]["confidences"].append(sample["confidence"])
+            continue
+        if segments:
+            segments[-1]["end"] = sample["t"]
+        segments.append({"start": sample["t"], "end": end, "label": sample["label"],
+                         "confidences": [sample["confidence"]]})
+    for segment in segments:
+        segment["confidence"] = round(float(np.mean(segment.pop("confidences"))), 3)
+    return segments
+
+
+async def aclassify_video(classifier: ImageClassifier, source: str, fps: Optional[float] = 1.0,
+                          diff_threshold: float = DIFF_THRESHOLD, concurrency: int = 4,
+                          rpm: Optional[float] = -1, burst: int = 1, max_retries: int = 5,
+                          max_seconds: Optional[float] = None,
+                          on_sample: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Classify a video or stream; see the module docstring. rpm=-1 uses RATE_LIMITS for
+    the classifier's mode, None disables the limiter; max_seconds stops a live stream.
+    on_sample gets each classified sample as it arrives (in completion order).
+    Returns the per-sample timeline, merged segments and a report with the real-time
+    factor (processing seconds per second of video) and the fraction of frames skipped.
+    """
+    if av is None:
+        raise ValueError("Video mode needs PyAV (pip install av)")
+    classifier._async_client = None  # async clients belong to one event loop; each run has its own
+    rpm = RATE_LIMITS.get(classifier.mode) if rpm == -1 else rpm
+    bucket = TokenBucket(rpm, burst) if rpm else None
+    stages = {"decode": 0.0, "diff": 0.0, "prepare": 0.0, "rate_limit_wait": 0.0, "inference": 0.0}
+    if classifier.cascade is not None:
+        stages["zero_shot"] = 0.0
+    counts = {"frames_decoded": 0, "video_seconds": 0.0, "sampled": 0, "classified": 0, "skipped": 0,
+              "errors": 0, "rate_limited": 0}
+    samples: List[Dict] = []  # {"t", "ref"}: ref is the index of the sample whose label applies
+    results: Dict[int, Dict] = {}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def produce():
+        frames = _sample_frames(source, fps, diff_threshold, classifier.max_side, classifier.quality,
+                                max_seconds, stages, counts)
+        ref = None
+        try:
+            # each step decodes in a thread, so the workers keep running meanwhile
+            while (item := await asyncio.to_thread(next, frames, None)) is not None:
+                t, img_b64 = item
+                counts["sampled"] += 1
+                if img_b64 is None:
+                    counts["skipped"] += 1
+                else:
+                    ref = len(samples)
+                samples.append({"t": round(t, 3), "ref": ref})
+                if img_b64 is not None:
+                    await queue.put((ref, img_b64))
+        finally:
+            frames.close()
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    async def work():
+        while (item := await queue.get()) is not None:
+            index, img_b64 = item
+            result = None
+            if classifier.cascade is not None:
+                start = time.perf_counter()
+                result = await asyncio.to_thread(classifier.zero_shot, base64.b64decode(img_b64))
+                stages["zero_shot"] += time.perf_counter() - start
+            if result is None:
+                result = await request_with_backoff(lambda: classifier.aclassify_encoded(img_b64), bucket,
+                                                    max_retries, stages, counts) or rate_limited_error(max_retries)
+            results[index] = result
+            counts["errors" if result.get("label") == "error" else "classified"] += 1
+            if on_sample:
+                on_sample({"t": samples[index]["t"], **result})
+
+    start = time.perf_counter()
+    await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    timeline = []
+    for index, sample in enumerate(samples):
+        result = results[sample["ref"]]
+        timeline.append({"t": sample["t"], "label": result.get("label"), "confidence": result.get("confidence", 0.0),
+                         "classified": sample["ref"] == index})
+    video_seconds = counts["video_seconds"]
+    return {
+        "source": source,
+        "timeline": timeline,
+        "segments": build_segments(timeline, round(video_seconds, 3)),
+        **counts,
+        "video_seconds": round(video_seconds, 3),
+        "skipped_fraction": round(counts["skipped"] / counts["sampled"], 3) if counts["sampled"] else 0.0,
+        "seconds": round(elapsed, 3),
+        "realtime_factor": round(elapsed / video_seconds, 3) if video_seconds else None,
+        # summed over workers, so stages overlap and can add up to more than `seconds`
+        "stage_seconds": {k: round(v, 3) for k, v in stages.items()},
+    }
+
+
+def classify_video(classifier: ImageClassifier, source: str, **kwargs) -> Dict:
+    """
+    Blocking wrapper around aclassify_video (scripts, notebooks, Streamlit).
+    """
+    return asyncio.run(aclassify_video(classifier, source, **kwargs))
+
+
+def format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes // 60):02d}:{int(minutes % 60):02d}:{seconds:04.1f}"
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"{format_timestamp(s['start'])} - {format_timestamp(s['end'])}  {s['label']} ({s['confidence']:.2f})"
+             for s in report["segments"]]
+    minutes = report["video_seconds"] / 60
+    per_minute = f"{report['seconds'] / minutes:.1f}s per minute of video, " if minutes else ""
+    lines.append(f"{report['video_seconds']:.1f}s of video ({report['frames_decoded']} frames) in {report['seconds']:.1f}s: "
+                 f"{per_minute}real-time factor {report['realtime_factor']}")
+    lines.append(f"{report['sampled']} sampled, {report['skipped']} skipped as unchanged "
+                 f"({report['skipped_fraction']:.0%}), {report['classified']} classified, {report['errors']} errors, "
+                 f"rate limited {report['rate_limited']}x")
+    lines.append("seconds: " + ", ".join(f"{stage} {seconds:.1f}" for stage, seconds in report["stage_seconds"].items()))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify the frames of a video or stream into a label timeline.")
+    parser.add_argument("source", help="video file or stream URL")
+    parser.add_argument("--mode", default="ollama", choices=["ollama", "groq"])
+    parser.add_argument("--labels", help="comma-separated labels (default: prompts.DEFAULT_LABELS)")
+    parser.add_argument("--output", "-o", default="timeline.json", help="timeline JSON")
+    parser.add_argument("--fps", type=float, default=1.0, help="frames sampled per second of video (0: every frame)")
+    parser.add_argument("--diff-threshold", type=float, default=DIFF_THRESHOLD,
+                        help="mean gray-level difference below which a frame counts as unchanged (0: never skip)")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight")
+    parser.add_argument("--rpm", type=float, default=-1, help="requests per minute (default: per backend)")
+    parser.add_argument("--max-seconds", type=float, help="stop after this much video (live streams)")
+    args = parser.parse_args()
+
+    labels = [l.strip() for l in args.labels.split(",") if l.strip()] if args.labels else None
+    classifier = ImageClassifier(mode=args.mode, labels=labels)
+    report = classify_video(classifier, args.source, fps=args.fps or None, diff_threshold=args.diff_threshold,
+                            concurrency=args.concurrency, rpm=args.rpm, max_seconds=args.max_seconds)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
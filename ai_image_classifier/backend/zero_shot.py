@@ -0,0 +1,100 @@
+"""
+Local zero-shot fast path for the cascade mode.
+
+A CLIP model (sentence-transformers, CPU) embeds the image and compares it with one
+text embedding per label ("a photo of a {label}"). When the best label's probability
+beats the runner-up by at least `margin`, that label is the answer; otherwise the
+image is escalated to the vision LLM (Ollama / Groq).
+
+- label embeddings are computed once per label set and reused
+- one model instance is shared by every classifier (Streamlit sessions, batch workers);
+  encoding is serialized because torch already uses all cores for one call
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+DEFAULT_MODEL = "clip-ViT-B-32"
+LABEL_TEMPLATE = "a photo of a {label}"
+CLIP_SIDE = 224  # CLIP's input size; larger decodes only cost time
+LOGIT_SCALE = 100.0  # CLIP's learned temperature
+MAX_LABEL_SETS = 64
+
+
+class ZeroShotClassifier:
+    def __init__(self, model_name: str = DEFAULT_MODEL):
+        try:
+            # imported here: torch takes seconds and hundreds of MB, and every
+            # batch.py worker process imports classifier.py
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError("Cascade mode needs sentence-transformers (pip install sentence-transformers)")
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self._label_sets: "OrderedDict[Tuple[str, ...], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.answered = self.escalated = 0
+        self.seconds = 0.0
+
+    def label_embeddings(self, labels: List[str]) -> np.ndarray:
+        """
+        One normalized text embedding per label, computed when a label set is first seen.
+        """
+        key = tuple(labels)
+        with self._lock:
+            if key not in self._label_sets:
+                prompts = [LABEL_TEMPLATE.format(label=label) for label in labels]
+                self._label_sets[key] = self.model.encode(prompts, normalize_embeddings=True)
+                if len(self._label_sets) > MAX_LABEL_SETS:
+                    self._label_sets.popitem(last=False)
+            self._label_sets.move_to_end(key)
+            return self._label_sets[key]
+
+    def scores(self, img: Image.Image, labels: List[str]) -> np.ndarray:
+        """
+        Softmax probability per label.
+        """
+        text = self.label_embeddings(labels)
+        with self._lock:
+            image = self.model.encode([img], normalize_embeddings=True)[0]
+        logits = LOGIT_SCALE * (text @ image)
+        probs = np.exp(logits - logits.max())
+        return probs / probs.sum()
+
+    def classify(self, img: Image.Image, labels: List[str], margin: float) -> Optional[Dict]:
+        """
+        Result when the top label wins by at least `margin`, else None (escalate).
+        """
+        start = time.perf_counter()
+        probs = self.scores(img, labels)
+        order = np.argsort(probs)[::-1]
+        top = float(probs[order[0]])
+        runner_up = float(probs[order[1]]) if len(order) > 1 else 0.0
+        confident = top - runner_up >= margin
+        with self._lock:
+            self.seconds += time.perf_counter() - start
+            if confident:
+                self.answered += 1
+            else:
+                self.escalated += 1
+        if not confident:
+            return None
+        reason = f"Local CLIP match (margin {top - runner_up:.2f}"
+        reason += f" over '{labels[order[1]]}')" if len(order) > 1 else ")"
+        return {"label": labels[order[0]], "confidence": round(top, 3), "reason": reason}
+
+    def stats(self) -> Dict:
+        total = self.answered + self.escalated
+        return {
+            "model": self.model_name,
+            "label_sets": len(self._label_sets),
+            "answered_locally": self.answered,
+            "escalated": self.escalated,
+            "escalation_rate": round(self.escalated / total, 3) if total else None,
+            "avg_ms": round(self.seconds / total * 1000, 1) if total else None,
+        }
+
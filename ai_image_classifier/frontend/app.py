@@ -8,7 +8,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import streamlit as st
 import io  # ← Critical for BytesIO
 from PIL import Image
-from backend.classifier import ImageClassifier
+from backend.cache import ResultCache
+from backend.classifier import CASCADE_MARGIN, ImageClassifier
+from backend.zero_shot import DEFAULT_MODEL, ZeroShotClassifier
+
+CACHE_PATH = os.getenv("IMAGE_CACHE_PATH", os.path.expanduser("~/.cache/ai_image_classifier/results.sqlite"))
+CACHE_RADIUS = int(os.getenv("IMAGE_CACHE_RADIUS", "6"))  # differing pHash bits still counted as the same image
+CASCADE_MODEL = os.getenv("CASCADE_MODEL", DEFAULT_MODEL)
 
 st.set_page_config(page_title="Image Classifier", page_icon="Camera", layout="wide")
 st.title("Camera Zero-Shot Image Classifier")
@@ -20,14 +26,35 @@ with st.sidebar:
     mode = st.selectbox("Mode", ["ollama", "groq"])
     labels_input = st.text_area("Labels", "cat, dog, car, tree, person, food, house, airplane")
     labels = [l.strip() for l in labels_input.split(",") if l.strip()]
+    cascade = st.checkbox("Cascade: local CLIP first", help="Only ambiguous images go to the vision LLM")
+    margin = st.slider("CLIP margin", 0.0, 1.0, CASCADE_MARGIN, 0.05, disabled=not cascade,
+                       help="Min probability lead of the top label to answer without the LLM")
+
+@st.cache_resource
+def get_cache():
+    if not CACHE_PATH:
+        return None
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    return ResultCache(CACHE_PATH, radius=CACHE_RADIUS)
+
+@st.cache_resource
+def get_zero_shot():
+    return ZeroShotClassifier(CASCADE_MODEL)
 
 @st.cache_resource
-def get_classifier(_mode, _labels):
-    return ImageClassifier(mode=_mode, labels=_labels)
+def get_classifier(mode, labels, cascade, margin):
+    zero_shot = get_zero_shot() if cascade else None
+    return ImageClassifier(mode=mode, labels=labels, cache=get_cache(), cascade=zero_shot, cascade_margin=margin)
 
 try:
-    classifier = get_classifier(mode, labels)
+    classifier = get_classifier(mode, labels, cascade, margin)
     st.sidebar.success(f"Ready: {mode.upper()}")
+    if get_cache() is not None:
+        with st.sidebar.expander("Result cache"):
+            st.json(get_cache().stats())
+    if cascade:
+        with st.sidebar.expander("Cascade"):
+            st.json(get_zero_shot().stats())
 except Exception as e:
     st.sidebar.error(f"Error: {e}")
     st.stop()
@@ -0,0 +1,122 @@
+"""
+Near-duplicate result cache: hash robustness, lookup time and end-to-end hit time.
+
+    python -m scripts.bench_cache --images 200 --entries 100000
+
+1. pHash distance between images and their re-compressed / resized / brightened /
+   slightly cropped copies, vs the nearest unrelated image (what `radius` separates)
+2. ResultCache.get() time for exact and near hits and misses at `--entries` entries
+3. classify() on a cache hit, decoding included, for a 1024 px and a 12 MP JPEG, and
+   the part that hashing + lookup adds to the decode preprocessing needs anyway
+   (on a miss the same decoded image is resized and encoded for the request)
+"""
+
+import argparse
+import io
+import random
+import statistics
+import time
+from PIL import Image, ImageDraw, ImageEnhance
+from backend.cache import ResultCache, hamming, image_hash
+from backend.classifier import ImageClassifier, preprocess_hashed
+
+RESULT = {"label": "cat", "confidence": 0.9, "reason": "cached"}
+
+
+def make_image(seed: int, size=(1024, 768)) -> Image.Image:
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(12):
+        box = sorted(rng.randrange(size[0]) for _ in range(2)), sorted(rng.randrange(size[1]) for _ in range(2))
+        shape = draw.ellipse if rng.random() < 0.5 else draw.rectangle
+        shape([box[0][0], box[1][0], box[0][1], box[1][1]], fill=tuple(rng.randrange(256) for _ in range(3)))
+    return img
+
+
+def jpeg(img: Image.Image, quality: int = 90) -> bytes:
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG", quality=quality)
+    return buffered.getvalue()
+
+
+VARIANTS = {
+    "recompressed q60": lambda img: jpeg(img, 60),
+    "resized 50%": lambda img: jpeg(img.resize((img.width // 2, img.height // 2))),
+    "brightness +10%": lambda img: jpeg(ImageEnhance.Brightness(img).enhance(1.1)),
+    "cropped 3%": lambda img: jpeg(img.crop((img.width * 3 // 200, img.height * 3 // 200,
+                                              img.width * 197 // 200, img.height * 197 // 200))),
+}
+
+
+def phash(data: bytes) -> int:
+    return preprocess_hashed(data)[1]
+
+
+def robustness(n: int):
+    images = [make_image(i) for i in range(n)]
+    hashes = [phash(jpeg(img)) for img in images]
+    print(f"1. pHash distance over {n} images (bits of 64):")
+    for name, variant in VARIANTS.items():
+        d = sorted(hamming(h, phash(variant(img))) for img, h in zip(images, hashes))
+        print(f"   {name:18} median {statistics.median(d):4.1f}  p95 {d[int(len(d) * 0.95)]:3d}  max {d[-1]:3d}")
+    nearest = sorted(min(hamming(h, o) for j, o in enumerate(hashes) if j != i) for i, h in enumerate(hashes))
+    print(f"   {'nearest unrelated':18} min {nearest[0]:6d}  p5  {nearest[len(nearest) // 20]:3d}  "
+          f"median {statistics.median(nearest):4.1f}")
+
+
+def lookups(entries: int, radius: int):
+    rng = random.Random(0)
+    cache = ResultCache(radius=radius, max_entries=entries)
+    scope = ResultCache.scope("ollama", "llava", ["cat", "dog"])
+    keys = [rng.getrandbits(64) for _ in range(entries)]
+    start = time.perf_counter()
+    for key in keys:
+        cache.put(scope, key, RESULT)
+    fill = time.perf_counter() - start
+    near = [k ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for k in keys[:1000]]
+    cases = {"exact hit": keys[:1000], "near hit (2 bits)": near, "miss": [rng.getrandbits(64) for _ in range(1000)]}
+    print(f"2. ResultCache.get() with {entries} entries, radius {radius} (filled in {fill:.1f}s):")
+    for name, queries in cases.items():
+        start = time.perf_counter()
+        for q in queries:
+            cache.get(scope, q)
+        print(f"   {name:18} {(time.perf_counter() - start) / len(queries) * 1e6:7.1f} us")
+    print(f"   {cache.stats()}")
+    cache.close()
+
+
+def end_to_end(radius: int):
+    classifier = ImageClassifier(cache=ResultCache(radius=radius))
+    print("3. classify() on a cache hit (one decode, shared with the request image on a miss):")
+    for name, size in (("1024 px JPEG", (1024, 768)), ("12 MP JPEG", (4000, 3000))):
+        data = jpeg(make_image(7, size))
+        classifier.cache.put(classifier.cache_scope, classifier.cache_key(data), RESULT)
+        times = []
+        for _ in range(50):
+            start = time.perf_counter()
+            result = classifier.classify(data)
+            times.append(time.perf_counter() - start)
+        assert result == RESULT
+        img = preprocess_hashed(data, classifier.max_side)[0] or make_image(7, size)
+        start = time.perf_counter()
+        for _ in range(50):
+            classifier.cache.get(classifier.cache_scope, image_hash(img) ^ 1)
+        hashed = (time.perf_counter() - start) / 50
+        print(f"   {name:18} median {statistics.median(times) * 1e3:6.2f} ms  "
+              f"(hash + lookup of the decoded image {hashed * 1e3:5.2f} ms)")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--images", type=int, default=200)
+    ap.add_argument("--entries", type=int, default=100000)
+    ap.add_argument("--radius", type=int, default=6)
+    args = ap.parse_args()
+    robustness(args.images)
+    lookups(args.entries, args.radius)
+    end_to_end(args.radius)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Cascade calibration: escalation rate, accuracy and latency per CLIP margin vs LLM only.
+
+    python -m scripts.bench_cascade photos/ --mode ollama --margins 0.2,0.4,0.5,0.6,0.8
+
+`photos/` holds one subfolder per label (photos/cat/*.jpg, photos/dog/*.jpg, ...);
+the subfolder names are the label set. Every image goes through CLIP and the
+vision LLM once; each margin is then evaluated on those answers and timings.
+"""
+
+import argparse
+import os
+import statistics
+import time
+from backend.batch import collect_images
+from backend.classifier import ImageClassifier, _open
+from backend.zero_shot import CLIP_SIDE, DEFAULT_MODEL, ZeroShotClassifier
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder")
+    ap.add_argument("--mode", default="ollama", choices=["ollama", "groq"])
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--margins", default="0.2,0.4,0.5,0.6,0.8")
+    args = ap.parse_args()
+
+    labels = sorted(d for d in os.listdir(args.folder) if os.path.isdir(os.path.join(args.folder, d)))
+    classifier = ImageClassifier(mode=args.mode, labels=labels)
+    zero_shot = ZeroShotClassifier(args.model)
+    zero_shot.label_embeddings(labels)  # computed once, as in the app
+    rows = []
+    for path in collect_images(args.folder):
+        truth = os.path.basename(os.path.dirname(path))
+        with open(path, "rb") as f:
+            image_bytes = f.read()
+        start = time.perf_counter()
+        img = _open(image_bytes)
+        img.draft("RGB", (CLIP_SIDE, CLIP_SIDE))
+        probs = zero_shot.scores(img.convert("RGB"), labels)
+        local_seconds = time.perf_counter() - start
+        ranked = sorted(zip(probs, labels), reverse=True)
+        lead = ranked[0][0] - (ranked[1][0] if len(ranked) > 1 else 0.0)
+        start = time.perf_counter()
+        answer = classifier.classify(image_bytes)["label"]
+        llm_seconds = time.perf_counter() - start
+        rows.append((truth, ranked[0][1], lead, local_seconds, answer, llm_seconds))
+
+    n = len(rows)
+    print(f"{n} images, labels: {', '.join(labels)}")
+    print(f"  CLIP {statistics.median(r[3] for r in rows) * 1e3:.0f} ms/image median, "
+          f"{args.mode} {statistics.median(r[5] for r in rows) * 1e3:.0f} ms/image median")
+    print(f"  {'':14} {'escalated':>9} {'CLIP acc':>8} {'accuracy':>8} {'mean s':>7}")
+    llm_acc = sum(r[0] == r[4] for r in rows) / n
+    print(f"  {'LLM only':14} {1:9.0%} {'':>8} {llm_acc:8.1%} {sum(r[5] for r in rows) / n:7.2f}")
+    for margin in (float(m) for m in args.margins.split(",")):
+        local = [r for r in rows if r[2] >= margin]
+        escalated = [r for r in rows if r[2] < margin]
+        correct = sum(r[0] == r[1] for r in local) + sum(r[0] == r[4] for r in escalated)
+        seconds = sum(r[3] for r in rows) + sum(r[5] for r in escalated)
+        local_acc = f"{sum(r[0] == r[1] for r in local) / len(local):8.1%}" if local else f"{'-':>8}"
+        print(f"  {f'margin {margin:.2f}':14} {len(escalated) / n:9.0%} {local_acc} {correct / n:8.1%} {seconds / n:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
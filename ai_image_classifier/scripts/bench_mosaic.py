@@ -0,0 +1,53 @@
+"""
+Several images per request: throughput and accuracy vs one image per call.
+
+    python -m scripts.bench_mosaic photos/ --mode groq --sizes 1,3,5 --layouts images
+
+`photos/` holds one subfolder per label (photos/cat/*.jpg, ...); the subfolder names
+are the label set. Each size/layout runs the whole set through classify_many with
+the backend's default rate limit (--rpm to override); accuracy is against the
+folder names, agreement against the one-image-per-call answers.
+"""
+
+import argparse
+import os
+from backend.batch import classify_many
+from backend.classifier import ImageClassifier
+
+
+def run(classifier: ImageClassifier, folder: str, size: int, layout: str, rpm: float):
+    rows = {}
+    report = classify_many(classifier, folder, images_per_request=size, layout=layout, rpm=rpm, resume=False,
+                           on_result=lambda row: rows.update({row["path"]: row["label"]}))
+    return report, rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("folder")
+    ap.add_argument("--mode", default="ollama", choices=["ollama", "groq"])
+    ap.add_argument("--sizes", default="1,4", help="images per request; 1 is the baseline")
+    ap.add_argument("--layouts", default="images,grid")
+    ap.add_argument("--rpm", type=float, default=-1, help="requests per minute (default: per backend)")
+    args = ap.parse_args()
+
+    labels = sorted(d for d in os.listdir(args.folder) if os.path.isdir(os.path.join(args.folder, d)))
+    classifier = ImageClassifier(mode=args.mode, labels=labels)
+    print(f"labels: {', '.join(labels)}")
+    print(f"  {'':18} {'img/s':>6} {'speedup':>7} {'accuracy':>8} {'agree':>6} {'retried':>7}")
+    baseline = None
+    for size in (int(s) for s in args.sizes.split(",")):
+        for layout in (["images"] if size == 1 else args.layouts.split(",")):
+            report, rows = run(classifier, args.folder, size, layout, args.rpm)
+            truth = {path: os.path.basename(os.path.dirname(path)) for path in rows}
+            accuracy = sum(rows[p] == truth[p] for p in rows) / len(rows)
+            if baseline is None:
+                baseline = (report["images_per_second"], rows)
+            agree = sum(rows[p] == baseline[1].get(p) for p in rows) / len(rows)
+            name = "1 per call" if size == 1 else f"{report['images_per_request']} per call, {layout}"
+            print(f"  {name:18} {report['images_per_second']:6.2f} {report['images_per_second'] / baseline[0]:6.1f}x "
+                  f"{accuracy:8.1%} {agree:6.1%} {report['fallbacks']:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Decode / resize / encode time and peak memory: previous preprocessing vs the fast path.
+
+    python -m scripts.bench_preprocess --runs 10
+
+Inputs are a 12 MP (4000x3000) camera-like JPEG and an 800 px JPEG. "previous" is
+the code before the fast path (full decode unless Pillow's own thumbnail draft
+applies, resize to 1024, re-encode always); "fast" is classifier.prepare_image at
+the Groq (1024 px) and Ollama (672 px) targets. Each case runs in its own process;
+peak memory is the rise in peak RSS over the RSS before the first run (Linux).
+"""
+
+import argparse
+import base64
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from PIL import Image, ImageFilter
+from backend.classifier import _open, _shrink, encode_image, prepare_image
+
+CASES = {
+    "previous": None,
+    "fast 1024": 1024,
+    "fast 672": 672,
+}
+
+
+def make_photo(path: str, size):
+    """Smooth gradients plus sensor-like noise, so it compresses roughly like a photo."""
+    base = Image.radial_gradient("L").resize(size)
+    noise = Image.effect_noise(size, 12).filter(ImageFilter.GaussianBlur(1))
+    img = Image.merge("RGB", (base, noise, Image.linear_gradient("L").resize(size)))
+    img.save(path, format="JPEG", quality=90)
+
+
+def previous(image_bytes: bytes, timings: dict) -> str:
+    """The old _preprocess_image + _encode_image, split where Pillow would do the work."""
+    start = time.perf_counter()
+    img = Image.open(io.BytesIO(image_bytes))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    else:
+        img.draft(None, (2048, 2048))  # what thumbnail() does itself (reducing_gap=2.0)
+    img.load()
+    timings["decode"] += time.perf_counter() - start
+    start = time.perf_counter()
+    img.thumbnail((1024, 1024))
+    timings["resize"] += time.perf_counter() - start
+    start = time.perf_counter()
+    buffered = io.BytesIO()
+    img.save(buffered, format="JPEG", quality=85)
+    result = base64.b64encode(buffered.getvalue()).decode()
+    timings["encode"] += time.perf_counter() - start
+    return result
+
+
+def fast(image_bytes: bytes, max_side: int, timings: dict) -> str:
+    start = time.perf_counter()
+    img = _open(image_bytes)
+    if img.format == "JPEG" and max(img.size) <= max_side:
+        result = prepare_image(image_bytes, max_side)  # pass-through
+        timings["encode"] += time.perf_counter() - start
+        return result
+    img.draft("RGB", (max_side, max_side))
+    img.load()
+    timings["decode"] += time.perf_counter() - start
+    start = time.perf_counter()
+    img = _shrink(img, max_side)
+    timings["resize"] += time.perf_counter() - start
+    start = time.perf_counter()
+    result = encode_image(img, 85)
+    timings["encode"] += time.perf_counter() - start
+    return result
+
+
+def rss_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+
+
+def child(case: str, path: str, runs: int):
+    with open(path, "rb") as f:
+        image_bytes = f.read()
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # reset the peak (VmHWM) to the current RSS
+    baseline = rss_kb("VmRSS:")
+    timings = {"decode": 0.0, "resize": 0.0, "encode": 0.0}
+    for _ in range(runs):
+        if CASES[case] is None:
+            out = previous(image_bytes, timings)
+        else:
+            out = fast(image_bytes, CASES[case], timings)
+    peak = rss_kb("VmHWM:") - baseline
+    if CASES[case] is not None:  # the split timing must not change the result
+        assert out == prepare_image(image_bytes, CASES[case])
+    parts = "  ".join(f"{k} {v / runs * 1e3:6.1f}" for k, v in timings.items())
+    total = sum(timings.values()) / runs * 1e3
+    print(f"  {case:10} {parts}  total {total:6.1f} ms   peak +{peak / 1024:5.1f} MB   out {len(out) / 1024:5.0f} KB")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--child", nargs=2, metavar=("CASE", "PATH"))
+    args = ap.parse_args()
+    if args.child:
+        child(args.child[0], args.child[1], args.runs)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = {"12 MP JPEG": (4000, 3000), "800 px JPEG": (800, 600)}
+        for name, size in inputs.items():
+            path = os.path.join(tmp, f"{size[0]}.jpg")
+            make_photo(path, size)
+            print(f"{name} ({os.path.getsize(path) / 1024:.0f} KB), ms per image:")
+            for case in CASES:
+                subprocess.run([sys.executable, "-m", "scripts.bench_preprocess", "--runs", str(args.runs),
+                                "--child", case, path], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,16 @@
 #  - Safety filters & validation
 #  - Cost tracking for OpenAI usage
 #  - Fully local fallback (HuggingFace + Ollama)
+#  - Per-PDF index cache: follow-up questions skip parsing + embedding
 # ==============================================================
 
 import streamlit as st
 import os
 import re
-import tempfile
+import time
 from dotenv import load_dotenv
 
 # LangChain community imports
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import OpenAIEmbeddings, HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain_community.llms import OpenAI, Ollama
@@ -25,6 +24,8 @@ from langchain_core.prompts import PromptTemplate
 # Pinecone (new SDK)
 from pinecone import Pinecone, ServerlessSpec
 
+from index_cache import IndexCache
+
 # ==============================================================
 # ENVIRONMENT CONFIGURATION
 # ==============================================================
@@ -39,6 +40,11 @@ BLOCKED_WORDS = ["hack", "jailbreak", "ignore", "system", "bypass", "prompt"]
 MAX_QUESTION_LEN = 200
 MIN_QUESTION_LEN = 3
 
+# Processed resumes kept in memory (LRU, shared by all sessions); set INDEX_CACHE_DIR
+# to also keep FAISS indexes on disk across restarts (off by default: resumes are personal data)
+INDEX_CACHE_SIZE = int(os.getenv("INDEX_CACHE_SIZE", "8"))
+INDEX_CACHE_DIR = os.getenv("INDEX_CACHE_DIR") or None
+
 
 def is_safe_input(text: str) -> bool:
     """Rejects unsafe or malformed inputs."""
@@ -62,6 +68,12 @@ st.write("**Upload your resume (PDF)** → Ask professional questions about it!"
 
 uploaded_file = st.file_uploader("Upload Resume (PDF)", type="pdf")
 
+
+@st.cache_resource
+def get_index_cache():
+    return IndexCache(max_entries=INDEX_CACHE_SIZE, directory=INDEX_CACHE_DIR)
+
+
 # ==============================================================
 # MAIN APP LOGIC
 # ==============================================================
@@ -69,20 +81,7 @@ uploaded_file = st.file_uploader("Upload Resume (PDF)", type="pdf")
 if uploaded_file:
     try:
         # -------------------------
-        # 1️⃣  PDF Extraction
-        # -------------------------
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            tmp_file.write(uploaded_file.read())
-            temp_path = tmp_file.name
-
-        loader = PyPDFLoader(temp_path)
-        docs = loader.load()
-
-        splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-        chunks = splitter.split_documents(docs)
-
-        # -------------------------
-        # 2️⃣  Embeddings
+        # 1️⃣  Embeddings
         # -------------------------
         @st.cache_resource
         def get_embeddings():
@@ -107,9 +106,9 @@ if uploaded_file:
         embeddings = get_embeddings()
 
         # -------------------------
-        # 3️⃣  Vector Store (Pinecone or FAISS)
+        # 2️⃣  Vector Store (Pinecone or FAISS), built once per PDF
         # -------------------------
-        with st.spinner("🔍 Indexing your resume..."):
+        def build_vectorstore(chunks, embeddings):
             try:
                 if USE_PINECONE:
                     st.info("Connecting to Pinecone...")
@@ -133,10 +132,11 @@ if uploaded_file:
                     from langchain_community.vectorstores import Pinecone as PineconeStore
                     vectorstore = PineconeStore.from_documents(chunks, embeddings, index_name=index_name)
                     st.success("✅ Pinecone vector store ready!")
+                    return vectorstore
 
-                else:
-                    vectorstore = FAISS.from_documents(chunks, embeddings)
-                    st.success("✅ FAISS vector store ready! (Local mode)")
+                vectorstore = FAISS.from_documents(chunks, embeddings)
+                st.success("✅ FAISS vector store ready! (Local mode)")
+                return vectorstore
 
             except Exception as e:
                 err = str(e)
@@ -144,12 +144,16 @@ if uploaded_file:
                     st.warning("⚠️ Pinecone API issue or quota exceeded. Switching to FAISS.")
                 else:
                     st.warning(f"Pinecone failed: {e}. Falling back to FAISS.")
-                vectorstore = FAISS.from_documents(chunks, embeddings)
+                return FAISS.from_documents(chunks, embeddings)
+
+        with st.spinner("🔍 Indexing your resume..."):
+            vectorstore, index_info = get_index_cache().get_or_build(uploaded_file.getvalue(), embeddings,
+                                                                     build_vectorstore)
 
         retriever = vectorstore.as_retriever(search_kwargs={"k": 3})
 
         # -------------------------
-        # 4️⃣  LLM SETUP
+        # 3️⃣  LLM SETUP
         # -------------------------
         @st.cache_resource
         def get_llm():
@@ -165,7 +169,7 @@ if uploaded_file:
         llm = get_llm()
 
         # -------------------------
-        # 5️⃣  Prompt Template
+        # 4️⃣  Prompt Template
         # -------------------------
         prompt_template = """You are a professional HR analyst.
 Answer ONLY using the resume text provided.
@@ -183,14 +187,19 @@ Answer:"""
         PROMPT = PromptTemplate(template=prompt_template, input_variables=["context", "question"])
 
         # -------------------------
-        # 6️⃣  Retrieval Chain
+        # 5️⃣  Retrieval Chain
         # -------------------------
-        def answer_question(question):
+        def answer_question(question, timings):
             try:
-                docs = retriever.invoke(question)
+                start = time.perf_counter()
+                docs = retriever.invoke(question)  # query embedding + similarity search
+                timings["retrieval"] = time.perf_counter() - start
                 context = "\n\n".join([d.page_content for d in docs])
                 chain = PROMPT | llm
-                return chain.invoke({"context": context, "question": question})
+                start = time.perf_counter()
+                answer = chain.invoke({"context": context, "question": question})
+                timings["llm"] = time.perf_counter() - start
+                return answer
             except Exception as e:
                 err = str(e).lower()
                 if "insufficient_quota" in err or "429" in err:
@@ -204,7 +213,7 @@ Answer:"""
         st.success("✅ Resume processed successfully! Ready for Q&A.")
 
         # -------------------------
-        # 7️⃣  Q&A Section
+        # 6️⃣  Q&A Section
         # -------------------------
         question = st.text_input(
             "Ask something about your resume:",
@@ -217,12 +226,22 @@ Answer:"""
                 st.error("⚠️ Invalid or unsafe input. Keep it short and professional.")
                 st.stop()
 
+            timings = {}
             with st.spinner("Analyzing your resume..."):
-                answer = answer_question(question)
+                answer = answer_question(question, timings)
 
             st.markdown("### 💬 Answer:")
             st.write(answer)
 
+            # Per-question cost: only retrieval + LLM once the index is cached
+            if index_info["source"] == "built":
+                index_time = (f"built in {index_info['seconds']:.2f}s (parse {index_info['parse']:.2f}s, "
+                              f"embed {index_info['embed']:.2f}s)")
+            else:
+                index_time = f"{index_info['source']} cache hit ({index_info['seconds'] * 1000:.1f} ms)"
+            stage_times = "".join(f" · {name} {seconds * 1000:.0f} ms" for name, seconds in timings.items())
+            st.caption(f"⏱️ Index {index_time}{stage_times}")
+
             # Cost tracking for OpenAI mode
             if USE_OPENAI:
                 input_tokens = len(question.split()) * 1.3
@@ -231,7 +250,7 @@ Answer:"""
                 st.caption(f"💰 **Estimated cost:** ${cost:.6f} (gpt-4o-mini)")
 
         # -------------------------
-        # 8️⃣  Mode Display
+        # 7️⃣  Mode Display
         # -------------------------
         mode = (
             "OpenAI + Pinecone"
@@ -0,0 +1,74 @@
+# ==============================================================
+# INDEX CACHE BENCHMARK
+# Per-question cost without the LLM (the LLM call is the same either way):
+#  - before: every question re-parses, re-splits and re-embeds the PDF
+#  - after:  memory cache hit (or disk hit after a restart) + retrieval
+#
+#   python bench_index_cache.py resume.pdf --questions 5
+# ==============================================================
+
+import argparse
+import statistics
+import tempfile
+import time
+
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from langchain_community.vectorstores import FAISS
+
+from index_cache import IndexCache, split_pdf
+
+QUESTIONS = [
+    "What are the candidate's Python skills?",
+    "List the certifications.",
+    "Where did the candidate study?",
+    "What was the most recent job title?",
+    "Which cloud platforms are mentioned?",
+]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("pdf")
+    ap.add_argument("--model", default="all-MiniLM-L6-v2")
+    ap.add_argument("--questions", type=int, default=5)
+    args = ap.parse_args()
+
+    with open(args.pdf, "rb") as f:
+        pdf_bytes = f.read()
+    embeddings = HuggingFaceEmbeddings(model_name=args.model)
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+    rows = {"before (rebuild)": [], "after (memory hit)": [], "after restart (disk hit)": []}
+
+    for question in questions:
+        def rebuild():
+            store = FAISS.from_documents(split_pdf(pdf_bytes), embeddings)
+            return store.similarity_search(question, k=3)
+        rows["before (rebuild)"].append(timed(rebuild)[1])
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = IndexCache(directory=directory)
+        (_, first), _ = timed(lambda: cache.get_or_build(pdf_bytes, embeddings))
+        print(f"first upload: {first['chunks']} chunks, parse {first['parse']:.2f}s, embed {first['embed']:.2f}s")
+        for question in questions:
+            rows["after (memory hit)"].append(
+                timed(lambda: cache.get_or_build(pdf_bytes, embeddings)[0].similarity_search(question, k=3))[1])
+        for question in questions:
+            restarted = IndexCache(directory=directory)  # empty memory, as after a restart
+            rows["after restart (disk hit)"].append(
+                timed(lambda: restarted.get_or_build(pdf_bytes, embeddings)[0].similarity_search(question, k=3))[1])
+
+    baseline = statistics.median(rows["before (rebuild)"])
+    print(f"{len(questions)} questions, per-question seconds excluding the LLM:")
+    for name, seconds in rows.items():
+        median = statistics.median(seconds)
+        print(f"  {name:26} median {median * 1000:8.1f} ms  ({baseline / median:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# ==============================================================
+# PER-DOCUMENT VECTOR INDEX CACHE (used by app.py)
+# Streamlit reruns app.py on every interaction; without this each
+# question re-parsed the PDF and re-embedded every chunk.
+#  - key: SHA-256 of the PDF + embedding model + chunking settings
+#  - memory: LRU of ready vector stores, shared by all sessions
+#  - disk (optional): FAISS.save_local copies that survive restarts
+# ==============================================================
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.vectorstores import FAISS
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+
+
+def embedding_id(embeddings) -> str:
+    """Model name of a LangChain embeddings object (OpenAI: .model, HuggingFace: .model_name)."""
+    name = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None) or type(embeddings).__name__
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(name))
+
+
+def document_key(pdf_bytes: bytes, embeddings) -> str:
+    digest = hashlib.sha256(pdf_bytes).hexdigest()[:32]
+    return f"{digest}-{embedding_id(embeddings)}-{CHUNK_SIZE}-{CHUNK_OVERLAP}"
+
+
+def split_pdf(pdf_bytes: bytes) -> List:
+    """PDF bytes -> text chunks. The temp file PyPDFLoader needs is removed again."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+        tmp_file.write(pdf_bytes)
+        temp_path = tmp_file.name
+    try:
+        docs = PyPDFLoader(temp_path).load()
+    finally:
+        os.remove(temp_path)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return splitter.split_documents(docs)
+
+
+class IndexCache:
+    def __init__(self, max_entries: int = 8, directory: Optional[str] = None, max_disk_entries: int = 50):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._stores: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = self.disk_hits = self.builds = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get_or_build(self, pdf_bytes: bytes, embeddings,
+                     build: Optional[Callable] = None) -> Tuple[object, Dict]:
+        """
+        Vector store for this PDF + how it was obtained:
+        {"source": "memory" | "disk" | "built", "seconds", and for builds "parse" / "embed"}.
+        build(chunks, embeddings) makes the store (default FAISS.from_documents);
+        only FAISS stores are saved to disk.
+        """
+        start = time.perf_counter()
+        key = document_key(pdf_bytes, embeddings)
+        with self._lock:
+            store = self._stores.get(key)
+            if store is not None:
+                self._stores.move_to_end(key)
+                self.memory_hits += 1
+                return store, {"source": "memory", "seconds": time.perf_counter() - start}
+
+        info = {"source": "disk"}
+        store = self._load(key, embeddings)
+        if store is None:
+            info["source"] = "built"
+            chunks = split_pdf(pdf_bytes)
+            info["parse"] = time.perf_counter() - start
+            store = (build or FAISS.from_documents)(chunks, embeddings)
+            info["embed"] = time.perf_counter() - start - info["parse"]
+            info["chunks"] = len(chunks)
+            if isinstance(store, FAISS):
+                self._save(key, store)
+
+        with self._lock:
+            if info["source"] == "disk":
+                self.disk_hits += 1
+            else:
+                self.builds += 1
+            self._stores[key] = store
+            self._stores.move_to_end(key)
+            while len(self._stores) > self.max_entries:
+                self._stores.popitem(last=False)
+        info["seconds"] = time.perf_counter() - start
+        return store, info
+
+    def _load(self, key: str, embeddings):
+        path = os.path.join(self.directory, key) if self.directory else None
+        if not path or not os.path.isdir(path):
+            return None
+        try:
+            # index.pkl is a pickle; only this app writes the cache directory
+            store = FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+        except Exception:
+            shutil.rmtree(path, ignore_errors=True)  # incomplete or from an incompatible version
+            return None
+        os.utime(path)  # disk LRU order
+        return store
+
+    def _save(self, key: str, store):
+        if not self.directory:
+            return
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            store.save_local(tmp)
+            os.replace(tmp, os.path.join(self.directory, key))
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # another session saved it first
+            return
+        entries = sorted((e for e in os.scandir(self.directory) if e.is_dir() and not e.name.startswith(".")),
+                         key=lambda e: e.stat().st_mtime)
+        for entry in entries[:max(0, len(entries) - self.max_disk_entries)]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    def stats(self) -> Dict:
+        return {
+            "in_memory": len(self._stores),
+            "max_entries": self.max_entries,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "builds": self.builds,
+            "directory": self.directory,
+        }